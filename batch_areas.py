@@ -0,0 +1,20 @@
+import argparse
+import sys
+from model.area_report import run_report
+
+# Nocny raport powierzchni dla wielu plików projektów - bez uruchamiania GUI (QApplication)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Raport powierzchni budynków, najemców i powierzchni wspólnych.")
+    parser.add_argument('paths', nargs='+', help="pliki projektów (.json, .rpow) lub katalogi")
+    parser.add_argument('-o', '--output', help="plik wynikowy (domyślnie standardowe wyjście)")
+    parser.add_argument('-f', '--format', choices=['csv', 'jsonl'], default='csv', help="format raportu")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="liczba procesów (domyślnie liczba rdzeni)")
+    args = parser.parse_args()
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        count = run_report(args.paths, out, fmt=args.format, workers=args.workers)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"Przetworzono plików: {count}", file=sys.stderr)
@@ -0,0 +1,84 @@
+"""Porównanie jądra geometrycznego (model/geometry.py) z dotychczasowymi pętlami po QPoint.
+
+Uruchomienie: python -m bench.bench_geometry
+"""
+import math
+import timeit
+from array import array
+from PySide6.QtCore import QPoint
+from model.geometry import shoelace2, polygon_segments, project_point, nearest_vertex
+
+SIZES = [10, 100, 1000, 10000, 100000]
+
+
+def make_polygon(n, radius=5000):
+    pts = [QPoint(round(radius*math.cos(2*math.pi*i/n)), round(radius*math.sin(2*math.pi*i/n))) for i in range(n)]
+    pts.append(QPoint(pts[0]))
+    return pts
+
+
+# Dotychczasowe implementacje (pętle po QPoint)
+
+def legacy_area(points):
+    area = 0.0
+    for i in range(len(points) - 1):
+        x1, y1 = points[i].x(), points[i].y()
+        x2, y2 = points[i + 1].x(), points[i + 1].y()
+        area += (x1 * y2 - x2 * y1)
+    return abs(area) / 2.0
+
+
+def legacy_project(points, pt, snap_distance=10):
+    min_dist = snap_distance
+    snap_pos = None
+    n = len(points)
+    for j in range(n - 1):
+        a = points[j]
+        b = points[(j + 1) % n]
+        ab = b - a
+        ap = pt - a
+        ab_len2 = ab.x()**2 + ab.y()**2
+        if ab_len2 == 0:
+            continue
+        t = max(0, min(1, (ap.x()*ab.x() + ap.y()*ab.y()) / ab_len2))
+        proj = QPoint(round(a.x() + ab.x()*t), round(a.y() + ab.y()*t))
+        dist = (pt - proj).manhattanLength()
+        if dist < min_dist:
+            min_dist = dist
+            snap_pos = proj
+    return snap_pos
+
+
+def legacy_hit_vertex(points, point):
+    for idx, pt in enumerate(points):
+        if (point - pt).manhattanLength() < 10:
+            return idx
+    return None
+
+
+def bench(fn, number):
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1000.0
+
+
+def main():
+    print(f"{'wierzch.':>9} | {'operacja':<12} | {'QPoint [ms]':>11} | {'jądro [ms]':>10} | {'x':>6}")
+    for n in SIZES:
+        points = make_polygon(n)
+        coords = array('i', [v for p in points for v in (p.x(), p.y())])
+        probe = QPoint(points[n // 2].x() + 3, points[n // 2].y() - 2)
+        number = max(1, 20000 // n)
+        rows = [
+            ('pole', lambda: legacy_area(points), lambda: abs(shoelace2(coords)) / 2.0),
+            ('rzutowanie', lambda: legacy_project(points, probe),
+             lambda: project_point(probe.x(), probe.y(), polygon_segments(coords), 10)),
+            ('wierzchołek', lambda: legacy_hit_vertex(points, probe),
+             lambda: nearest_vertex(coords, probe.x(), probe.y(), 10)),
+        ]
+        for name, old, new in rows:
+            t_old = bench(old, number)
+            t_new = bench(new, number)
+            print(f"{n:>9} | {name:<12} | {t_old:>11.3f} | {t_new:>10.3f} | {t_old / t_new:>6.1f}")
+
+
+if __name__ == '__main__':
+    main()
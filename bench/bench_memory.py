@@ -0,0 +1,77 @@
+"""Zużycie pamięci: lista QPoint na obiekt (dotychczas) vs bufor array('i') ze __slots__.
+
+Każdy wariant jest mierzony w osobnym procesie (przyrost RSS po zbudowaniu planu).
+Uruchomienie: python -m bench.bench_memory [liczba_wierzchołków]
+"""
+import gc
+import math
+import os
+import subprocess
+import sys
+import time
+
+VERTICES_PER_OBJECT = 100
+
+
+def synthetic_plan(total_vertices):
+    # Plan w formacie to_dict(): kwadratowa siatka lokali o VERTICES_PER_OBJECT wierzchołkach
+    objects = []
+    count = total_vertices // VERTICES_PER_OBJECT
+    side = math.ceil(math.sqrt(count))
+    for k in range(count):
+        cx = (k % side) * 120 + 60
+        cy = (k // side) * 120 + 60
+        pts = [[cx + round(50*math.cos(2*math.pi*i/VERTICES_PER_OBJECT)),
+                cy + round(50*math.sin(2*math.pi*i/VERTICES_PER_OBJECT))] for i in range(VERTICES_PER_OBJECT)]
+        objects.append({'type': 'TenantArea', 'points': pts, 'color': [0, 200, 0, 120], 'name': f'Najemca {k}'})
+    return {'objects': objects, 'scale': 0.1}
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class LegacyArea:
+    # Dotychczasowa reprezentacja: lista QPoint + __dict__
+    def __init__(self, points, color, name):
+        self.points = points
+        self.color = color
+        self.selected_vertex = None
+        self.name = name
+        self.desired_area = None
+
+
+def measure(mode, total_vertices):
+    from PySide6.QtCore import QPoint
+    from PySide6.QtGui import QColor
+    data = synthetic_plan(total_vertices)
+    gc.collect()
+    before = rss_bytes()
+    start = time.perf_counter()
+    if mode == 'legacy':
+        objects = [LegacyArea([QPoint(x, y) for x, y in o['points']], QColor(*o['color']), o['name'])
+                   for o in data['objects']]
+    else:
+        from model.tenant_area import TenantArea
+        objects = [TenantArea.from_dict(o) for o in data['objects']]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    print(f"{mode};{len(objects)};{rss_bytes() - before};{elapsed:.3f}")
+
+
+def main():
+    if len(sys.argv) > 2:
+        measure(sys.argv[1], int(sys.argv[2]))
+        return
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Plan syntetyczny: {total} wierzchołków, {VERTICES_PER_OBJECT} na obiekt")
+    for mode in ('legacy', 'compact'):
+        out = subprocess.run([sys.executable, '-m', 'bench.bench_memory', mode, str(total)],
+                             capture_output=True, text=True, check=True).stdout.strip()
+        _, count, delta, elapsed = out.split(';')
+        print(f"{mode:<8} obiektów: {count:>6}  pamięć: {int(delta) / 2**20:8.1f} MB  budowa: {float(elapsed):.2f} s")
+
+
+if __name__ == '__main__':
+    main()
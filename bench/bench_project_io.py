@@ -0,0 +1,64 @@
+"""Zapis i odczyt projektu: JSON (indent=2) vs binarny format .rpow.
+
+Uruchomienie: python -m bench.bench_project_io [liczba_obiektów]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from bench.bench_memory import synthetic_plan
+from model import project_binary
+from model.tenant_area import TenantArea
+
+VERTICES_PER_OBJECT = 12
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    data = synthetic_plan(count * 100)
+    for o in data['objects']:
+        o['points'] = o['points'][::100 // VERTICES_PER_OBJECT][:VERTICES_PER_OBJECT]
+    objects = [TenantArea.from_dict(o) for o in data['objects']]
+    tmp = tempfile.mkdtemp()
+    json_path = os.path.join(tmp, 'plan.json')
+    bin_path = os.path.join(tmp, 'plan.rpow')
+
+    def save_json():
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'objects': [o.to_dict() for o in objects], 'scale': 0.1}, f, ensure_ascii=False, indent=2)
+
+    def load_json():
+        with open(json_path, 'r', encoding='utf-8') as f:
+            loaded = json.load(f)
+        return [TenantArea.from_dict(o) for o in loaded['objects']]
+
+    def load_binary():
+        with project_binary.ProjectReader(bin_path) as reader:
+            return list(reader.iter_objects())
+
+    def first_binary():
+        with project_binary.ProjectReader(bin_path) as reader:
+            return reader.load(len(reader) // 2)
+
+    rows = [
+        ('zapis JSON', save_json, json_path),
+        ('odczyt JSON', load_json, json_path),
+        ('zapis .rpow', lambda: project_binary.save_project(bin_path, objects, 0.1), bin_path),
+        ('odczyt .rpow', load_binary, bin_path),
+        ('1 obiekt .rpow', first_binary, bin_path),
+    ]
+    print(f"Plan syntetyczny: {len(objects)} obiektów po {VERTICES_PER_OBJECT} wierzchołków")
+    for name, fn, path in rows:
+        elapsed, _ = timed(fn)
+        print(f"{name:<16} {elapsed * 1000:9.1f} ms   plik: {os.path.getsize(path) / 2**20:6.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""Zestaw benchmarków na syntetycznych rzutach pięter z wynikami w JSON.
+
+Mierzy zapis/odczyt (JSON, .rpow), area, snap_to_edges, _get_occupied_cells,
+trafianie w obiekty (hit_test / hit_vertex i przez indeks), wolną powierzchnię
+(całość i po edycji jednego najemcy) i paintEvent canvas renderowany
+offscreen. Każdy pomiar powtarzany jest --repeat razy; do pliku trafiają
+min/mediana/średnia w ms razem z parametrami planu i commitem (domyślnie
+results-<commit>.json w bieżącym katalogu, pomijany przez git), a --compare
+wypisuje zmianę względem wcześniejszego pliku wyników.
+
+Uruchomienie: QT_QPA_PLATFORM=offscreen python -m bench.run_benchmarks
+              [--tenants 100 1000] [--vertices 8] [--building-vertices 64]
+              [--repeat 5] [-o wyniki.json] [--compare poprzednie.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from bench.synthetic import floor_plan, plan_objects  # noqa: E402
+from model import project_binary, Point  # noqa: E402
+from model.project import object_from_dict  # noqa: E402
+from model.spatial_index import SpatialIndex  # noqa: E402
+from model.boolean import FreeSpace  # noqa: E402
+
+
+def measure(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'min_ms': round(min(times), 4), 'median_ms': round(statistics.median(times), 4),
+            'mean_ms': round(statistics.fmean(times), 4), 'runs': repeat}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_plan(params, repeat, tmp):
+    """Lista wyników dla jednego planu."""
+    from PySide6.QtWidgets import QApplication
+    from gui.gui_canvas import Canvas
+    app = QApplication.instance() or QApplication([])
+
+    plan = floor_plan(params['tenants'], params['vertices'], params['building_vertices'], params['seed'])
+    objects = plan_objects(plan)
+    results = []
+
+    def add(name, stats):
+        results.append(dict(name=name, params=params, **stats))
+        print(f"  {name:<28} min {stats['min_ms']:>10.3f} ms  mediana {stats['median_ms']:>10.3f} ms", file=sys.stderr)
+
+    # Zapis i odczyt
+    json_path = os.path.join(tmp, 'plan.json')
+    bin_path = os.path.join(tmp, 'plan.rpow')
+
+    def save_json():
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump({'objects': [o.to_dict() for o in objects], 'scale': 0.1}, f, ensure_ascii=False, indent=2)
+
+    def load_json():
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return [object_from_dict(d) for d in json.load(f)['objects']]
+
+    def load_rpow():
+        with project_binary.ProjectReader(bin_path) as reader:
+            return list(reader.iter_objects())
+
+    add('save_json', measure(save_json, repeat))
+    add('load_json', measure(load_json, repeat))
+    add('save_rpow', measure(lambda: project_binary.save_project(bin_path, objects, 0.1), repeat))
+    add('load_rpow', measure(load_rpow, repeat))
+
+    # Pole powierzchni (bez pamięci podręcznej wersji)
+    def invalidate():
+        for o in objects:
+            o.set_coords(o.coords)
+    add('area', measure(lambda: [o.area(0.1) for o in objects], repeat, setup=invalidate))
+
+    # Przyciąganie jak przy przeciąganiu: co dziesiąty najemca względem budynku i reszty
+    building = objects[0]
+    tenants = [o for o in objects if o.__class__.__name__ == 'TenantArea']
+    moving = tenants[::10] or tenants
+    index = SpatialIndex()
+    index.rebuild(objects)
+
+    def snap():
+        for t in moving:
+            t.snap_to_edges(building, objects, index=index)
+    add('snap_to_edges', measure(snap, repeat))
+
+    # Trafianie: losowe punkty w obrysie budynku, sprawdzane od góry listy jak w mousePressEvent
+    rng = random.Random(params['seed'])
+    x0, y0, x1, y1 = building.bounding_box()
+    probes = [Point(rng.randint(x0, x1), rng.randint(y0, y1)) for _ in range(200)]
+
+    def hit():
+        for p in probes:
+            for o in reversed(objects):
+                if o.hit_test(p):
+                    break
+
+    def hit_vertex():
+        for p in probes:
+            for o in reversed(objects):
+                if o.hit_vertex(p) is not None:
+                    break
+    add('hit_test_200', measure(hit, repeat))
+    add('hit_vertex_200', measure(hit_vertex, repeat))
+    # To samo przez indeks (kolejność warstw jak na liście obiektów)
+    add('pick_200', measure(lambda: [index.pick(p.x(), p.y()) for p in probes], repeat))
+    add('pick_vertex_200', measure(lambda: [index.pick_vertex(p.x(), p.y()) for p in probes], repeat))
+
+    # Wolna powierzchnia: pełne przeliczenie i przeliczenie po przesunięciu jednego najemcy
+    free_space = FreeSpace()
+    add('free_space_full', measure(lambda: free_space.update(objects), repeat, setup=free_space.clear))
+    step = [1]
+
+    def nudge():
+        step[0] = -step[0]
+        moving[0].move(Point(step[0], 0))
+    add('free_space_edit', measure(lambda: free_space.update(objects), repeat, setup=nudge))
+
+    # Canvas offscreen: raster zajętości i paintEvent (zimne kafelki i ponowne rysowanie)
+    canvas = Canvas()
+    canvas.resize(1280, 800)
+    canvas.load_objects(objects, 0.1)
+    add('occupied_cells_cold', measure(canvas._get_occupied_cells, repeat, setup=canvas.occupancy.clear))
+    add('occupied_cells_warm', measure(canvas._get_occupied_cells, repeat))
+    for zoom in (1.0, 0.25):
+        canvas.set_zoom(zoom)
+        add(f'paint_cold_zoom_{zoom}', measure(canvas.grab, repeat, setup=canvas.tile_cache.invalidate_all))
+        add(f'paint_warm_zoom_{zoom}', measure(canvas.grab, repeat))
+    canvas.deleteLater()
+    app.processEvents()
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    key = lambda r: (r['name'], json.dumps(r['params'], sort_keys=True))
+    old = {key(r): r for r in baseline['results']}
+    print(f"porównanie z {baseline_path} (commit {baseline['meta'].get('commit')}):")
+    for r in results:
+        prev = old.get(key(r))
+        if prev is None or not prev['median_ms']:
+            continue
+        ratio = r['median_ms'] / prev['median_ms']
+        mark = '  <-- wolniej' if ratio > 1.2 else ''
+        print(f"  {r['name']:<28} {r['params']['tenants']:>6} najemców  x{ratio:6.2f}{mark}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarki na syntetycznych rzutach pięter.")
+    parser.add_argument('--tenants', type=int, nargs='+', default=[100, 1000], help="liczby najemców")
+    parser.add_argument('--vertices', type=int, default=8, help="wierzchołki na wielokąt")
+    parser.add_argument('--building-vertices', type=int, default=64, help="wierzchołki obrysu budynku")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('-o', '--output', help="plik wyników JSON (domyślnie results-<commit>.json w bieżącym katalogu)")
+    parser.add_argument('--compare', help="wcześniejszy plik wyników do porównania")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for tenants in args.tenants:
+            params = {'tenants': tenants, 'vertices': args.vertices,
+                      'building_vertices': args.building_vertices, 'seed': args.seed}
+            print(f"plan: {params}", file=sys.stderr)
+            results.extend(bench_plan(params, args.repeat, tmp))
+    output = args.output or f"results-{commit or 'local'}.json"
+    meta = {'commit': commit, 'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'repeat': args.repeat}
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, ensure_ascii=False, indent=2)
+    print(f"wyniki: {output}", file=sys.stderr)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Generator syntetycznych rzutów pięter do benchmarków i testów ręcznych.
+
+Budynek to prostokąt o zadanej liczbie wierzchołków obrysu (lekko falujące
+ściany), w środku korytarz (powierzchnia wspólna) i siatka lokali najemców
+stykających się ścianami. Wynik jest w formacie to_dict() projektu, więc można
+go zapisać jako JSON, .rpow albo .rpowp (kilka pięter).
+
+Uruchomienie: python -m bench.synthetic [--tenants N] [--vertices V] [--building-vertices B]
+              [--floors F] [--seed S] -o plan.json|plan.rpow|plan.rpowp
+"""
+import argparse
+import json
+import math
+import random
+
+CELL = 200       # szerokość lokalu w pikselach (20 m przy skali 0.1)
+CORRIDOR = 60    # szerokość korytarza
+WALL_JITTER = 4  # amplituda falowania ścian budynku
+
+
+def _perimeter(x0, y0, x1, y1, count):
+    """count punktów rozłożonych po obwodzie prostokąta (co najmniej narożniki), zgodnie z ruchem wskazówek zegara."""
+    corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+    count = max(4, count)
+    extra = count - 4
+    lengths = [x1 - x0, y1 - y0, x1 - x0, y1 - y0]
+    total = sum(lengths)
+    per_edge = [extra * l // total for l in lengths]
+    for i in range(extra - sum(per_edge)):
+        per_edge[i % 4] += 1
+    points = []
+    for k in range(4):
+        ax, ay = corners[k]
+        bx, by = corners[(k + 1) % 4]
+        points.append((ax, ay))
+        n = per_edge[k]
+        for i in range(1, n + 1):
+            t = i / (n + 1)
+            points.append((round(ax + (bx - ax)*t), round(ay + (by - ay)*t)))
+    return points
+
+
+def floor_plan(tenants=100, vertices=8, building_vertices=16, seed=0, scale=0.1):
+    """Rzut piętra jako słownik {'objects': [...], 'scale': ...}.
+
+    tenants - liczba lokali, vertices - wierzchołki na lokal,
+    building_vertices - złożoność obrysu budynku.
+    """
+    rng = random.Random(seed)
+    cols = max(1, math.ceil(math.sqrt(tenants / 2)))
+    rows_per_side = math.ceil(tenants / (2 * cols))
+    margin = 20
+    width = cols * CELL
+    height = 2 * rows_per_side * CELL + CORRIDOR
+    x0, y0 = margin, margin
+    outline = []
+    for x, y in _perimeter(x0, y0, x0 + width, y0 + height, building_vertices):
+        on_corner = (x in (x0, x0 + width)) and (y in (y0, y0 + height))
+        if not on_corner:
+            # ściany lekko na zewnątrz, żeby lokale przy ścianach mieściły się w obrysie
+            if y == y0:
+                y -= rng.randint(0, WALL_JITTER)
+            elif y == y0 + height:
+                y += rng.randint(0, WALL_JITTER)
+            elif x == x0:
+                x -= rng.randint(0, WALL_JITTER)
+            else:
+                x += rng.randint(0, WALL_JITTER)
+        outline.append([x, y])
+    objects = [{'type': 'Building', 'points': outline, 'color': [0, 0, 255, 60]}]
+    corridor_y = y0 + rows_per_side * CELL
+    objects.append({'type': 'CommonArea', 'color': [200, 200, 0, 120],
+                    'points': [list(p) for p in _perimeter(x0, corridor_y, x0 + width, corridor_y + CORRIDOR, vertices)]})
+    for k in range(tenants):
+        side, idx = divmod(k, rows_per_side * cols)
+        row, col = divmod(idx, cols)
+        tx = x0 + col * CELL
+        ty = y0 + row * CELL if side == 0 else corridor_y + CORRIDOR + row * CELL
+        color = [rng.randint(40, 220), rng.randint(40, 220), rng.randint(40, 220), 120]
+        objects.append({'type': 'TenantArea', 'name': f'Najemca {k + 1}', 'color': color,
+                        'points': [list(p) for p in _perimeter(tx, ty, tx + CELL, ty + CELL, vertices)]})
+    return {'objects': objects, 'scale': scale}
+
+
+def plan_objects(plan):
+    """Obiekty modelu z planu (bez Qt)."""
+    from model.project import object_from_dict
+    return [o for o in map(object_from_dict, plan['objects']) if o is not None]
+
+
+def write_plan(path, tenants=100, vertices=8, building_vertices=16, floors=1, seed=0):
+    lower = path.lower()
+    if lower.endswith('.rpowp'):
+        from model.project import Project, Floor, save_project
+        project = Project.single_floor(plan_objects(floor_plan(tenants, vertices, building_vertices, seed)))
+        for f in range(1, floors):
+            project.buildings[0].floors.append(
+                Floor(f"Piętro {f}", plan_objects(floor_plan(tenants, vertices, building_vertices, seed + f))))
+        save_project(path, project)
+    elif lower.endswith('.rpow'):
+        from model import project_binary
+        project_binary.save_project(path, plan_objects(floor_plan(tenants, vertices, building_vertices, seed)), 0.1)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(floor_plan(tenants, vertices, building_vertices, seed), f, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Syntetyczny rzut piętra (JSON / .rpow / .rpowp).")
+    parser.add_argument('-o', '--output', required=True, help="plik wynikowy")
+    parser.add_argument('--tenants', type=int, default=100, help="liczba najemców")
+    parser.add_argument('--vertices', type=int, default=8, help="wierzchołki na wielokąt")
+    parser.add_argument('--building-vertices', type=int, default=16, help="wierzchołki obrysu budynku")
+    parser.add_argument('--floors', type=int, default=1, help="liczba pięter (tylko .rpowp)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    write_plan(args.output, args.tenants, args.vertices, args.building_vertices, args.floors, args.seed)
@@ -0,0 +1,88 @@
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer
+from PySide6.QtGui import QBrush, QIcon, QPixmap, QPainter
+from .gui_qt_adapter import qcolor
+
+
+class AreaListModel(QAbstractListModel):
+    """Lista najemców lub powierzchni wspólnych oparta bezpośrednio na obiektach canvas.
+
+    Zmiany pojedynczych obiektów są zbierane i wysyłane jako dataChanged
+    najwyżej raz na klatkę; ikony kolorów są cache'owane per kolor.
+    """
+
+    FRAME_MS = 16
+
+    def __init__(self, type_name, parent=None):
+        super().__init__(parent)
+        self.type_name = type_name  # 'TenantArea' albo 'CommonArea'
+        self.scale = 0.1
+        self._objects = []
+        self._rows = {}  # id(obj) -> wiersz
+        self._pending = set()
+        self._icons = {}
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush)
+
+    def set_objects(self, objects, scale):
+        self.beginResetModel()
+        self._objects = [o for o in objects if o.__class__.__name__ == self.type_name]
+        self._rows = {id(o): row for row, o in enumerate(self._objects)}
+        self.scale = scale
+        self._pending.clear()
+        self.endResetModel()
+
+    def object_at(self, row):
+        if 0 <= row < len(self._objects):
+            return self._objects[row]
+        return None
+
+    def objects_changed(self, objects):
+        for obj in objects:
+            row = self._rows.get(id(obj))
+            if row is not None:
+                self._pending.add(row)
+        if self._pending and not self._flush_timer.isActive():
+            self._flush_timer.start(self.FRAME_MS)
+
+    def _flush(self):
+        rows = sorted(self._pending)
+        self._pending.clear()
+        # sąsiednie wiersze zgłaszamy jednym sygnałem
+        start = prev = None
+        for row in rows + [None]:
+            if start is not None and (row is None or row != prev + 1):
+                self.dataChanged.emit(self.index(start), self.index(prev))
+                start = None
+            if start is None:
+                start = row
+            prev = row
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._objects)
+
+    def data(self, index, role=Qt.DisplayRole):
+        obj = self.object_at(index.row())
+        if obj is None:
+            return None
+        if role == Qt.DisplayRole:
+            if self.type_name == 'TenantArea':
+                return f"{obj.name} | {obj.area(self.scale):.2f} m²"
+            return f"Powierzchnia wspólna | {obj.area(self.scale):.2f} m²"
+        if role == Qt.DecorationRole:
+            return self._colored_square_icon(obj.color)
+        return None
+
+    def _colored_square_icon(self, color):
+        key = color.rgba()
+        icon = self._icons.get(key)
+        if icon is None:
+            pix = QPixmap(16, 16)
+            pix.fill(Qt.transparent)
+            painter = QPainter(pix)
+            painter.setBrush(QBrush(qcolor(color)))
+            painter.setPen(Qt.NoPen)
+            painter.drawRect(2, 2, 12, 12)
+            painter.end()
+            icon = self._icons[key] = QIcon(pix)
+        return icon
@@ -1,11 +1,22 @@
 from PySide6.QtWidgets import QWidget, QColorDialog, QInputDialog
-from PySide6.QtGui import QPainter, QPen, QColor, QMouseEvent, QPainterPath, QPolygon
-from PySide6.QtCore import Qt, QPoint
-import math
+from PySide6.QtGui import QPainter, QPen, QColor, QMouseEvent, QPainterPath, QPolygon, QPolygonF
+from PySide6.QtCore import Qt, QPoint, QPointF, QRectF
+from array import array
 from model.building import Building
 from model.tenant_area import TenantArea
 from model.common_area import CommonArea
 from model.area_object import AreaObject
+from model.spatial_index import SpatialIndex, SNAP_DISTANCE, within
+from model.occupancy import OccupancyRaster
+from model.area_ledger import AreaLedger
+from model.boolean import FreeSpace
+from model.validation import Validator
+from model.commands import CommandHistory, AddObject, InsertVertex, EditVertices, MoveObject, CompositeCommand
+from .gui_render_cache import TileCache
+from .gui_grid import draw_grid
+from .gui_qt_adapter import draw_area_object, qpoint, qpolygon
+from .gui_profiler import profiler, draw_overlay
+from .gui_tasks import TaskScheduler
 
 class Canvas(QWidget):
     def __init__(self, parent=None):
@@ -19,8 +30,10 @@ class Canvas(QWidget):
         self.draw_mode = 'building'  # 'building', 'common', 'tenant'
         self.temp_points = []
         self.on_building_closed = None
-        self.on_seeds_changed = None
+        self.on_seeds_changed = None    # zmiana listy obiektów
+        self.on_objects_changed = None  # zmiana geometrii konkretnych obiektów (lista)
         self.setMouseTracking(True)
+        self.hover = None  # (obiekt, indeks wierzchołka albo None) pod kursorem
         self.highlighted_idx = None
         self.highlighted_type = None
         self.show_grid = True  # widoczność siatki
@@ -29,6 +42,32 @@ class Canvas(QWidget):
         self.snap_to_grid = True
         # tryb interakcji: 'default', 'add_vertex', 'move_vertex'
         self.interaction_mode = 'default'
+        # indeks przestrzenny odcinków i wierzchołków (przyciąganie), zsynchronizowany z self.objects
+        self.spatial_index = SpatialIndex()
+        # raster zajętych kratek, przeliczany tylko dla zmienionych obiektów
+        self.occupancy = OccupancyRaster()
+        # bieżące sumy powierzchni (budynek, najemcy, wspólne) aktualizowane różnicą przy każdej edycji
+        self.ledger = AreaLedger()
+        # wolna powierzchnia (budynek minus najemcy i wspólne) jako dokładny wielokąt, przeliczana fragmentami
+        self.free_space = FreeSpace()
+        self.show_free_space = False
+        self._free_space_path = (None, None)  # (wersja free_space, QPainterPath)
+        # kafelki warstwy statycznej (siatka + obiekty poza przesuwanym/mrugającym)
+        self.tile_cache = TileCache(self._render_static_tile)
+        self._object_rects = {}  # id(obj) -> ostatnio znany obszar obiektu (do unieważniania kafelków)
+        # historia cofania/ponawiania (tylko różnice); przeciąganie zapisywane jako jedno polecenie
+        self.history = CommandHistory()
+        self._drag_start = None  # kopia współrzędnych przeciąganego obiektu z chwili wciśnięcia
+        self._drag_moved = [0, 0]  # łączne przesunięcie zawartości budynku
+        self._drag_insert = None
+        # walidacja (nakładanie, wyjście poza budynek, samoprzecięcia) liczona przyrostowo przy rysowaniu
+        # liczona w tle na kopiach obiektów (jeden wątek, nowsze zlecenie zastępuje oczekujące)
+        self.validator = Validator()
+        self.tasks = TaskScheduler(self, workers=1)
+        self._snapshots = {}  # id(obj) -> (obj, kopia z bieżącej wersji)
+        self.show_issues = True
+        self.issues = []
+        self.on_issues_changed = None  # funkcja(lista Issue) - gdy zmieni się liczba problemów
 
     def set_zoom(self, zoom):
         self.zoom = zoom
@@ -56,12 +95,50 @@ class Canvas(QWidget):
 
     def toggle_grid(self):
         self.show_grid = not self.show_grid
+        self.invalidate_all()
+
+    def set_show_issues(self, show):
+        self.show_issues = show
+        self.update()
+
+    def set_show_free_space(self, show):
+        self.show_free_space = show
         self.update()
 
     def set_interaction_mode(self, mode):
         self.interaction_mode = mode
         self.update()
 
+    def _add_object(self, obj):
+        self.objects.append(obj)
+        self.history.push(AddObject(obj, len(self.objects) - 1))
+        self.spatial_index.insert(obj)
+        self.ledger.add(obj)
+        self._object_rects[id(obj)] = self._object_rect(obj)
+        self.tile_cache.invalidate_scene_rect(self._object_rects[id(obj)])
+
+    def _object_changed(self, obj):
+        # Wywoływane po każdej zmianie geometrii pojedynczego obiektu
+        self.spatial_index.update(obj)
+        self.ledger.update(obj)
+        self.invalidate_object(obj, self._object_rects.get(id(obj)))
+        self._object_rects[id(obj)] = self._object_rect(obj)
+        if self.on_objects_changed:
+            self.on_objects_changed([obj])
+
+    def _objects_reset(self):
+        self.spatial_index.rebuild(self.objects)
+        self.ledger.rebuild(self.objects)
+        self.free_space.clear()
+        self.occupancy.clear()
+        # trwająca walidacja używa starego walidatora; jej wynik jest odrzucany
+        self.tasks.cancel('validate')
+        self.validator = Validator()
+        self._snapshots = {}
+        self.hover = None
+        self._object_rects = {id(obj): self._object_rect(obj) for obj in self.objects}
+        self.tile_cache.invalidate_all()
+
     def keyPressEvent(self, event):
         if event.key() == Qt.Key_N:
             self.set_interaction_mode('add_vertex')
@@ -71,14 +148,24 @@ class Canvas(QWidget):
             self.set_interaction_mode('default')
         super().keyPressEvent(event)
 
+    def _closes_shape(self, point):
+        # Kliknięcie przy pierwszym punkcie zamyka rysowany kształt (ten sam test odległości co przyciąganie)
+        if len(self.temp_points) <= 2:
+            return False
+        first = self.temp_points[0]
+        return within(point.x(), point.y(), first.x(), first.y(), SNAP_DISTANCE)
+
     def mousePressEvent(self, event: QMouseEvent):
         point = (event.position() / self.zoom).toPoint()
         # Dodawanie punktu do najemcy po kliknięciu na krawędź (tryb add_vertex)
         if self.interaction_mode == 'add_vertex':
             for obj in reversed(self.objects):
                 if isinstance(obj, TenantArea):
-                    before = len(obj.points)
-                    if obj.insert_vertex(point, threshold=10):
+                    new_idx = obj.insert_vertex(point, threshold=10)
+                    if new_idx is not None:
+                        # Wstawienie i ewentualne przeciągnięcie nowego punktu trafiają do historii razem przy puszczeniu
+                        insert = InsertVertex(obj, new_idx, obj.coords[2*new_idx], obj.coords[2*new_idx + 1])
+                        self._object_changed(obj)
                         min_idx = None
                         min_dist = float('inf')
                         for idx, pt in enumerate(obj.points):
@@ -92,32 +179,34 @@ class Canvas(QWidget):
                         else:
                             self.selected_obj = obj
                             self.selected_vertex = None
-                        if self.on_seeds_changed:
-                            self.on_seeds_changed(self.get_all_seeds())
+                        self._begin_drag(obj, insert)
                         self.update()
                         return
         # Przesuwanie punktu tylko w trybie move_vertex
         if self.interaction_mode == 'move_vertex':
-            for obj in reversed(self.objects):
-                idx = obj.hit_vertex(point)
-                if idx is not None:
-                    self.selected_obj = obj
-                    self.selected_vertex = idx
-                    self.drag_offset = obj.points[idx] - point
-                    return
+            # kratki wierzchołków indeksu zamiast sprawdzania każdego obiektu od góry
+            hit = self.spatial_index.pick_vertex(point.x(), point.y())
+            if hit is not None:
+                obj, idx = hit
+                self.selected_obj = obj
+                self.selected_vertex = idx
+                self.drag_offset = qpoint(obj.points[idx]) - point
+                self._begin_drag(obj)
+                return
         # Przesuwanie całego obiektu: tylko środkowy przycisk lub lewy + Ctrl
         if (event.button() == Qt.MiddleButton) or (event.button() == Qt.LeftButton and (event.modifiers() & Qt.ControlModifier)):
-            for obj in reversed(self.objects):
-                if obj.hit_test(point):
-                    self.selected_obj = obj
-                    self.selected_vertex = None
-                    self.drag_offset = obj.points[0] - point
-                    return
+            obj = self.spatial_index.pick(point.x(), point.y())
+            if obj is not None:
+                self.selected_obj = obj
+                self.selected_vertex = None
+                self.drag_offset = qpoint(obj.points[0]) - point
+                self._begin_drag(obj)
+                return
         # Rysowanie nowego obiektu
         if self.draw_mode == 'building' and not any(isinstance(o, Building) for o in self.objects):
-            if self.temp_points and (point - self.temp_points[0]).manhattanLength() < 10 and len(self.temp_points) > 2:
+            if self._closes_shape(point):
                 self.temp_points.append(self.temp_points[0])
-                self.objects.append(Building(list(self.temp_points)))
+                self._add_object(Building(list(self.temp_points)))
                 if self.on_building_closed:
                     self.on_building_closed(self.objects[-1].area(self.scale))
                 self.temp_points = []
@@ -126,9 +215,9 @@ class Canvas(QWidget):
                 self.temp_points.append(point)
                 self.update()
         elif self.draw_mode == 'common':
-            if self.temp_points and (point - self.temp_points[0]).manhattanLength() < 10 and len(self.temp_points) > 2:
+            if self._closes_shape(point):
                 self.temp_points.append(self.temp_points[0])
-                self.objects.append(CommonArea(list(self.temp_points)))
+                self._add_object(CommonArea(list(self.temp_points)))
                 self.temp_points = []
                 if self.on_seeds_changed:
                     self.on_seeds_changed(self.get_all_seeds())
@@ -137,7 +226,7 @@ class Canvas(QWidget):
                 self.temp_points.append(point)
                 self.update()
         elif self.draw_mode == 'tenant':
-            if self.temp_points and (point - self.temp_points[0]).manhattanLength() < 10 and len(self.temp_points) > 2:
+            if self._closes_shape(point):
                 self.temp_points.append(self.temp_points[0])
                 # Dialog wyboru koloru i nazwy
                 color = QColorDialog.getColor(QColor(0,200,0,120), self, 'Wybierz kolor najemcy')
@@ -146,7 +235,7 @@ class Canvas(QWidget):
                 name, ok = QInputDialog.getText(self, 'Nazwa najemcy', 'Podaj nazwę najemcy:')
                 if not ok or not name:
                     name = 'Najemca'
-                self.objects.append(TenantArea(list(self.temp_points), color, name))
+                self._add_object(TenantArea(list(self.temp_points), color, name))
                 self.temp_points = []
                 if self.on_seeds_changed:
                     self.on_seeds_changed(self.get_all_seeds())
@@ -155,6 +244,7 @@ class Canvas(QWidget):
                 self.temp_points.append(point)
                 self.update()
 
+    @profiler.timed('Canvas.mouseMoveEvent')
     def mouseMoveEvent(self, event: QMouseEvent):
         point = (event.position() / self.zoom).toPoint()
         if self.selected_obj and self.selected_vertex is not None:
@@ -162,52 +252,132 @@ class Canvas(QWidget):
             # SNAP: przyciąganie do krawędzi
             building = next((o for o in self.objects if isinstance(o, Building)), None)
             others = [o for o in self.objects if o is not self.selected_obj]
-            self.selected_obj.snap_to_edges(building, others)
-            if self.on_seeds_changed:
-                self.on_seeds_changed(self.get_all_seeds())
+            with profiler.span('AreaObject.snap_to_edges'):
+                self.selected_obj.snap_to_edges(building, others, index=self.spatial_index)
+            self._object_changed(self.selected_obj)
             self.update()
         elif self.selected_obj:
-            delta = point - self.selected_obj.points[0]
+            delta = point - qpoint(self.selected_obj.points[0])
             self.selected_obj.move(delta)
             # SNAP: przyciąganie do krawędzi
             building = next((o for o in self.objects if isinstance(o, Building)), None)
             others = [o for o in self.objects if o is not self.selected_obj]
-            self.selected_obj.snap_to_edges(building, others)
+            with profiler.span('AreaObject.snap_to_edges'):
+                self.selected_obj.snap_to_edges(building, others, index=self.spatial_index)
+            self._object_changed(self.selected_obj)
             # Jeśli przesuwamy budynek, przesuwamy wszystkie inne obiekty
             if isinstance(self.selected_obj, Building):
                 for obj in self.objects:
                     if obj is not self.selected_obj:
                         obj.move(delta)
-            if self.on_seeds_changed:
-                self.on_seeds_changed(self.get_all_seeds())
+                        self._object_changed(obj)
+                self._drag_moved[0] += delta.x()
+                self._drag_moved[1] += delta.y()
+            self.update()
+        else:
+            self._update_hover(point)
+
+    def _update_hover(self, point):
+        # Podświetlenie obiektu (albo wierzchołka w trybie move_vertex) pod kursorem
+        if self.interaction_mode == 'move_vertex':
+            hover = self.spatial_index.pick_vertex(point.x(), point.y())
+        else:
+            obj = self.spatial_index.pick(point.x(), point.y())
+            hover = (obj, None) if obj is not None else None
+        if hover != self.hover:
+            self.hover = hover
+            self.update()
+
+    def leaveEvent(self, event):
+        if self.hover is not None:
+            self.hover = None
             self.update()
+        super().leaveEvent(event)
 
     def mouseReleaseEvent(self, event: QMouseEvent):
+        self._end_drag()
         self.selected_obj = None
         self.selected_vertex = None
 
+    def _begin_drag(self, obj, insert=None):
+        self._drag_start = array('i', obj.coords)
+        self._drag_moved = [0, 0]
+        self._drag_insert = insert  # InsertVertex wykonany przy wciśnięciu (tryb add_vertex)
+
+    def _end_drag(self):
+        # Cała sekwencja ruchów myszy jako jedno polecenie: różnica względem stanu z wciśnięcia
+        if self._drag_start is None or self.selected_obj is None:
+            self._drag_start = None
+            return
+        obj = self.selected_obj
+        command = EditVertices.diff(obj, self._drag_start)
+        if self._drag_insert is not None:
+            command = CompositeCommand([self._drag_insert, command]) if command else self._drag_insert
+            self._drag_insert = None
+        dx, dy = self._drag_moved
+        if isinstance(obj, Building) and (dx or dy):
+            moved = [MoveObject(o, dx, dy) for o in self.objects if o is not obj]
+            command = CompositeCommand(([command] if command else []) + moved)
+        self.history.push(command)
+        self._drag_start = None
+
+    def execute(self, command):
+        """Wykonuje polecenie, zapisuje je w historii i odświeża widok."""
+        self.history.execute(command, self.objects)
+        self._command_done(command)
+
+    def undo(self):
+        command = self.history.undo(self.objects)
+        if command is not None:
+            self._command_done(command)
+
+    def redo(self):
+        command = self.history.redo(self.objects)
+        if command is not None:
+            self._command_done(command)
+
+    def _command_done(self, command):
+        if command.structural:
+            self._objects_reset()
+            building = next((obj for obj in self.objects if isinstance(obj, Building)), None)
+            if self.on_building_closed:
+                self.on_building_closed(building.area(self.scale) if building is not None else 0.0)
+            if self.on_seeds_changed:
+                self.on_seeds_changed(self.get_all_seeds())
+        else:
+            for obj in command.touched():
+                self._object_changed(obj)
+        self.update()
+
+    @profiler.timed('Canvas.paintEvent')
     def paintEvent(self, event):
         painter = QPainter(self)
+        # Warstwa statyczna: siatka i nieaktywne obiekty z kafelków
+        dynamic = self._dynamic_objects()
+        self._sync_dynamic_layer(dynamic)
+        self.tile_cache.draw(painter, self.zoom, QRectF(event.rect()), self.devicePixelRatioF())
         painter.setRenderHint(QPainter.Antialiasing)
         painter.scale(self.zoom, self.zoom)
-        # Rysowanie siatki i podświetlanie zajętych kratek (wariant 2)
-        highlight_cells = self._get_occupied_cells() if self.show_grid and hasattr(self, 'show_occupied') and self.show_occupied else None
-        if self.show_grid:
-            self._draw_grid(painter, highlight_cells=highlight_cells)
-        tenant_idx = 0
-        common_idx = 0
+        # Podświetlanie zajętych kratek (wariant 2)
+        highlight_rows = self._get_occupied_rows() if self.show_grid and hasattr(self, 'show_occupied') and self.show_occupied else None
+        if highlight_rows:
+            self._draw_occupied(painter, highlight_rows)
+        # Wolna powierzchnia budynku
+        if self.show_free_space:
+            self._draw_free_space(painter)
+        # Warstwa dynamiczna: przesuwany i mrugający obiekt
+        visible_rect = QRectF(event.rect()).adjusted(0, 0, 1, 1)
+        visible_rect = QRectF(visible_rect.topLeft() / self.zoom, visible_rect.bottomRight() / self.zoom)
         for obj in self.objects:
-            highlight = (obj is self.selected_obj)
-            # Mruganie dowolnego obiektu
-            if self.highlighted_type == 'tenant' and obj.__class__.__name__ == 'TenantArea':
-                if tenant_idx == self.highlighted_idx:
-                    highlight = True
-                tenant_idx += 1
-            elif self.highlighted_type == 'common' and obj.__class__.__name__ == 'CommonArea':
-                if common_idx == self.highlighted_idx:
-                    highlight = True
-                common_idx += 1
-            obj.draw(painter, highlight=highlight)
+            if id(obj) in dynamic:
+                draw_area_object(painter, obj, highlight=dynamic[id(obj)], visible_rect=visible_rect)
+        # Obiekt pod kursorem: sam obrys (bez przerysowania kafelków)
+        if self.hover is not None and self.selected_obj is None:
+            self._draw_hover(painter)
+        # Konflikty geometrii: nakładanie się, wyjście poza budynek, samoprzecięcia
+        if self.show_issues:
+            self._update_issues()
+            self._draw_issues(painter, visible_rect)
         # Rysowanie aktualnie rysowanego obiektu
         if self.temp_points:
             color = QColor(0,0,255,60) if self.draw_mode == 'building' else QColor(200,200,0,120) if self.draw_mode == 'common' else QColor(0,200,0,120)
@@ -218,63 +388,177 @@ class Canvas(QWidget):
             for pt in self.temp_points:
                 painter.setBrush(color)
                 painter.drawEllipse(pt, 4, 4)
+        # Nakładka z czasami gorących ścieżek (F3)
+        if profiler.enabled:
+            draw_overlay(painter, profiler, QRectF(self.rect()))
 
-    def _draw_grid(self, painter, highlight_cells=None):
-        # Wyznacz rozmiar kratki w pikselach na podstawie skali i zoomu
+    def toggle_profiler(self, enabled=None):
+        profiler.enabled = not profiler.enabled if enabled is None else enabled
+        self.update()
+
+    def _dynamic_objects(self):
+        # id obiektu -> highlight dla obiektów rysowanych w każdej klatce
+        dynamic = {}
+        if self.selected_obj is not None:
+            dynamic[id(self.selected_obj)] = True
+        tenant_idx = 0
+        common_idx = 0
+        for obj in self.objects:
+            # Mruganie dowolnego obiektu
+            if self.highlighted_type == 'tenant' and obj.__class__.__name__ == 'TenantArea':
+                if tenant_idx == self.highlighted_idx:
+                    dynamic[id(obj)] = True
+                tenant_idx += 1
+            elif self.highlighted_type == 'common' and obj.__class__.__name__ == 'CommonArea':
+                if common_idx == self.highlighted_idx:
+                    dynamic[id(obj)] = True
+                common_idx += 1
+        return dynamic
+
+    def _sync_dynamic_layer(self, dynamic):
+        # Obiekty przechodzące między warstwami unieważniają swoje kafelki
+        changed = self.tile_cache.excluded.symmetric_difference(dynamic)
+        if changed:
+            for obj in self.objects:
+                if id(obj) in changed:
+                    self.tile_cache.invalidate_scene_rect(self._object_rect(obj))
+            self.tile_cache.excluded = set(dynamic)
+
+    def _render_static_tile(self, painter, rect):
+        if self.show_grid:
+            self._draw_grid(painter, rect)
+        for obj in self.objects:
+            if id(obj) not in self.tile_cache.excluded:
+                draw_area_object(painter, obj, visible_rect=rect)
+
+    def _object_rect(self, obj):
+        # Obszar sceny zajmowany przez obiekt razem z obrysem i uchwytami wierzchołków
+        bbox = obj.bounding_box()
+        if bbox is None:
+            return QRectF()
+        x0, y0, x1, y1 = bbox
+        return QRectF(x0, y0, x1 - x0, y1 - y0).adjusted(-6, -6, 6, 6)
+
+    def invalidate_object(self, obj, old_rect=None):
+        """Odświeża kafelki z obiektem (np. po zmianie koloru)."""
+        if id(obj) not in self.tile_cache.excluded:
+            self.tile_cache.invalidate_scene_rect(old_rect)
+            self.tile_cache.invalidate_scene_rect(self._object_rect(obj))
+        self.update()
+
+    def invalidate_all(self):
+        self.tile_cache.invalidate_all()
+        self.update()
+
+    @profiler.timed('Canvas._draw_grid')
+    def _draw_grid(self, painter, rect):
+        # Podstawowa kratka (grid_base metrów) w pikselach sceny; gęstość linii zależy od zoomu
+        draw_grid(painter, rect, self.grid_base / self.scale, self.grid_color)
+
+    def _draw_occupied(self, painter, highlight_rows):
         grid_size = self.grid_base / self.scale
-        grid_size_px = grid_size * self.zoom
-        rect = self.rect()
         painter.save()
-        painter.setPen(QPen(self.grid_color, 1))
-        # Rysuj pionowe linie
-        x = 0
-        while x < rect.width() / self.zoom:
-            painter.drawLine(int(x), 0, int(x), int(rect.height() / self.zoom))
-            x += grid_size
-        # Rysuj poziome linie
-        y = 0
-        while y < rect.height() / self.zoom:
-            painter.drawLine(0, int(y), int(rect.width() / self.zoom), int(y))
-            y += grid_size
-        # Opcjonalnie podświetl zajęte kratki
-        if highlight_cells:
-            painter.setBrush(QColor(255, 200, 0, 60))
-            painter.setPen(Qt.NoPen)
-            for gx, gy in highlight_cells:
-                painter.drawRect(int(gx*grid_size), int(gy*grid_size), int(grid_size), int(grid_size))
+        painter.setBrush(QColor(255, 200, 0, 60))
+        painter.setPen(Qt.NoPen)
+        for gy, row in highlight_rows.items():
+            for gx0, gx1 in row:
+                painter.drawRect(QRectF(gx0*grid_size, gy*grid_size, (gx1 - gx0)*grid_size, grid_size))
+        painter.restore()
+
+    @profiler.timed('Canvas._draw_free_space')
+    def _draw_free_space(self, painter):
+        self.free_space.update(self.objects)
+        version, path = self._free_space_path
+        if version != self.free_space.version:
+            path = QPainterPath()
+            path.setFillRule(Qt.OddEvenFill)
+            for ring in self.free_space.rings():
+                path.addPolygon(QPolygonF([QPointF(float(x), float(y)) for x, y in ring]))
+                path.closeSubpath()
+            self._free_space_path = (self.free_space.version, path)
+        painter.save()
+        pen = QPen(QColor(0, 150, 60), 1, Qt.DashLine)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setBrush(QColor(0, 200, 80, 50))
+        painter.drawPath(path)
+        painter.restore()
+
+    def _update_issues(self):
+        # Walidacja w tle na kopiach obiektów zmienionych od poprzedniej klatki;
+        # walidator przelicza tylko testy z ich udziałem, wynik trafia do _issues_ready
+        snapshots = {}
+        changed = len(self._snapshots) != len(self.objects)
+        for obj in self.objects:
+            entry = self._snapshots.get(id(obj))
+            if entry is None or entry[0] is not obj or entry[1].version != obj.version:
+                entry = (obj, obj.snapshot())
+                changed = True
+            snapshots[id(obj)] = entry
+        if changed:
+            self._snapshots = snapshots
+            self.tasks.submit('validate', self.validator.validate, [copy for _, copy in snapshots.values()],
+                              callback=self._issues_ready, replace_running=False)
+
+    def _issues_ready(self, issues):
+        if len(issues) != len(self.issues) and self.on_issues_changed:
+            self.on_issues_changed(issues)
+        self.issues = issues
+        if self.show_issues:
+            self.update()
+
+    def _draw_hover(self, painter):
+        obj, idx = self.hover
+        painter.save()
+        pen = QPen(QColor(255, 140, 0), 2)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        if idx is None:
+            painter.drawPolygon(qpolygon(obj))
+        elif 2*idx + 1 < len(obj.coords):
+            painter.drawEllipse(QPointF(obj.coords[2*idx], obj.coords[2*idx + 1]), 6, 6)
+        painter.restore()
+
+    def _draw_issues(self, painter, visible_rect):
+        painter.save()
+        painter.setBrush(QColor(255, 0, 0, 70))
+        pen = QPen(QColor(220, 0, 0), 2, Qt.DashLine)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        for issue in self.issues:
+            x0, y0, x1, y1 = issue.rect
+            rect = QRectF(x0, y0, x1 - x0, y1 - y0).adjusted(-3, -3, 3, 3)
+            if rect.intersects(visible_rect):
+                painter.drawRect(rect)
+        pen.setStyle(Qt.SolidLine)
+        painter.setPen(pen)
+        for issue in self.issues:
+            for x, y in issue.points:
+                painter.drawLine(QPointF(x - 4, y - 4), QPointF(x + 4, y + 4))
+                painter.drawLine(QPointF(x - 4, y + 4), QPointF(x + 4, y - 4))
         painter.restore()
 
+    def _get_occupied_rows(self):
+        # Zajęte kratki jako scalone zakresy kolumn w wierszach (z trwałego rastra)
+        grid_size = self.grid_base / self.scale
+        area_objects = [obj for obj in self.objects if isinstance(obj, (TenantArea, CommonArea))]
+        return self.occupancy.rows(area_objects, grid_size)
+
     def _get_occupied_cells(self):
         # Rasteryzacja: zwraca zbiór (gx, gy) zajętych przez obiekty TenantArea i CommonArea
         grid_size = self.grid_base / self.scale
-        occupied = set()
-        for obj in self.objects:
-            if isinstance(obj, (TenantArea, CommonArea)):
-                poly = QPolygon(obj.points)
-                # Wyznacz bounding box
-                min_x = min(p.x() for p in obj.points)
-                max_x = max(p.x() for p in obj.points)
-                min_y = min(p.y() for p in obj.points)
-                max_y = max(p.y() for p in obj.points)
-                gx0 = int(min_x // grid_size)
-                gx1 = int(max_x // grid_size) + 1
-                gy0 = int(min_y // grid_size)
-                gy1 = int(max_y // grid_size) + 1
-                for gx in range(gx0, gx1):
-                    for gy in range(gy0, gy1):
-                        cx = gx * grid_size + grid_size/2
-                        cy = gy * grid_size + grid_size/2
-                        if poly.containsPoint(QPoint(int(cx), int(cy)), Qt.OddEvenFill):
-                            occupied.add((gx, gy))
-        return occupied
+        area_objects = [obj for obj in self.objects if isinstance(obj, (TenantArea, CommonArea))]
+        return self.occupancy.cells(area_objects, grid_size)
 
+    @profiler.timed('Canvas.get_all_seeds')
     def get_all_seeds(self):
         seeds = []
         for obj in self.objects:
             if isinstance(obj, CommonArea):
-                seeds.append({'type': 'Powierzchnia wspólna', 'area': obj.area(self.scale), 'points': obj.points, 'color': obj.color})
+                seeds.append({'type': 'Powierzchnia wspólna', 'area': self.ledger.area(obj, self.scale), 'points': obj.points, 'color': obj.color})
             elif isinstance(obj, TenantArea):
-                seeds.append({'type': 'Najemca', 'area': obj.area(self.scale), 'points': obj.points, 'color': obj.color})
+                seeds.append({'type': 'Najemca', 'area': self.ledger.area(obj, self.scale), 'points': obj.points, 'color': obj.color})
         return seeds
 
     def to_dict(self):
@@ -284,7 +568,7 @@ class Canvas(QWidget):
         }
 
     def from_dict(self, data):
-        self.objects = []
+        objects = []
         for obj_data in data.get('objects', []):
             obj_type = obj_data.get('type')
             if obj_type == 'Building':
@@ -295,11 +579,19 @@ class Canvas(QWidget):
                 obj = TenantArea.from_dict(obj_data)
             else:
                 continue
-            self.objects.append(obj)
-        self.scale = data.get('scale', 0.1)
+            objects.append(obj)
+        self.load_objects(objects, data.get('scale', 0.1))
+
+    def load_objects(self, objects, scale):
+        """Zastępuje zawartość obiektami z dowolnego źródła (także strumieniowo, np. z pliku .rpow)."""
+        self.objects = list(objects)
+        self.history.clear()
+        self._objects_reset()
+        self.scale = scale
         self.update()
-        if any(isinstance(obj, Building) for obj in self.objects) and self.on_building_closed:
-            self.on_building_closed(self.objects[0].area(self.scale))
+        building = next((obj for obj in self.objects if isinstance(obj, Building)), None)
+        if building is not None and self.on_building_closed:
+            self.on_building_closed(building.area(self.scale))
         if self.on_seeds_changed:
             self.on_seeds_changed(self.get_all_seeds())
 
@@ -314,5 +606,7 @@ class Canvas(QWidget):
         menu.addAction('N - Tryb dodawania punktów (modelowanie najemcy)')
         menu.addAction('P - Tryb przesuwania punktów')
         menu.addAction('Esc - Tryb domyślny (brak specjalnej akcji)')
+        menu.addAction('F3 - Nakładka czasów (profilowanie)')
+        menu.addAction('Ctrl + Z / Ctrl + Y - Cofnij / Ponów')
         menu.addAction('Ctrl + Lewy przycisk myszy lub środkowy przycisk - przesuwanie całego obiektu')
         menu.addAction('Rysowanie nowych obiektów - tryb domyślny, lewy przycisk myszy')
@@ -0,0 +1,48 @@
+import math
+from PySide6.QtCore import QLineF
+from PySide6.QtGui import QPen, QColor
+
+# Siatka dopasowana do zoomu: odstęp linii pomocniczych rośnie w ciągu
+# 1-5-10-50... x podstawowa kratka, aż na ekranie będą co najmniej
+# MIN_SPACING_PX od siebie; linie główne to następny poziom ciągu. Rysowane
+# są tylko linie przecinające widoczny prostokąt, po jednym drawLines na
+# poziom, więc koszt klatki nie zależy od zoomu.
+
+MIN_SPACING_PX = 8
+
+
+def grid_spacing(base, zoom, min_px=MIN_SPACING_PX):
+    """(odstęp pomocniczy, odstęp główny) w jednostkach sceny."""
+    minor = base
+    factor = 5
+    while minor * zoom < min_px:
+        minor *= factor
+        factor = 2 if factor == 5 else 5
+    return minor, minor * factor
+
+
+def grid_lines(rect, spacing, skip=0):
+    """Linie siatki (od początku układu) przecinające rect; skip pomija co skip-tą (linie główne)."""
+    left, top = max(0.0, rect.left()), max(0.0, rect.top())
+    right, bottom = rect.right(), rect.bottom()
+    if right < left or bottom < top:
+        return []
+    lines = [QLineF(k * spacing, top, k * spacing, bottom)
+             for k in range(math.ceil(left / spacing), math.floor(right / spacing) + 1) if not skip or k % skip]
+    lines += [QLineF(left, k * spacing, right, k * spacing)
+              for k in range(math.ceil(top / spacing), math.floor(bottom / spacing) + 1) if not skip or k % skip]
+    return lines
+
+
+def draw_grid(painter, rect, base, color):
+    """Siatka w prostokącie sceny rect; zoom odczytywany z transformacji paintera."""
+    zoom = painter.worldTransform().m11() or 1.0
+    minor, major = grid_spacing(base, zoom)
+    painter.save()
+    pen = QPen(color, 0)  # kosmetyczne 1 px niezależnie od zoomu
+    painter.setPen(pen)
+    painter.drawLines(grid_lines(rect, minor, skip=round(major / minor)))
+    pen.setColor(QColor(color.red(), color.green(), color.blue(), min(255, color.alpha() * 2)))
+    painter.setPen(pen)
+    painter.drawLines(grid_lines(rect, major))
+    painter.restore()
@@ -1,9 +1,21 @@
 import json
-from PySide6.QtWidgets import QMainWindow, QDockWidget, QToolBar, QFileDialog, QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox
-from PySide6.QtGui import QAction
+import os
+from PySide6.QtWidgets import QMainWindow, QDockWidget, QToolBar, QFileDialog, QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QComboBox, QInputDialog
+from PySide6.QtGui import QAction, QKeySequence
 from PySide6.QtCore import Qt
 from .gui_canvas import Canvas
 from .gui_side_panel import SidePanel
+from .gui_profiler import profiler
+from model import project_binary
+from model.project import Project, save_project as save_multi_floor, load_project as load_multi_floor
+from model.journal import Journal, recover
+
+AUTOSAVE_DIR = os.path.join(os.path.expanduser('~'), '.rysownik_pow', 'autosave')
+
+JSON_FILTER = "Pliki JSON (*.json)"
+BINARY_FILTER = "Projekt binarny (*.rpow)"
+MULTI_FLOOR_FILTER = "Projekt wielokondygnacyjny (*.rpowp)"
+PROJECT_FILE_FILTERS = f"Projekty (*.json *.rpow *.rpowp);;{JSON_FILTER};;{BINARY_FILTER};;{MULTI_FLOOR_FILTER}"
 
 class AddAreaDialog(QDialog):
     def __init__(self, parent=None, default_type=None):
@@ -54,6 +66,26 @@ class MainWindow(QMainWindow):
         toolbar.addSeparator()
         toolbar.addAction(self.action_zoom_in)
         toolbar.addAction(self.action_zoom_out)
+        toolbar.addSeparator()
+        self.action_issues = QAction("Konflikty", self)
+        self.action_issues.setCheckable(True)
+        self.action_issues.setChecked(True)
+        toolbar.addAction(self.action_issues)
+        self.action_free_space = QAction("Wolna powierzchnia", self)
+        self.action_free_space.setCheckable(True)
+        toolbar.addAction(self.action_free_space)
+        # Budynki i piętra projektu
+        toolbar.addSeparator()
+        self.floor_combo = QComboBox(self)
+        self.floor_combo.setMinimumContentsLength(24)
+        toolbar.addWidget(self.floor_combo)
+        self.action_add_floor = QAction("Dodaj piętro", self)
+        self.action_add_building = QAction("Dodaj budynek", self)
+        toolbar.addAction(self.action_add_floor)
+        toolbar.addAction(self.action_add_building)
+        self.floor_combo.activated.connect(self.switch_floor)
+        self.action_add_floor.triggered.connect(self.add_floor)
+        self.action_add_building.triggered.connect(self.add_building)
         self.action_zoom_in.triggered.connect(self.zoom_in)
         self.action_zoom_out.triggered.connect(self.zoom_out)
         self.action_building.triggered.connect(lambda: self.set_draw_mode('building'))
@@ -71,6 +103,31 @@ class MainWindow(QMainWindow):
 
         # Canvas (centralny widget)
         self.canvas = Canvas(self)
+
+        # Menu Edycja
+        edit_menu = self.menuBar().addMenu("Edycja")
+        action_undo = QAction("Cofnij", self)
+        action_redo = QAction("Ponów", self)
+        action_undo.setShortcut(QKeySequence.Undo)
+        action_redo.setShortcuts([QKeySequence.Redo, QKeySequence("Ctrl+Y")])
+        edit_menu.addAction(action_undo)
+        edit_menu.addAction(action_redo)
+        action_undo.triggered.connect(self.canvas.undo)
+        action_redo.triggered.connect(self.canvas.redo)
+
+        # Menu Profilowanie
+        profile_menu = self.menuBar().addMenu("Profilowanie")
+        self.action_profiler = QAction("Nakładka czasów", self)
+        self.action_profiler.setCheckable(True)
+        self.action_profiler.setShortcut(QKeySequence(Qt.Key_F3))
+        action_trace = QAction("Eksportuj ślad (Chrome trace)...", self)
+        action_clear_trace = QAction("Wyczyść pomiary", self)
+        profile_menu.addAction(self.action_profiler)
+        profile_menu.addAction(action_trace)
+        profile_menu.addAction(action_clear_trace)
+        self.action_profiler.toggled.connect(self.canvas.toggle_profiler)
+        action_trace.triggered.connect(self.export_trace)
+        action_clear_trace.triggered.connect(profiler.clear)
         self.setCentralWidget(self.canvas)
         self.canvas.add_shortcuts_menu(self.menuBar())
 
@@ -83,12 +140,132 @@ class MainWindow(QMainWindow):
 
         # Połącz canvas z panelem bocznym
         self.canvas.on_building_closed = self.side_panel.set_building_surface
-        self.canvas.on_seeds_changed = self.side_panel.set_seeds
-        self.side_panel.set_seeds(self.canvas.get_all_seeds())
+        self.canvas.on_seeds_changed = self.seeds_changed
+        self.canvas.on_objects_changed = self.side_panel.objects_changed
+        self.canvas.on_issues_changed = self.show_issue_count
+        self.action_issues.toggled.connect(self.canvas.set_show_issues)
+        self.action_free_space.toggled.connect(self.canvas.set_show_free_space)
+        self.action_free_space.toggled.connect(lambda _: self.side_panel.update_occupancy())
+        # Autozapis: migawka projektu i dziennik edycji zapisywany w tle, odtwarzany po awarii
+        self.journal = Journal(AUTOSAVE_DIR)
+        self.canvas.history.on_change = self.journal_edit
+        self.project = Project.single_floor([], self.canvas.scale)
+        self.recover_autosave()
+        self.show_project()
 
     def set_draw_mode(self, mode):
         self.canvas.set_draw_mode(mode)
 
+    def seeds_changed(self, seeds):
+        self.side_panel.set_seeds(seeds)
+        self.update_project_summary()
+
+    def update_project_summary(self):
+        self.project.store_active(self.canvas.objects)
+        self.side_panel.set_project_summary(self.project.summary(self.canvas.ledger.summary(self.project.scale)))
+
+    def show_project(self):
+        """Wypełnia listę pięter i wczytuje aktywne piętro do canvas (nowy projekt - nowa migawka autozapisu)."""
+        self.fill_floor_combo()
+        self.canvas.load_objects(self.project.active_floor().load(), self.project.scale)
+        self.update_project_summary()
+        self.autosave_snapshot()
+
+    def fill_floor_combo(self):
+        self.floor_combo.clear()
+        for b, f, building, floor in self.project.floors():
+            self.floor_combo.addItem(f"{building.name} / {floor.name}", (b, f))
+        self.select_floor_item(*self.project.active)
+
+    def select_floor_item(self, b, f):
+        # findData porównuje krotki po tożsamości, więc pozycja jest szukana po wartości
+        for i in range(self.floor_combo.count()):
+            if tuple(self.floor_combo.itemData(i)) == (b, f):
+                self.floor_combo.setCurrentIndex(i)
+                return
+
+    def autosave_snapshot(self):
+        # Kopia projektu do migawki autozapisu (serializowana w tle); dziennik edycji zaczyna się od nowa
+        self.project.store_active(self.canvas.objects)
+        self.journal.snapshot(self.project.frozen())
+
+    def journal_edit(self, command, reverted):
+        self.journal.record(command, self.canvas.objects, reverted)
+        if self.journal.needs_compaction():
+            self.autosave_snapshot()
+        if self.journal.error is not None:
+            self.statusBar().showMessage(f"Autozapis niedostępny: {self.journal.error}")
+
+    def recover_autosave(self):
+        """Po awarii poprzedniej sesji proponuje odtworzenie projektu z migawki i dziennika."""
+        try:
+            project, edits = recover(AUTOSAVE_DIR)
+        except Exception as e:
+            QMessageBox.warning(self, "Autozapis", f"Nie udało się odtworzyć autozapisu: {e}")
+            return
+        if project is None:
+            return
+        answer = QMessageBox.question(
+            self, "Autozapis",
+            f"Znaleziono niezapisaną pracę z poprzedniej sesji (edycji od ostatniej migawki: {edits}). Przywrócić?")
+        if answer == QMessageBox.Yes:
+            self.project = project
+
+    def switch_floor(self, index):
+        b, f = self.floor_combo.itemData(index)
+        if (b, f) != self.project.active:
+            self.activate_floor(b, f)
+
+    def activate_floor(self, b, f):
+        # Bieżące piętro jest zwijane do bloku .rpow z podsumowaniem, nowe wczytywane z bloku;
+        # autozapis dostaje tylko rekord przełączenia, bez migawki całego projektu
+        self.project.store_active(self.canvas.objects)
+        objects = self.project.set_active(b, f)
+        self.journal.record_floor(b, f)
+        self.select_floor_item(b, f)
+        self.canvas.load_objects(objects, self.project.scale)
+        self.update_project_summary()
+
+    def add_floor(self):
+        b = self.project.active[0]
+        name, ok = QInputDialog.getText(self, "Dodaj piętro", "Nazwa piętra:",
+                                        text=f"Piętro {len(self.project.buildings[b].floors)}")
+        if ok and name:
+            f = self.project.add_floor(b, name)
+            self.journal.record_add_floor(b, name)
+            self.fill_floor_combo()
+            self.activate_floor(b, f)
+
+    def add_building(self):
+        name, ok = QInputDialog.getText(self, "Dodaj budynek", "Nazwa budynku:",
+                                        text=f"Budynek {len(self.project.buildings) + 1}")
+        if ok and name:
+            b = self.project.add_building(name)
+            self.journal.record_add_building(name)
+            f = self.project.add_floor(b, "Parter")
+            self.journal.record_add_floor(b, "Parter")
+            self.fill_floor_combo()
+            self.activate_floor(b, f)
+
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Eksportuj ślad", "trace.json", JSON_FILTER)
+        if path:
+            try:
+                profiler.export_chrome_trace(path)
+            except Exception as e:
+                QMessageBox.critical(self, "Błąd zapisu", str(e))
+
+    def show_issue_count(self, issues):
+        self.statusBar().showMessage(f"Konflikty: {len(issues)}" if issues else "Brak konfliktów")
+
+    def closeEvent(self, event):
+        # nie czekamy na obliczenia w tle przy zamykaniu
+        self.canvas.tasks.shutdown()
+        self.side_panel.tasks.shutdown()
+        # poprawne zamknięcie - autozapis nie jest już potrzebny
+        self.journal.close(discard=True)
+        super().closeEvent(event)
+
     def zoom_in(self):
         self.canvas.zoom_in()
 
@@ -96,21 +273,43 @@ class MainWindow(QMainWindow):
         self.canvas.zoom_out()
 
     def save_project(self):
-        path, _ = QFileDialog.getSaveFileName(self, "Zapisz projekt", "", "Pliki JSON (*.json)")
+        path, selected = QFileDialog.getSaveFileName(self, "Zapisz projekt", "", PROJECT_FILE_FILTERS)
         if path:
-            data = self.canvas.to_dict()
+            if not path.lower().endswith(('.json', '.rpow', '.rpowp')):
+                path += '.rpow' if selected == BINARY_FILTER else '.rpowp' if selected == MULTI_FLOOR_FILTER else '.json'
+            self.project.store_active(self.canvas.objects)
+            single = sum(1 for _ in self.project.floors()) == 1
             try:
-                with open(path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                if path.lower().endswith('.rpowp'):
+                    save_multi_floor(path, self.project)
+                elif path.lower().endswith('.rpow'):
+                    if not single:
+                        raise ValueError("Projekt ma wiele pięter - zapisz go jako .rpowp lub .json")
+                    project_binary.save_project(path, self.canvas.objects, self.canvas.scale)
+                else:
+                    # jedno piętro - dotychczasowy format pliku
+                    data = self.canvas.to_dict() if single else self.project.to_dict()
+                    with open(path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, ensure_ascii=False, indent=2)
             except Exception as e:
                 QMessageBox.critical(self, "Błąd zapisu", str(e))
 
     def open_project(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Otwórz projekt", "", "Pliki JSON (*.json)")
+        path, _ = QFileDialog.getOpenFileName(self, "Otwórz projekt", "", PROJECT_FILE_FILTERS)
         if path:
             try:
-                with open(path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                self.canvas.from_dict(data)
+                if path.lower().endswith('.rpowp'):
+                    # Obiekty powstają tylko dla aktywnego piętra
+                    project = load_multi_floor(path)
+                elif path.lower().endswith('.rpow'):
+                    # Obiekty są czytane z mmap strumieniowo, bez parsowania całego pliku naraz
+                    with project_binary.ProjectReader(path) as reader:
+                        project = Project.single_floor(reader.iter_objects(), reader.scale)
+                else:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    project = Project.from_dict(data)
+                self.project = project
+                self.show_project()
             except Exception as e:
                 QMessageBox.critical(self, "Błąd odczytu", str(e))
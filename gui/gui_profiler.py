@@ -0,0 +1,145 @@
+import functools
+import json
+import os
+import threading
+from collections import deque
+from time import perf_counter_ns
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QColor, QFont, QFontMetrics
+
+# Pomiar czasów gorących ścieżek canvas. Wyłączony profiler kosztuje jedno
+# sprawdzenie flagi na wywołanie; włączony zbiera zdarzenia do śladu
+# (format Chrome trace, chrome://tracing / Perfetto) i okno ostatnich
+# czasów każdej ścieżki do percentyli na nakładce.
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, self.start, perf_counter_ns())
+        return False
+
+
+class Profiler:
+    """Zbieranie czasów nazwanych odcinków kodu (span / timed) z eksportem do Chrome trace."""
+
+    def __init__(self, max_events=200000, window=240):
+        self.enabled = False
+        self.window = window
+        self.events = deque(maxlen=max_events)  # (nazwa, start ns, czas ns, id wątku)
+        self._recent = {}  # nazwa -> deque ostatnich czasów w ms
+
+    def clear(self):
+        self.events.clear()
+        self._recent.clear()
+
+    def span(self, name):
+        """Kontekst mierzący blok kodu: with profiler.span('nazwa'): ..."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def timed(self, name):
+        """Dekorator mierzący czas wywołań funkcji lub metody."""
+        def decorate(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = perf_counter_ns()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, start, perf_counter_ns())
+            return wrapper
+        return decorate
+
+    def record(self, name, start, end):
+        self.events.append((name, start, end - start, threading.get_ident()))
+        recent = self._recent.get(name)
+        if recent is None:
+            recent = self._recent[name] = deque(maxlen=self.window)
+        recent.append((end - start) / 1e6)
+
+    def stats(self):
+        """{nazwa: (liczba, p50, p90, p99, max)} w ms dla ostatnich `window` wywołań."""
+        result = {}
+        for name, recent in self._recent.items():
+            values = sorted(recent)
+            n = len(values)
+            if not n:
+                continue
+            pick = lambda p: values[min(n - 1, int(p * n))]
+            result[name] = (n, pick(0.5), pick(0.9), pick(0.99), values[-1])
+        return result
+
+    def chrome_trace(self):
+        """Zdarzenia w formacie Chrome trace (słownik gotowy do json.dump)."""
+        pid = os.getpid()
+        events = [{'name': name, 'cat': 'canvas', 'ph': 'X', 'ts': start / 1000, 'dur': dur / 1000,
+                   'pid': pid, 'tid': tid}
+                  for name, start, dur, tid in self.events]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+# Wspólny profiler canvas i panelu bocznego
+profiler = Profiler()
+
+FRAME = 'Canvas.paintEvent'
+
+
+def draw_overlay(painter, profiler, rect):
+    """Nakładka z percentylami czasów w lewym górnym rogu (współrzędne urządzenia)."""
+    stats = profiler.stats()
+    lines = []
+    frame = stats.get(FRAME)
+    if frame:
+        lines.append(f"klatka p50 {frame[1]:.2f}  p90 {frame[2]:.2f}  p99 {frame[3]:.2f}  max {frame[4]:.2f} ms")
+    lines.append(f"{'ścieżka':<28}{'n':>5}{'p50':>8}{'p90':>8}{'p99':>8}")
+    for name in sorted(stats):
+        n, p50, p90, p99, _ = stats[name]
+        lines.append(f"{name:<28}{n:>5}{p50:>8.2f}{p90:>8.2f}{p99:>8.2f}")
+    font = QFont('monospace', 8)
+    font.setStyleHint(QFont.TypeWriter)
+    metrics = QFontMetrics(font)
+    line_h = metrics.height()
+    width = max(metrics.horizontalAdvance(line) for line in lines) + 12
+    box = QRectF(rect.left() + 8, rect.top() + 8, width, line_h * len(lines) + 8)
+    painter.save()
+    painter.resetTransform()
+    painter.setPen(Qt.NoPen)
+    painter.setBrush(QColor(0, 0, 0, 170))
+    painter.drawRect(box)
+    painter.setFont(font)
+    painter.setPen(QColor(230, 255, 230))
+    y = box.top() + 4 + metrics.ascent()
+    for line in lines:
+        painter.drawText(int(box.left() + 6), int(y), line)
+        y += line_h
+    painter.restore()
@@ -0,0 +1,66 @@
+import math
+from PySide6.QtCore import QPoint, QRect, QRectF
+from PySide6.QtGui import QColor, QPainter, QPen, QPolygon
+from model.geometry import simplify
+
+# Adapter Qt dla rdzenia modelu: konwersje typów i rysowanie obiektów.
+# Obiekty Qt są przechowywane w cache obiektu (obj.cached), więc żyją do następnej zmiany geometrii.
+
+# Poziomy szczegółowości rysowania
+VERTEX_HANDLE_MIN_ZOOM = 0.5  # poniżej tego zoomu nie rysujemy uchwytów wierzchołków
+TINY_SHAPE_PX = 3             # obiekt mniejszy na ekranie rysujemy jako prostokąt
+
+
+def qcolor(color):
+    """QColor z koloru rdzenia (model.types.Color)."""
+    return QColor(color.red(), color.green(), color.blue(), color.alpha())
+
+
+def qpoint(point):
+    return QPoint(point.x(), point.y())
+
+
+def _qpolygon(coords):
+    return QPolygon([QPoint(coords[i], coords[i + 1]) for i in range(0, len(coords), 2)])
+
+
+def qpolygon(obj):
+    """QPolygon wierzchołków obiektu (bez przesunięcia), współdzielony do następnej zmiany."""
+    return obj.cached(('qt', 'polygon'), lambda: _qpolygon(obj.coords))
+
+
+def simplified_qpolygon(obj, zoom):
+    # Douglas-Peucker z tolerancją pół piksela ekranu, cache per kubełek zoomu (co pół oktawy)
+    bucket = math.floor(math.log2(zoom) * 2)
+
+    def compute():
+        tolerance = 0.5 / 2 ** (bucket / 2 + 0.5)
+        return _qpolygon(simplify(obj.coords, tolerance))
+    return obj.cached(('qt', 'lod', bucket), compute)
+
+
+def draw_area_object(painter: QPainter, obj, offset=QPoint(0,0), highlight=False, visible_rect=None):
+    # visible_rect: widoczny obszar sceny - obiekty poza nim są pomijane
+    if len(obj.coords) < 4:
+        return
+    x0, y0, x1, y1 = obj.bounding_box()
+    x0 += offset.x(); x1 += offset.x()
+    y0 += offset.y(); y1 += offset.y()
+    if visible_rect is not None and not QRectF(x0, y0, x1 - x0, y1 - y0).adjusted(-6, -6, 6, 6).intersects(visible_rect):
+        return
+    zoom = painter.transform().m11()
+    color = obj.cached(('qt', 'color', obj.color), lambda: qcolor(obj.color))
+    painter.setBrush(color)
+    painter.setPen(QPen(color.darker() if not highlight else QColor(255,0,0), 2))
+    if max(x1 - x0, y1 - y0) * zoom < TINY_SHAPE_PX:
+        painter.drawRect(QRect(x0, y0, x1 - x0 + 1, y1 - y0 + 1))
+        return
+    if zoom < 1.0:
+        painter.drawPolygon(simplified_qpolygon(obj, zoom).translated(offset))
+    else:
+        poly = qpolygon(obj)
+        painter.drawPolygon(poly.translated(offset) if not offset.isNull() else poly)
+    if zoom >= VERTEX_HANDLE_MIN_ZOOM:
+        for pt in qpolygon(obj):
+            painter.setBrush(QColor(255,0,0) if highlight else color)
+            painter.drawEllipse(pt + offset, 4, 4)
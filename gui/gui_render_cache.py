@@ -0,0 +1,90 @@
+import math
+from PySide6.QtCore import Qt, QRectF
+from PySide6.QtGui import QPixmap, QPainter
+
+LEVELS_PER_OCTAVE = 1024  # poziomy kafelków na podwojenie zoomu (różnica skali najwyżej ~0,03%)
+
+
+class TileCache:
+    """Kafelki QPixmap warstwy statycznej (siatka + nieaktywne obiekty), osobno dla każdego zoomu.
+
+    Kafelek jest rysowany raz i unieważniany tylko wtedy, gdy zmieni się
+    coś w jego obszarze. Zoom jest zaokrąglany do poziomu (LEVELS_PER_OCTAVE),
+    więc pobliskie wartości zoomu używają tych samych, lekko przeskalowanych
+    kafelków. excluded to id obiektów, których kafelki nie zawierają
+    (rysowanych w każdej klatce jako warstwa dynamiczna).
+    """
+
+    def __init__(self, render_tile, tile_size=256, max_levels=3):
+        self.render_tile = render_tile  # funkcja(painter, scene_rect) rysująca zawartość kafelka
+        self.tile_size = tile_size
+        self.max_levels = max_levels
+        self.excluded = set()
+        self._levels = {}  # poziom zoomu -> {(tx, ty): QPixmap}
+
+    def invalidate_all(self):
+        self._levels.clear()
+
+    def invalidate_scene_rect(self, rect: QRectF):
+        if rect is None or rect.isEmpty():
+            return
+        for zoom, tiles in self._levels.items():
+            t = self.tile_size
+            tx0 = math.floor(rect.left() * zoom / t)
+            tx1 = math.floor(rect.right() * zoom / t)
+            ty0 = math.floor(rect.top() * zoom / t)
+            ty1 = math.floor(rect.bottom() * zoom / t)
+            if (tx1 - tx0 + 1) * (ty1 - ty0 + 1) > len(tiles):
+                for key in [k for k in tiles if tx0 <= k[0] <= tx1 and ty0 <= k[1] <= ty1]:
+                    del tiles[key]
+            else:
+                for tx in range(tx0, tx1 + 1):
+                    for ty in range(ty0, ty1 + 1):
+                        tiles.pop((tx, ty), None)
+
+    @staticmethod
+    def level(zoom):
+        """Zoom, w którym rysowane są kafelki dla danego zoomu widoku."""
+        return 2.0 ** (round(math.log2(zoom) * LEVELS_PER_OCTAVE) / LEVELS_PER_OCTAVE)
+
+    def draw(self, painter: QPainter, zoom, device_rect, device_pixel_ratio=1.0):
+        level = self.level(zoom)
+        tiles = self._levels.pop(level, None)
+        if tiles is None:
+            tiles = {}
+        # ostatnio używany poziom zoomu na końcu słownika (LRU)
+        self._levels[level] = tiles
+        while len(self._levels) > self.max_levels:
+            del self._levels[next(iter(self._levels))]
+        ratio = zoom / level
+        if ratio != 1.0:
+            # kafelki poziomu dopasowane dokładnie do zoomu widoku (warstwa dynamiczna rysuje w zoom)
+            painter.save()
+            painter.scale(ratio, ratio)
+            device_rect = QRectF(device_rect.left() / ratio, device_rect.top() / ratio,
+                                 device_rect.width() / ratio, device_rect.height() / ratio)
+        t = self.tile_size
+        for tx in range(math.floor(device_rect.left() / t), math.floor(device_rect.right() / t) + 1):
+            for ty in range(math.floor(device_rect.top() / t), math.floor(device_rect.bottom() / t) + 1):
+                pix = tiles.get((tx, ty))
+                if pix is None:
+                    pix = self._render(level, tx, ty, device_pixel_ratio)
+                    tiles[(tx, ty)] = pix
+                painter.drawPixmap(tx * t, ty * t, pix)
+        if ratio != 1.0:
+            painter.restore()
+
+    def _render(self, zoom, tx, ty, device_pixel_ratio):
+        t = self.tile_size
+        pix = QPixmap(int(t * device_pixel_ratio), int(t * device_pixel_ratio))
+        pix.setDevicePixelRatio(device_pixel_ratio)
+        pix.fill(Qt.transparent)
+        painter = QPainter(pix)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(-tx * t, -ty * t)
+        painter.scale(zoom, zoom)
+        scene_rect = QRectF(tx * t / zoom, ty * t / zoom, t / zoom, t / zoom)
+        painter.setClipRect(scene_rect)
+        self.render_tile(painter, scene_rect)
+        painter.end()
+        return pix
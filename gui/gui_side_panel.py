@@ -1,6 +1,16 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QGroupBox, QListWidget, QListWidgetItem, QInputDialog, QColorDialog
-from PySide6.QtGui import QColor, QBrush, QPixmap, QPainter
-from PySide6.QtCore import Qt, QTimer, QPoint
+import os
+import time
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QGroupBox, QListView, QInputDialog, QColorDialog, QPushButton, QMessageBox
+from PySide6.QtCore import QTimer
+from model.region_growing import grow_region, TOLERANCE as GROW_TOLERANCE
+from model.partition import partition_problem, search_layouts, rank_layouts
+from .gui_tasks import TaskScheduler
+from .gui_area_list_model import AreaListModel
+from .gui_qt_adapter import qcolor
+from .gui_profiler import profiler
+from model.commands import SetAttribute, ReplaceCoords, CompositeCommand
+
+PARTITION_TIME_BUDGET = 3.0  # sekundy przeszukiwania układów lokali
 
 class SidePanel(QWidget):
     def __init__(self, parent=None):
@@ -11,31 +21,89 @@ class SidePanel(QWidget):
         self.building_layout = QVBoxLayout()
         self.building_label = QLabel("Powierzchnia: - m²")
         self.building_layout.addWidget(self.building_label)
+        # Zajętość piętra z bieżących sum canvas (odświeżana najwyżej raz na klatkę)
+        self.occupancy_label = QLabel("-")
+        self.building_layout.addWidget(self.occupancy_label)
+        self._occupancy_version = None
+        self._occupancy_timer = QTimer(self)
+        self._occupancy_timer.setSingleShot(True)
+        self._occupancy_timer.timeout.connect(self.update_occupancy)
         self.building_group.setLayout(self.building_layout)
         self.layout.addWidget(self.building_group)
-        self.najemcy_list = QListWidget()
-        self.wspolne_list = QListWidget()
+        # Podsumowanie całego projektu (piętra nieaktywne z zapamiętanych podsumowań)
+        self.project_group = QGroupBox("Projekt")
+        self.project_layout = QVBoxLayout()
+        self.project_label = QLabel("-")
+        self.project_layout.addWidget(self.project_label)
+        self.project_group.setLayout(self.project_layout)
+        self.layout.addWidget(self.project_group)
+        # Listy oparte na modelach wskazujących bezpośrednio obiekty z canvas
+        self.najemcy_model = AreaListModel('TenantArea', self)
+        self.wspolne_model = AreaListModel('CommonArea', self)
+        self.najemcy_list = QListView()
+        self.najemcy_list.setModel(self.najemcy_model)
+        self.wspolne_list = QListView()
+        self.wspolne_list.setModel(self.wspolne_model)
         self.layout.addWidget(QLabel("Najemcy:"))
         self.layout.addWidget(self.najemcy_list)
+        self.partition_button = QPushButton("Rozmieść najemców")
+        self.partition_button.clicked.connect(self.propose_layout)
+        self.layout.addWidget(self.partition_button)
+        self._partition = None  # trwające przeszukiwanie: najemcy, liczba oczekujących procesów, wyniki
         self.layout.addWidget(QLabel("Powierzchnie wspólne:"))
         self.layout.addWidget(self.wspolne_list)
         self.layout.addStretch()
-        self.najemcy_list.currentRowChanged.connect(self.highlight_tenant)
-        self.wspolne_list.currentRowChanged.connect(self.highlight_common)
-        # Usuwamy bezpośrednie podpięcie itemClicked do zmiany koloru
-        # self.najemcy_list.itemClicked.connect(self._edit_tenant_color)
-        # self.wspolne_list.itemClicked.connect(self._edit_common_color)
+        self.najemcy_list.selectionModel().currentRowChanged.connect(lambda current, _: self.highlight_tenant(current.row()))
+        self.wspolne_list.selectionModel().currentRowChanged.connect(lambda current, _: self.highlight_common(current.row()))
+        # Zmiana koloru po kliknięciu w kwadracik - obsługiwana w eventFilter
         self.najemcy_list.viewport().installEventFilter(self)
         self.wspolne_list.viewport().installEventFilter(self)
+        # rozpychanie najemców liczone w osobnych procesach (nie blokuje obsługi wejścia)
+        self.tasks = TaskScheduler(self, processes=True)
+        self.tasks.failed.connect(self._task_failed)
         self._highlight_timer = QTimer(self)
         self._highlight_timer.timeout.connect(self._toggle_highlight)
         self._highlight_state = False
         self._highlighted_idx = None
-        self.najemcy_list.itemDoubleClicked.connect(self.edit_tenant_area)
+        self.najemcy_list.doubleClicked.connect(self.edit_tenant_area)
+        self.najemcy_list.doubleClicked.connect(self.edit_tenant_name)
 
     def set_building_surface(self, surface):
         self.building_label.setText(f"Powierzchnia: {surface:.2f} m²")
 
+    def update_occupancy(self):
+        canvas = self._get_canvas()
+        if canvas is None:
+            return
+        # Dokładna wolna powierzchnia (różnica wielokątów, nakładania liczone raz) tylko przy
+        # włączonej warstwie - inaczej sumy z księgi, bez przeliczania przy każdym ruchu myszy
+        exact = canvas.show_free_space
+        if exact:
+            canvas.free_space.update(canvas.objects)
+        version = (canvas.ledger.version, canvas.free_space.version if exact else None)
+        if version == self._occupancy_version:
+            return
+        self._occupancy_version = version
+        s = canvas.ledger.summary(canvas.scale)
+        if s['occupancy'] is None:
+            self.occupancy_label.setText("-")
+            return
+        if exact:
+            s['free_area'] = canvas.free_space.area(canvas.scale)
+        self.building_label.setText(f"Powierzchnia: {s['building_area']:.2f} m²")
+        self.occupancy_label.setText(
+            f"Wynajęte: {s['tenant_ratio'] * 100:.1f}%\n"
+            f"Wspólne: {s['common_ratio'] * 100:.1f}%\n"
+            f"Wolne: {s['free_area']:.2f} m²")
+
+    def set_project_summary(self, summary):
+        self.project_label.setText(
+            f"Pięter: {summary['floors']}\n"
+            f"Powierzchnia budynków: {summary['building_area']:.2f} m²\n"
+            f"Najemcy: {summary['tenants']} ({summary['tenant_area']:.2f} m²)\n"
+            f"Powierzchnie wspólne: {summary['commons']} ({summary['common_area']:.2f} m²)\n"
+            f"Wolne: {summary['free_area']:.2f} m²")
+
     def _get_canvas(self):
         # Szukaj canvas w hierarchii rodziców
         parent = self.parent()
@@ -45,88 +113,120 @@ class SidePanel(QWidget):
             parent = parent.parent() if hasattr(parent, 'parent') else None
         return None
 
-    def setIconColor(self, item, color):
-        pix = self._colored_square_pixmap(color)
-        item.setIcon(pix)
-
-    def set_tenants(self, tenants):
-        self.najemcy_list.clear()
-        try:
-            self.najemcy_list.itemDoubleClicked.disconnect(self.edit_tenant_name)
-        except RuntimeError:
-            pass
-        canvas = self._get_canvas()
-        scale = canvas.scale if canvas else 1.0
-        for tenant in tenants:
-            item = QListWidgetItem(f"{tenant.name} | {tenant.area(scale):.2f} m²")
-            self.setIconColor(item, tenant.color)
-            self.najemcy_list.addItem(item)
-        if not hasattr(self, '_tenant_signal_connected') or not self._tenant_signal_connected:
-            self.najemcy_list.itemDoubleClicked.connect(self.edit_tenant_name)
-            self._tenant_signal_connected = True
-
-    def set_common_areas(self, common_areas):
-        self.wspolne_list.clear()
-        
+    @profiler.timed('SidePanel.set_seeds')
+    def set_seeds(self, seeds):
+        # ZACHOWANE DLA KOMPATYBILNOŚCI: zmiana listy obiektów - modele czytają je z canvas
         canvas = self._get_canvas()
+        objects = canvas.objects if canvas else []
         scale = canvas.scale if canvas else 1.0
-        for area in common_areas:
-            item = QListWidgetItem(f"Powierzchnia wspólna | {area.area(scale):.2f} m²")
-            self.setIconColor(item, area.color)
-            self.wspolne_list.addItem(item)
+        self.najemcy_model.set_objects(objects, scale)
+        self.wspolne_model.set_objects(objects, scale)
+        self.update_occupancy()
 
-    def set_seeds(self, seeds):
-        # ZACHOWANE DLA KOMPATYBILNOŚCI, NIE UŻYWAJ W NOWYM KODZIE
-        tenants = []
-        commons = []
-        from model.tenant_area import TenantArea
-        from model.common_area import CommonArea
-        for seed in seeds:
-            if seed['type'] == 'Najemca':
-                color_val = seed.get('color', [0,200,0,120])
-                if isinstance(color_val, QColor):
-                    color = color_val
-                elif isinstance(color_val, (list, tuple)):
-                    color = QColor(*color_val)
-                else:
-                    # Jeśli to już QColor, nie rozpakowuj
-                    color = QColor(color_val)
-                t = TenantArea([QPoint(pt.x(), pt.y()) if hasattr(pt, 'x') else QPoint(*pt) for pt in seed['points']], color, seed.get('name', 'Najemca'))
-                tenants.append(t)
-            elif seed['type'] == 'Powierzchnia wspólna':
-                c = CommonArea([QPoint(pt.x(), pt.y()) if hasattr(pt, 'x') else QPoint(*pt) for pt in seed['points']])
-                commons.append(c)
-        self.set_tenants(tenants)
-        self.set_common_areas(commons)
-
-    def edit_tenant_name(self, item):
-        idx = self.najemcy_list.row(item)
+    def objects_changed(self, objects):
+        # Zmiana geometrii pojedynczych obiektów - odświeżane są tylko ich wiersze
+        self.najemcy_model.objects_changed(objects)
+        self.wspolne_model.objects_changed(objects)
+        if not self._occupancy_timer.isActive():
+            self._occupancy_timer.start(AreaListModel.FRAME_MS)
+
+    def edit_tenant_name(self, index):
+        tenant = self.najemcy_model.object_at(index.row())
         name, ok = QInputDialog.getText(self, 'Zmień nazwę najemcy', 'Nowa nazwa:')
-        if ok and name:
-            from gui.gui_canvas import Canvas
-            canvas: Canvas = self._get_canvas()
-            if canvas:
-                tenant_objs = [o for o in canvas.objects if o.__class__.__name__ == 'TenantArea']
-                if 0 <= idx < len(tenant_objs):
-                    tenant_objs[idx].name = name
-                    item.setText(f"{name} | {tenant_objs[idx].area(canvas.scale)::.2f} m²")
+        canvas = self._get_canvas()
+        if ok and name and tenant is not None and canvas:
+            canvas.execute(SetAttribute(tenant, 'name', tenant.name, name))
+
+    def edit_tenant_area(self, index):
+        tenant = self.najemcy_model.object_at(index.row())
+        canvas = self._get_canvas()
+        if canvas and tenant is not None:
+            current = tenant.desired_area or tenant.area(canvas.scale)
+            # Poprawne wywołanie getDouble bez min/max jako keyword
+            val, ok = QInputDialog.getDouble(self, 'Zmień powierzchnię najemcy', 'Nowa powierzchnia (m²):', current, 1.0, 99999.0, 2)
+            if ok:
+                canvas.execute(SetAttribute(tenant, 'desired_area', tenant.desired_area, val))
+                # Automatyczne rozpychanie (w tle, wynik nakładany w wątku GUI)
+                building = next((o for o in canvas.objects if o.__class__.__name__ == 'Building'), None)
+                others = [o for o in canvas.objects if o is not tenant]
+                # nowsze zlecenie dla tego samego najemcy zastępuje poprzednie
+                self.tasks.submit(('auto_expand', id(tenant)), grow_region,
+                                  *tenant.auto_expand_inputs(building, others, scale=canvas.scale),
+                                  callback=lambda coords, tenant=tenant: self._apply_auto_expand(tenant, coords, val))
+
+    def _apply_auto_expand(self, tenant, coords, desired):
+        canvas = self._get_canvas()
+        if canvas is None or tenant not in canvas.objects:
+            return
+        name = tenant.name or "bez nazwy"
+        if coords is None:
+            QMessageBox.warning(self, "Powierzchnia najemcy",
+                                f"Nie udało się dopasować obrysu najemcy {name} do {desired:.2f} m².")
+            return
+        canvas.execute(ReplaceCoords(tenant, tenant.coords, coords))
+        # brak wolnego miejsca (albo szczeliny wokół przeszkód) - lokal jest mniejszy niż żądany
+        achieved = tenant.area(canvas.scale)
+        if achieved < desired - GROW_TOLERANCE:
+            QMessageBox.warning(self, "Powierzchnia najemcy",
+                                f"Najemca {name}: uzyskano {achieved:.2f} m² z żądanych {desired:.2f} m² "
+                                f"(brakuje {desired - achieved:.2f} m² wolnego miejsca).")
+
+    def propose_layout(self):
+        """Automatyczny podział piętra na lokale najemców (desired_area), najlepszy układ jako jedno polecenie."""
+        canvas = self._get_canvas()
+        if canvas is None:
+            return
+        building = next((o for o in canvas.objects if o.__class__.__name__ == 'Building'), None)
+        tenants = [o for o in canvas.objects if o.__class__.__name__ == 'TenantArea']
+        commons = [o for o in canvas.objects if o.__class__.__name__ == 'CommonArea']
+        if building is None or len(building.coords) < 6 or not tenants:
+            return
+        try:
+            problem = partition_problem(building, commons, tenants, canvas.scale)
+        except ValueError as e:
+            QMessageBox.warning(self, "Rozmieszczanie najemców", str(e))
+            return
+        # każdy proces przeszukuje od innego ziarna do wspólnego terminu
+        jobs = os.cpu_count() or 1
+        deadline = time.time() + PARTITION_TIME_BUDGET
+        self._partition = (tenants, [jobs], [])
+        for i in range(jobs):
+            self.tasks.submit(('partition', i), search_layouts, problem, i, deadline,
+                              callback=lambda results, state=self._partition: self._partition_done(state, results))
+        self.partition_button.setEnabled(False)
 
-    def edit_tenant_area(self, item):
-        idx = self.najemcy_list.row(item)
+    def _partition_done(self, state, results):
+        if state is not self._partition:
+            return
+        tenants, pending, collected = state
+        collected.extend(results)
+        pending[0] -= 1
+        if pending[0]:
+            return
+        self._partition = None
+        self.partition_button.setEnabled(True)
         canvas = self._get_canvas()
-        if canvas:
-            tenant_objs = [o for o in canvas.objects if o.__class__.__name__ == 'TenantArea']
-            if 0 <= idx < len(tenant_objs):
-                current = tenant_objs[idx].desired_area or tenant_objs[idx].area(canvas.scale)
-                # Poprawne wywołanie getDouble bez min/max jako keyword
-                val, ok = QInputDialog.getDouble(self, 'Zmień powierzchnię najemcy', 'Nowa powierzchnia (m²):', current, 1.0, 99999.0, 2)
-                if ok:
-                    tenant_objs[idx].desired_area = val
-                    # Automatyczne rozpychanie
-                    building = next((o for o in canvas.objects if o.__class__.__name__ == 'Building'), None)
-                    others = [o for o in canvas.objects if o is not tenant_objs[idx]]
-                    tenant_objs[idx].auto_expand_to_area(building, others, scale=canvas.scale)
-                    canvas.update()
+        # plan zmieniony w trakcie obliczeń (usunięty najemca) - układ jest nieaktualny
+        if canvas is None or any(tenant not in canvas.objects for tenant in tenants):
+            return
+        layouts = rank_layouts(collected, tenants, len(collected))
+        if not layouts:
+            QMessageBox.warning(self, "Rozmieszczanie najemców", "Nie znaleziono poprawnego układu.")
+            return
+        # stosowany jest tylko układ z lokalem dla każdego najemcy - bez mieszania starych i nowych obrysów
+        layout = next((l for l in layouts if all(len(placed.coords) >= 6 for placed in l.tenants)), None)
+        if layout is None:
+            unplaced = [tenant.name for tenant, placed in zip(tenants, layouts[0].tenants) if len(placed.coords) < 6]
+            QMessageBox.warning(self, "Rozmieszczanie najemców",
+                                "Nie udało się rozmieścić najemców: " + ", ".join(unplaced)
+                                + ".\nUkład nie został zastosowany.")
+            return
+        canvas.execute(CompositeCommand([ReplaceCoords(tenant, tenant.coords, placed.coords)
+                                         for tenant, placed in zip(tenants, layout.tenants)]))
+
+    def _task_failed(self, key, exc):
+        if isinstance(key, tuple) and key[0] == 'partition' and self._partition is not None:
+            self._partition_done(self._partition, [])
 
     def highlight_object(self, idx, obj_type='tenant'):
         """Mruganie dowolnego obiektu: najemca, powierzchnia wspólna, budynek."""
@@ -160,57 +260,31 @@ class SidePanel(QWidget):
     def highlight_common(self, idx):
         self.highlight_object(idx, obj_type='common')
 
-    def _colored_square_pixmap(self, color):
-        pix = QPixmap(16, 16)
-        pix.fill(Qt.transparent)
-        painter = QPainter(pix)
-        painter.setBrush(QBrush(color))
-        painter.setPen(Qt.NoPen)
-        painter.drawRect(2, 2, 12, 12)
-        painter.end()
-        return pix
-
-    def _edit_tenant_color(self, item):
-        idx = self.najemcy_list.row(item)
-        canvas = self._get_canvas()
-        if canvas:
-            tenant_objs = [o for o in canvas.objects if o.__class__.__name__ == 'TenantArea']
-            if 0 <= idx < len(tenant_objs):
-                color = QColorDialog.getColor(tenant_objs[idx].color, self, 'Wybierz kolor najemcy')
-                if color.isValid():
-                    tenant_objs[idx].color = color
-                    self.setIconColor(item, color)
-                    canvas.update()
-
-    def _edit_common_color(self, item):
-        idx = self.wspolne_list.row(item)
+    def _edit_tenant_color(self, index):
+        self._edit_color(self.najemcy_model, index, 'Wybierz kolor najemcy')
+
+    def _edit_common_color(self, index):
+        self._edit_color(self.wspolne_model, index, 'Wybierz kolor powierzchni wspólnej')
+
+    def _edit_color(self, model, index, title):
+        obj = model.object_at(index.row())
         canvas = self._get_canvas()
-        if canvas:
-            common_objs = [o for o in canvas.objects if o.__class__.__name__ == 'CommonArea']
-            if 0 <= idx < len(common_objs):
-                color = QColorDialog.getColor(common_objs[idx].color, self, 'Wybierz kolor powierzchni wspólnej')
-                if color.isValid():
-                    common_objs[idx].color = color
-                    self.setIconColor(item, color)
-                    canvas.update()
+        if canvas and obj is not None:
+            color = QColorDialog.getColor(qcolor(obj.color), self, title)
+            if color.isValid():
+                canvas.execute(SetAttribute(obj, 'color', obj.color, color))
 
     def eventFilter(self, obj, event):
         from PySide6.QtCore import QEvent
         if event.type() == QEvent.MouseButtonPress:
             pos = event.pos()
-            if obj is self.najemcy_list.viewport():
-                idx = self.najemcy_list.indexAt(pos).row()
-                if idx >= 0:
-                    rect = self.najemcy_list.visualItemRect(self.najemcy_list.item(idx))
-                    # Kwadracik jest po lewej, 0-20px
-                    if pos.x() - rect.x() < 20:
-                        self._edit_tenant_color(self.najemcy_list.item(idx))
-                        return True
-            elif obj is self.wspolne_list.viewport():
-                idx = self.wspolne_list.indexAt(pos).row()
-                if idx >= 0:
-                    rect = self.wspolne_list.visualItemRect(self.wspolne_list.item(idx))
-                    if pos.x() - rect.x() < 20:
-                        self._edit_common_color(self.wspolne_list.item(idx))
-                        return True
+            for view, edit in ((self.najemcy_list, self._edit_tenant_color), (self.wspolne_list, self._edit_common_color)):
+                if obj is view.viewport():
+                    index = view.indexAt(pos)
+                    if index.isValid():
+                        rect = view.visualRect(index)
+                        # Kwadracik jest po lewej, 0-20px
+                        if pos.x() - rect.x() < 20:
+                            edit(index)
+                            return True
         return super().eventFilter(obj, event)
@@ -0,0 +1,102 @@
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from PySide6.QtCore import QObject, Signal
+
+
+class Task:
+    """Zlecenie w harmonogramie: klucz, future i flaga anulowania (sprawdzana przez zadanie)."""
+
+    __slots__ = ('key', 'callback', 'future', '_cancelled')
+
+    def __init__(self, key, callback):
+        self.key = key
+        self.callback = callback
+        self.future = None
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+    def cancelled(self):
+        return self._cancelled
+
+
+class TaskScheduler(QObject):
+    """Wykonuje zadania geometryczne w puli wątków lub procesów, wyniki oddaje sygnałami w wątku GUI.
+
+    Zadania mają klucze: nowe zlecenie z tym samym kluczem zastępuje
+    oczekujące (jeszcze nieuruchomione), a przy replace_running=True także
+    trwające - jego wynik jest odrzucany, a funkcja przyjmująca argument
+    cancel może przerwać pracę wcześniej (tylko pula wątków).
+    """
+
+    finished = Signal(object, object)  # klucz, wynik
+    failed = Signal(object, object)    # klucz, wyjątek
+    _done = Signal(object)             # z wątku puli do wątku GUI (połączenie kolejkowane)
+
+    def __init__(self, parent=None, workers=None, processes=False):
+        super().__init__(parent)
+        self.workers = workers
+        self.processes = processes
+        self._executor = None
+        self._tasks = {}  # klucz -> najnowsze zlecenie
+        self._done.connect(self._on_done)
+
+    def _pool(self):
+        if self._executor is None:
+            if self.processes:
+                # spawn - fork procesu z działającym Qt nie jest bezpieczny
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._executor = ThreadPoolExecutor(self.workers)
+        return self._executor
+
+    def submit(self, key, func, *args, callback=None, replace_running=True, cancellable=False):
+        """Zleca func(*args); callback(wynik) i sygnał finished są wywoływane w wątku GUI.
+
+        cancellable=True przekazuje funkcji argument cancel (wywołanie zwraca True po anulowaniu).
+        """
+        previous = self._tasks.get(key)
+        if previous is not None and (replace_running or not previous.future.running()):
+            previous.cancel()
+        task = Task(key, callback)
+        kwargs = {'cancel': task.cancelled} if cancellable and not self.processes else {}
+        self._tasks[key] = task
+        task.future = self._pool().submit(func, *args, **kwargs)
+        task.future.add_done_callback(lambda _, task=task: self._done.emit(task))
+        return task
+
+    def cancel(self, key):
+        task = self._tasks.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self):
+        for key in list(self._tasks):
+            self.cancel(key)
+
+    def pending(self, key):
+        task = self._tasks.get(key)
+        return task is not None and not task.cancelled()
+
+    def shutdown(self):
+        self.cancel_all()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _on_done(self, task):
+        if task.cancelled() or task.future.cancelled():
+            return
+        if self._tasks.get(task.key) is task:
+            del self._tasks[task.key]
+        error = task.future.exception()
+        if error is not None:
+            self.failed.emit(task.key, error)
+            return
+        result = task.future.result()
+        if task.callback is not None:
+            task.callback(result)
+        self.finished.emit(task.key, result)
@@ -0,0 +1,6 @@
+"""Rdzeń modelu rysownika - czysty Python, bez zależności od Qt."""
+from .types import Point, Color
+from .area_object import AreaObject
+from .building import Building
+from .common_area import CommonArea
+from .tenant_area import TenantArea
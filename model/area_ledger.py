@@ -0,0 +1,73 @@
+from .area_report import area_summary
+
+# Bieżące sumy powierzchni piętra. Każdy obiekt wnosi swoje podwojone pole
+# (dokładna liczba całkowita ze wzoru shoelace); edycja obiektu zmienia sumy
+# o różnicę, więc odczyt podsumowania nie zależy od liczby obiektów.
+
+CATEGORIES = ('Building', 'TenantArea', 'CommonArea')
+
+
+class AreaLedger:
+    """Sumy podwojonych pól według kategorii i pole każdego obiektu, aktualizowane przyrostowo."""
+
+    def __init__(self):
+        self._entries = {}  # id(obj) -> (obj, kategoria, podwojone pole)
+        self.totals = dict.fromkeys(CATEGORIES, 0)
+        self.counts = dict.fromkeys(CATEGORIES, 0)
+        self.version = 0  # rośnie przy każdej zmianie sum
+
+    def clear(self):
+        self._entries.clear()
+        self.totals = dict.fromkeys(CATEGORIES, 0)
+        self.counts = dict.fromkeys(CATEGORIES, 0)
+        self.version += 1
+
+    def rebuild(self, objects):
+        self.clear()
+        for obj in objects:
+            self.add(obj)
+
+    @staticmethod
+    def _area2(obj):
+        return obj.area2() if len(obj.coords) >= 6 else 0
+
+    def add(self, obj):
+        category = obj.__class__.__name__
+        if category not in self.totals or id(obj) in self._entries:
+            return
+        area2 = self._area2(obj)
+        self._entries[id(obj)] = (obj, category, area2)
+        self.totals[category] += area2
+        self.counts[category] += 1
+        self.version += 1
+
+    def remove(self, obj):
+        entry = self._entries.pop(id(obj), None)
+        if entry is None:
+            return
+        _, category, area2 = entry
+        self.totals[category] -= area2
+        self.counts[category] -= 1
+        self.version += 1
+
+    def update(self, obj):
+        """Po zmianie geometrii obiektu: sumy zmieniają się o różnicę jego pola."""
+        entry = self._entries.get(id(obj))
+        if entry is None:
+            self.add(obj)
+            return
+        _, category, old = entry
+        area2 = self._area2(obj)
+        if area2 != old:
+            self._entries[id(obj)] = (obj, category, area2)
+            self.totals[category] += area2 - old
+            self.version += 1
+
+    def area(self, obj, scale):
+        """Pole obiektu w m² (0 dla obiektu spoza księgi)."""
+        entry = self._entries.get(id(obj))
+        return entry[2] * scale ** 2 / 2.0 if entry is not None else 0.0
+
+    def summary(self, scale):
+        """Podsumowanie jak area_report.summarize: m², udziały i liczby obiektów."""
+        return area_summary(scale, self.totals, self.counts)
@@ -1,66 +1,142 @@
-from PySide6.QtCore import QPoint, Qt
-from PySide6.QtGui import QColor, QPainter, QPen, QPolygon
+from array import array
+from .geometry import flatten_points, shoelace2, polygon_segments, project_point, nearest_vertex, bounding_box, centroid, point_in_polygon
+from .types import Point, Color
+from .spatial_index import VertexBuckets, SNAP_DISTANCE
+
+# Rdzeń modelu bez Qt - rysowanie jest w gui/gui_qt_adapter.py
 
 class AreaObject:
-    def __init__(self, points=None, color=QColor(0,0,0,60)):
-        self.points = points or []  # lista QPoint
+    # Zwarta reprezentacja: współrzędne w płaskim buforze array('i'), bez __dict__ na obiekt
+    __slots__ = ('coords', '_color', 'selected_vertex', 'drag_offset', 'version', '_cache')
+
+    def __init__(self, points=None, color=Color(0,0,0,60)):
+        self.version = 0  # rośnie przy każdej zmianie geometrii
+        self._cache = {}  # wartości pochodne ważne dla bieżącej wersji
+        self.points = points or []  # lista Point (widok na bufor self.coords)
         self.color = color
         self.selected_vertex = None
-        self.drag_offset = QPoint(0,0)
-
-    def draw(self, painter: QPainter, offset=QPoint(0,0), highlight=False):
-        if len(self.points) < 2:
-            return
-        poly = QPolygon([pt + offset for pt in self.points])
-        painter.setBrush(self.color)
-        painter.setPen(QPen(self.color.darker() if not highlight else QColor(255,0,0), 2))
-        painter.drawPolygon(poly)
-        for pt in self.points:
-            painter.setBrush(QColor(255,0,0) if highlight else self.color)
-            painter.drawEllipse(pt + offset, 4, 4)
-
-    def move(self, delta: QPoint):
-        self.points = [pt + delta for pt in self.points]
-
-    def hit_test(self, point: QPoint, offset=QPoint(0,0)):
+        self.drag_offset = Point(0,0)
+
+    @property
+    def color(self):
+        return self._color
+
+    @color.setter
+    def color(self, color):
+        # przyjmuje Color, QColor albo krotkę RGBA
+        self._color = Color.from_any(color)
+
+    @property
+    def points(self):
+        # Cienki widok punktów (API zgodne z QPoint), budowany leniwie z bufora współrzędnych.
+        # Zmiany wykonuj przez metody obiektu albo przypisanie całej listy.
+        points = self._cache.get('points')
+        if points is None:
+            c = self.coords
+            points = self._cache['points'] = [Point(c[i], c[i + 1]) for i in range(0, len(c), 2)]
+        return points
+
+    @points.setter
+    def points(self, points):
+        self.coords = array('i', flatten_points(points))
+        self._changed()
+
+    def set_coords(self, coords):
+        """Podmienia bufor współrzędnych (płaska sekwencja x, y, ...)."""
+        self.coords = coords if isinstance(coords, array) and coords.typecode == 'i' else array('i', coords)
+        self._changed()
+
+    def _changed(self):
+        # Nowa wersja geometrii - wartości pochodne liczone leniwie od nowa
+        self.version += 1
+        self._cache.clear()
+
+    def snapshot(self):
+        """Niezależna kopia (ta sama klasa i wersja) do obliczeń poza wątkiem GUI."""
+        cls = self.__class__
+        copy = cls.__new__(cls)
+        for klass in cls.__mro__:
+            for name in getattr(klass, '__slots__', ()):
+                if hasattr(self, name):
+                    setattr(copy, name, getattr(self, name))
+        copy.coords = array('i', self.coords)
+        copy._cache = {}
+        return copy
+
+    def cached(self, key, compute):
+        """Wartość pochodna geometrii (także np. obiekty Qt adaptera), ważna do następnej zmiany."""
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    def set_point(self, idx, x, y):
+        self.coords[2*idx] = x
+        self.coords[2*idx + 1] = y
+        self._changed()
+
+    def bounding_box(self):
+        """(min_x, min_y, max_x, max_y) - liczone raz po każdej zmianie geometrii."""
+        return self.cached('bbox', lambda: bounding_box(self.coords))
+
+    def centroid(self):
+        """Środek ciężkości (x, y) albo None dla pustego obiektu."""
+        return self.cached('centroid', lambda: centroid(self.coords))
+
+    def area2(self):
+        """Podwojone pole w pikselach^2 (dokładna liczba całkowita)."""
+        return self.cached('area2', lambda: abs(shoelace2(self.coords)))
+
+    def move(self, delta: Point):
+        # Przypisanie wycinków nadpisuje istniejący bufor (bez nowej listy punktów)
+        dx, dy = delta.x(), delta.y()
+        c = self.coords
+        xs = [x + dx for x in c[0::2]]
+        ys = [y + dy for y in c[1::2]]
+        c[0::2] = array('i', xs)
+        c[1::2] = array('i', ys)
+        self._changed()
+
+    def hit_test(self, point: Point, offset=Point(0,0)):
         # Czy kliknięto w środek obiektu
-        poly = QPolygon([pt + offset for pt in self.points])
-        return poly.containsPoint(point, Qt.OddEvenFill)
+        bbox = self.bounding_box()
+        if bbox is None:
+            return False
+        x, y = point.x() - offset.x(), point.y() - offset.y()
+        if not (bbox[0] <= x <= bbox[2] and bbox[1] <= y <= bbox[3]):
+            return False
+        return point_in_polygon(self.coords, x, y)
 
-    def hit_vertex(self, point: QPoint, offset=QPoint(0,0)):
-        # Zwraca indeks wierzchołka jeśli kliknięto blisko
-        for idx, pt in enumerate(self.points):
-            if (point - (pt + offset)).manhattanLength() < 10:
-                return idx
-        return None
+    def hit_vertex(self, point: Point, offset=Point(0,0), index=None):
+        # Zwraca indeks najbliższego wierzchołka jeśli kliknięto blisko
+        # index: opcjonalny SpatialIndex - wtedy sprawdzane są tylko pobliskie kratki
+        x, y = point.x() - offset.x(), point.y() - offset.y()
+        if index is not None:
+            hit = index.nearest_vertex(x, y, SNAP_DISTANCE, only=self)
+            return hit[1] if hit is not None else None
+        return nearest_vertex(self.coords, x, y, SNAP_DISTANCE)
 
-    def move_vertex(self, idx, new_pos: QPoint, offset=QPoint(0,0)):
-        self.points[idx] = new_pos - offset
+    def move_vertex(self, idx, new_pos: Point, offset=Point(0,0)):
+        self.set_point(idx, new_pos.x() - offset.x(), new_pos.y() - offset.y())
 
     def area(self, scale=0.1):
-        if len(self.points) < 3:
+        if len(self.coords) < 6:
             return 0.0
-        area = 0.0
-        n = len(self.points)
-        for i in range(n - 1):
-            x1, y1 = self.points[i].x(), self.points[i].y()
-            x2, y2 = self.points[i + 1].x(), self.points[i + 1].y()
-            area += (x1 * y2 - x2 * y1)
-        area = abs(area) / 2.0
+        area = self.area2() / 2.0
         return area * (scale ** 2)
 
     def to_dict(self):
+        c = self.coords
         return {
             'type': self.__class__.__name__,
-            'points': [(pt.x(), pt.y()) for pt in self.points],
+            'points': list(zip(c[0::2], c[1::2])),
             'color': [self.color.red(), self.color.green(), self.color.blue(), self.color.alpha()]
         }
 
     @classmethod
     def from_dict(cls, data):
-        from PySide6.QtCore import QPoint
-        points = [QPoint(x, y) for x, y in data.get('points', [])]
-        color = QColor(*data.get('color', [0,0,0,60]))
+        points = data.get('points', [])
+        color = Color(*data.get('color', [0,0,0,60]))
         # Wymuś typ klasy na podstawie pola 'type' jeśli to nie jest AreaObject
         if cls.__name__ == 'AreaObject' and 'type' in data:
             if data['type'] == 'Building':
@@ -76,66 +152,45 @@ class AreaObject:
         obj.color = color
         return obj
 
-    def snap_to_edges(self, building, others, snap_distance=10):
+    def snap_to_edges(self, building, others, snap_distance=10, index=None):
+        # index: opcjonalny SpatialIndex - wtedy sprawdzane są tylko pobliskie odcinki i punkty
+        c = self.coords
+        n = len(c) // 2
         # Przyciąganie do ścian budynku (odcinki, zamknięty wielokąt)
-        if building and len(building.points) > 1:
-            n = len(building.points)
-            closed = (building.points[0] == building.points[-1])
-            seg_count = n-1 if not closed else n-1
-            for i, pt in enumerate(self.points):
-                min_dist = snap_distance
-                snap_pos = None
-                for j in range(seg_count):
-                    a = building.points[j]
-                    b = building.points[(j + 1) % n]
-                    ab = b - a
-                    ap = pt - a
-                    ab_len2 = ab.x()**2 + ab.y()**2
-                    if ab_len2 == 0:
-                        continue
-                    t = max(0, min(1, (ap.x()*ab.x() + ap.y()*ab.y()) / ab_len2))
-                    proj_x = a.x() + ab.x()*t
-                    proj_y = a.y() + ab.y()*t
-                    proj = QPoint(round(proj_x), round(proj_y))
-                    dist = (pt - proj).manhattanLength()
-                    if dist < min_dist:
-                        min_dist = dist
-                        snap_pos = proj
-                if snap_pos is not None:
-                    self.points[i] = snap_pos
+        if building and len(building.coords) > 2:
+            building_segments = None if index is not None else polygon_segments(building.coords)
+            for i in range(n):
+                px, py = c[2*i], c[2*i + 1]
+                if index is not None:
+                    segments = index.segments_near(px, py, snap_distance, only=building)
+                else:
+                    segments = building_segments
+                hit = project_point(px, py, segments, snap_distance)
+                if hit is not None:
+                    c[2*i], c[2*i + 1] = hit[2], hit[3]
         # Przyciąganie do ścian innych bloków (odcinki)
-        for other in others:
-            if other is self or len(other.points) < 2:
-                continue
-            n = len(other.points)
-            closed = (other.points[0] == other.points[-1])
-            seg_count = n-1 if not closed else n-1
-            for i, pt in enumerate(self.points):
-                min_dist = snap_distance
-                snap_pos = None
-                for j in range(seg_count):
-                    a = other.points[j]
-                    b = other.points[(j + 1) % n]
-                    ab = b - a
-                    ap = pt - a
-                    ab_len2 = ab.x()**2 + ab.y()**2
-                    if ab_len2 == 0:
-                        continue
-                    t = max(0, min(1, (ap.x()*ab.x() + ap.y()*ab.y()) / ab_len2))
-                    proj_x = a.x() + ab.x()*t
-                    proj_y = a.y() + ab.y()*t
-                    proj = QPoint(round(proj_x), round(proj_y))
-                    dist = (pt - proj).manhattanLength()
-                    if dist < min_dist:
-                        min_dist = dist
-                        snap_pos = proj
-                if snap_pos is not None:
-                    self.points[i] = snap_pos
-        # Przyciąganie do punktów innych bloków (jak dotychczas)
-        for other in others:
-            if other is self:
-                continue
-            for i, pt in enumerate(self.points):
-                for opt in other.points:
-                    if (pt - opt).manhattanLength() < snap_distance:
-                        self.points[i] = QPoint(opt)
+        if index is None:
+            other_segments = [seg for other in others if other is not self
+                              for seg in polygon_segments(other.coords)]
+        for i in range(n):
+            px, py = c[2*i], c[2*i + 1]
+            if index is not None:
+                segments = index.segments_near(px, py, snap_distance, exclude=self)
+            else:
+                segments = other_segments
+            hit = project_point(px, py, segments, snap_distance)
+            if hit is not None:
+                c[2*i], c[2*i + 1] = hit[2], hit[3]
+        # Przyciąganie do punktów innych bloków: kratki o boku snap_distance, O(1) na wierzchołek
+        if index is not None and index.vertices.cell_size == snap_distance:
+            buckets = index.vertices
+        else:
+            buckets = VertexBuckets(snap_distance)
+            for other in others:
+                if other is not self:
+                    buckets.insert(other)
+        for i in range(n):
+            hit = buckets.nearest(c[2*i], c[2*i + 1], snap_distance, exclude=self)
+            if hit is not None:
+                c[2*i], c[2*i + 1] = hit[2], hit[3]
+        self._changed()
@@ -0,0 +1,112 @@
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from .geometry import shoelace2, flatten_points
+from . import project_binary
+
+# Raport powierzchni bez Qt: czyta pliki projektów (JSON / .rpow) wprost do list współrzędnych.
+
+REPORT_FIELDS = ['file', 'scale', 'building_area', 'tenant_area', 'common_area', 'free_area',
+                 'occupancy', 'tenant_ratio', 'common_ratio', 'tenants', 'commons', 'error']
+PROJECT_EXTENSIONS = ('.json', '.rpow', '.rpowp')
+
+
+def read_records(path):
+    """Zwraca (skala, lista (typ, coords)) dla pliku projektu (wszystkie piętra razem)."""
+    lower = path.lower()
+    if lower.endswith('.rpowp'):
+        from .project import read_floor_records
+        return read_floor_records(path)
+    if lower.endswith('.rpow'):
+        with project_binary.ProjectReader(path) as reader:
+            return reader.scale, [(r['type'], r['coords']) for r in reader.iter_records()]
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    scale = data.get('scale', 0.1)
+    if 'objects' not in data and 'points' in data:
+        # stary format: sam obrys budynku
+        return scale, [('Building', flatten_points(data['points']))]
+    if 'buildings' in data:
+        # projekt wielokondygnacyjny
+        objects = [o for b in data['buildings'] for fl in b.get('floors', []) for o in fl.get('objects', [])]
+    else:
+        objects = data.get('objects', [])
+    return scale, [(o.get('type'), flatten_points(o.get('points', []))) for o in objects]
+
+
+def summarize(scale, records):
+    """Powierzchnie (m²), wskaźniki zajętości i liczby obiektów dla rekordów (typ, coords)."""
+    totals = {'Building': 0, 'TenantArea': 0, 'CommonArea': 0}
+    counts = {'TenantArea': 0, 'CommonArea': 0}
+    for obj_type, coords in records:
+        if obj_type in totals and len(coords) >= 6:
+            totals[obj_type] += abs(shoelace2(coords))
+        if obj_type in counts:
+            counts[obj_type] += 1
+    return area_summary(scale, totals, counts)
+
+
+def area_summary(scale, totals, counts):
+    """Podsumowanie z podwojonych pól (piksele², liczby całkowite) i liczb obiektów według typu."""
+    m2 = scale ** 2 / 2.0
+    building = totals['Building'] * m2
+    tenant = totals['TenantArea'] * m2
+    common = totals['CommonArea'] * m2
+    return {
+        'building_area': round(building, 4),
+        'tenant_area': round(tenant, 4),
+        'common_area': round(common, 4),
+        'free_area': round(building - tenant - common, 4),
+        'occupancy': round((tenant + common) / building, 6) if building else None,
+        'tenant_ratio': round(tenant / building, 6) if building else None,
+        'common_ratio': round(common / building, 6) if building else None,
+        'tenants': counts['TenantArea'],
+        'commons': counts['CommonArea'],
+    }
+
+
+def project_areas(path):
+    """Powierzchnie (m²) i wskaźniki zajętości dla jednego pliku; błąd trafia do pola 'error'."""
+    row = {'file': path}
+    try:
+        scale, records = read_records(path)
+        row['scale'] = scale
+        row.update(summarize(scale, records))
+        row['error'] = None
+    except Exception as e:
+        row['error'] = f'{e.__class__.__name__}: {e}'
+    return row
+
+
+def iter_project_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(PROJECT_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def run_report(paths, out, fmt='csv', workers=None, chunksize=16):
+    """Liczy raport w puli procesów i zapisuje wiersze do out na bieżąco (CSV albo JSONL).
+
+    Zwraca liczbę przetworzonych plików.
+    """
+    files = iter_project_files(paths)
+    writer = None
+    if fmt == 'csv':
+        writer = csv.DictWriter(out, fieldnames=REPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for row in pool.map(project_areas, files, chunksize=chunksize):
+            if writer is not None:
+                writer.writerow(row)
+            else:
+                out.write(json.dumps(row, ensure_ascii=False) + '\n')
+            count += 1
+    return count
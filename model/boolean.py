@@ -0,0 +1,382 @@
+from bisect import bisect_left, bisect_right
+from fractions import Fraction
+from .geometry import polygon_segments, _drop_collinear
+
+# Operacje logiczne na wielokątach o współrzędnych całkowitych (suma, różnica,
+# iloczyn) metodą pasów pionowych: płaszczyzna jest cięta na pasy przy każdej
+# współrzędnej x wierzchołka i przecięcia krawędzi, a w pasie krawędzie się
+# nie przecinają, więc wnętrze wyniku to ciąg trapezów między kolejnymi
+# krawędziami. Obliczenia są dokładne: punkty przecięć to ułamki (Fraction),
+# pole liczone jest bez zaokrągleń. Każdy operand (obiekt) stosuje regułę
+# even-odd jak point_in_polygon; operandy dzielą się na dwie grupy:
+# suma - wszystko w grupie A, iloczyn - A i B, różnica - A bez B.
+#
+# Pas: (xl, xr, przedziały, podwojone pole), przedział wnętrza to
+# (y dołu przy xl, y dołu przy xr, y góry przy xl, y góry przy xr).
+
+UNION = 'union'
+INTERSECTION = 'intersection'
+DIFFERENCE = 'difference'
+
+_OPS = {
+    UNION: lambda a, b: a > 0 or b > 0,
+    INTERSECTION: lambda a, b: a > 0 and b > 0,
+    DIFFERENCE: lambda a, b: a > 0 and b == 0,
+}
+
+
+def _ratio(n, d):
+    q, r = divmod(n, d)
+    return q if not r else Fraction(n, d)
+
+
+def polygon_edges(coords):
+    """Krawędzie niepionowe (x0, y0, x1, y1) z x0 < x1; pionowe nie wpływają na wnętrze pasów."""
+    edges = []
+    for ax, ay, bx, by in polygon_segments(coords):
+        if ax < bx:
+            edges.append((ax, ay, bx, by))
+        elif bx < ax:
+            edges.append((bx, by, ax, ay))
+    return edges
+
+
+def _y_at(e, x):
+    x0, y0, x1, y1 = e[0], e[1], e[2], e[3]
+    if x == x0:
+        return y0
+    if x == x1:
+        return y1
+    if isinstance(x, int):
+        return _ratio(y0 * (x1 - x) + y1 * (x - x0), x1 - x0)
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+
+
+def _crossing_x(a, b):
+    # przecięcie prostych a i b: dy*x - dx*y = c
+    adx, ady = a[2] - a[0], a[3] - a[1]
+    bdx, bdy = b[2] - b[0], b[3] - b[1]
+    ac = ady * a[0] - adx * a[1]
+    bc = bdy * b[0] - bdx * b[1]
+    den = ady * (-bdx) - bdy * (-adx)
+    num = ac * (-bdx) - bc * (-adx)
+    if den < 0:
+        num, den = -num, -den
+    return _ratio(num, den)
+
+
+def _runs(items, group_of, inside_op):
+    """Przedziały wnętrza w pasie bez przecięć; krawędzie pokrywające się liczone razem."""
+    parity = {}
+    counts = [0, 0]
+    runs = []
+    inside = False
+    start = None
+    i, n = 0, len(items)
+    while i < n:
+        yl, yr = items[i][0], items[i][1]
+        while i < n and items[i][0] == yl and items[i][1] == yr:
+            k = items[i][2][4]
+            p = parity.get(k, 0) ^ 1
+            parity[k] = p
+            counts[group_of[k]] += 1 if p else -1
+            i += 1
+        now = inside_op(counts[0], counts[1])
+        if now != inside:
+            if now:
+                start = (yl, yr)
+            else:
+                runs.append((start[0], start[1], yl, yr))
+            inside = now
+    return runs
+
+
+def _slab_area2(xl, xr, runs):
+    return (xr - xl) * sum((ylt - ylb) + (yrt - yrb) for ylb, yrb, ylt, yrt in runs)
+
+
+def _order(active, xl, xr):
+    return sorted(((_y_at(e, xl), _y_at(e, xr), e) for e in active), key=lambda t: (t[0], t[1]))
+
+
+def _slab(xl, xr, active, group_of, inside_op, out):
+    # Dzieli pas w kolejnych punktach przecięć (pierwsze przecięcie jest zawsze
+    # między krawędziami sąsiednimi przy xl, a te po nim zamieniają się miejscami)
+    while True:
+        items = _order(active, xl, xr)
+        split = None
+        for a, b in zip(items, items[1:]):
+            if a[1] > b[1]:
+                x = _crossing_x(a[2], b[2])
+                if xl < x < xr and (split is None or x < split):
+                    split = x
+        if split is not None:
+            items = _order(active, xl, split)
+        runs = _runs(items, group_of, inside_op)
+        if runs:
+            out.append((xl, split if split is not None else xr, runs,
+                        _slab_area2(xl, split if split is not None else xr, runs)))
+        if split is None:
+            return
+        xl = split
+
+
+def sweep(edges, group_of, op, x_from=None, x_to=None):
+    """Pasy wyniku dla krawędzi (x0, y0, x1, y1, operand); group_of[operand] to 0 (A) albo 1 (B).
+
+    x_from / x_to ograniczają obliczenia do zakresu x (przeliczanie fragmentu).
+    """
+    inside_op = _OPS[op]
+    xs = {e[0] for e in edges}
+    xs.update(e[2] for e in edges)
+    if x_from is not None:
+        xs = {x for x in xs if x_from < x < x_to}
+        xs.update((x_from, x_to))
+    xs = sorted(xs)
+    edges = sorted(edges)
+    out = []
+    active = []
+    pos = 0
+    for xl, xr in zip(xs, xs[1:]):
+        while pos < len(edges) and edges[pos][0] <= xl:
+            active.append(edges[pos])
+            pos += 1
+        active = [e for e in active if e[2] > xl]
+        if active:
+            _slab(xl, xr, [e for e in active if e[2] >= xr], group_of, inside_op, out)
+    return out
+
+
+def _subtract(a, b):
+    """Części przedziałów a nieprzykryte przez b (obie listy posortowane, rozłączne)."""
+    result = []
+    j = 0
+    for y0, y1 in a:
+        cur = y0
+        while j < len(b) and b[j][1] <= cur:
+            j += 1
+        k = j
+        while k < len(b) and b[k][0] < y1:
+            if b[k][0] > cur:
+                result.append((cur, b[k][0]))
+            cur = max(cur, b[k][1])
+            k += 1
+        if cur < y1:
+            result.append((cur, y1))
+    return result
+
+
+def slab_rings(slabs):
+    """Obrys wyniku jako pętle [(x, y), ...] (zewnętrzne i otwory o przeciwnej orientacji)."""
+    segments = {}
+    left_ends = {}   # x -> przedziały pasa kończącego się w x
+    right_ends = {}  # x -> przedziały pasa zaczynającego się w x
+
+    def add(p, q):
+        segments.setdefault(p, []).append(q)
+
+    for xl, xr, runs, _ in slabs:
+        for ylb, yrb, ylt, yrt in runs:
+            add((xl, ylb), (xr, yrb))
+            add((xr, yrt), (xl, ylt))
+        right_ends[xl] = [(r[0], r[2]) for r in runs]
+        left_ends[xr] = [(r[1], r[3]) for r in runs]
+    for x in set(left_ends) | set(right_ends):
+        left = left_ends.get(x, [])
+        right = right_ends.get(x, [])
+        for y0, y1 in _subtract(right, left):
+            add((x, y1), (x, y0))
+        for y0, y1 in _subtract(left, right):
+            add((x, y0), (x, y1))
+    rings = []
+    while segments:
+        start = next(iter(segments))
+        loop = [start]
+        cur = start
+        while True:
+            outgoing = segments[cur]
+            nxt = outgoing.pop()
+            if not outgoing:
+                del segments[cur]
+            if nxt == start:
+                break
+            loop.append(nxt)
+            cur = nxt
+        coords = _drop_collinear(loop)
+        if len(coords) >= 6:
+            rings.append(list(zip(coords[0::2], coords[1::2])))
+    return rings
+
+
+class Region:
+    """Wynik operacji logicznej: pasy z dokładnym polem i obrysem."""
+
+    __slots__ = ('slabs',)
+
+    def __init__(self, slabs):
+        self.slabs = slabs
+
+    def is_empty(self):
+        return not self.slabs
+
+    def area2(self):
+        """Podwojone pole (int albo Fraction)."""
+        return sum(s[3] for s in self.slabs)
+
+    def area(self, scale=0.1):
+        return float(self.area2()) * scale ** 2 / 2.0
+
+    def rings(self):
+        return slab_rings(self.slabs)
+
+
+def _operand_edges(operand):
+    if isinstance(operand, Region):
+        # wszystkie pętle wyniku jako jeden operand (otwory zachowane przez even-odd)
+        return [e for ring in operand.rings() for e in polygon_edges([v for pt in ring for v in pt])]
+    return polygon_edges(operand)
+
+
+def boolean(group_a, group_b, op):
+    """Operacja op na dwóch grupach operandów: płaskich współrzędnych wielokątów albo Region."""
+    edges = []
+    group_of = []
+    for group, operands in ((0, group_a), (1, group_b)):
+        for operand in operands:
+            k = len(group_of)
+            group_of.append(group)
+            edges.extend(e + (k,) for e in _operand_edges(operand))
+    return Region(sweep(edges, group_of, op))
+
+
+def union(polygons):
+    return boolean(polygons, [], UNION)
+
+
+def intersection(a, b):
+    """Iloczyn sumy wielokątów a z sumą wielokątów b."""
+    return boolean(a, b, INTERSECTION)
+
+
+def difference(a, b):
+    """Suma wielokątów a bez sumy wielokątów b."""
+    return boolean(a, b, DIFFERENCE)
+
+
+class FreeSpace:
+    """Wolna powierzchnia: budynek minus najemcy i powierzchnie wspólne, przeliczana przyrostowo.
+
+    Pasy wyniku są pamiętane; po zmianie jednego obiektu przeliczany jest
+    tylko zakres x jego starego i nowego obrysu, a pole zmienia się o różnicę.
+    """
+
+    def __init__(self):
+        self._building = None  # (obiekt, wersja)
+        self._areas = {}       # id(obj) -> (obj, wersja, x0, x1)
+        self.slabs = []
+        self._xl = []          # xl kolejnych pasów (do wyszukiwania)
+        self.area2 = 0         # podwojone pole wolnej powierzchni (dokładne)
+        self.building_area2 = 0
+        self.version = 0
+        self._rings = None
+
+    def clear(self):
+        self.__init__()
+
+    def area(self, scale=0.1):
+        return float(self.area2) * scale ** 2 / 2.0
+
+    def occupied_area(self, scale=0.1):
+        """Pole zajęte w obrysie budynku (suma bez podwójnego liczenia nakładań)."""
+        return float(self.building_area2 - self.area2) * scale ** 2 / 2.0
+
+    def rings(self):
+        if self._rings is None:
+            self._rings = slab_rings(self.slabs)
+        return self._rings
+
+    def update(self, objects):
+        """Uzgadnia wynik z bieżącym stanem obiektów; zwraca True, jeśli coś się zmieniło."""
+        building = next((o for o in objects if o.__class__.__name__ == 'Building' and len(o.coords) >= 6), None)
+        areas = {}
+        for obj in objects:
+            if obj.__class__.__name__ in ('TenantArea', 'CommonArea') and len(obj.coords) >= 6:
+                entry = self._areas.get(id(obj))
+                if entry is None or entry[0] is not obj or entry[1] != obj.version:
+                    x0, _, x1, _ = obj.bounding_box()
+                    entry = (obj, obj.version, x0, x1)
+                areas[id(obj)] = entry
+        key = None if building is None else (building, building.version)
+        if key is None or self._building is None or key[0] is not self._building[0] or key[1] != self._building[1]:
+            self._building = key
+            self._areas = areas
+            self._recompute_all()
+            return True
+        ranges = []
+        for k, entry in areas.items():
+            old = self._areas.get(k)
+            if old is not entry:
+                ranges.append((entry[2], entry[3]))
+                if old is not None:
+                    ranges.append((old[2], old[3]))
+        for k, old in self._areas.items():
+            if k not in areas:
+                ranges.append((old[2], old[3]))
+        self._areas = areas
+        if not ranges:
+            return False
+        ranges.sort()
+        merged = [list(ranges[0])]
+        for x0, x1 in ranges[1:]:
+            if x0 <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], x1)
+            else:
+                merged.append([x0, x1])
+        for x0, x1 in merged:
+            self._recompute_range(x0, x1)
+        self._changed()
+        return True
+
+    def _changed(self):
+        self.version += 1
+        self._rings = None
+
+    def _operands(self, x0=None, x1=None):
+        building = self._building[0]
+        edges = [e + (0,) for e in building.cached('boolean_edges', lambda: polygon_edges(building.coords))]
+        group_of = [0]
+        for obj, _, ox0, ox1 in self._areas.values():
+            if x0 is not None and (ox1 <= x0 or ox0 >= x1):
+                continue
+            k = len(group_of)
+            group_of.append(1)
+            edges.extend(e + (k,) for e in obj.cached('boolean_edges', lambda obj=obj: polygon_edges(obj.coords)))
+        return edges, group_of
+
+    def _recompute_all(self):
+        if self._building is None:
+            self.slabs = []
+            self.building_area2 = 0
+        else:
+            edges, group_of = self._operands()
+            self.slabs = sweep(edges, group_of, DIFFERENCE)
+            self.building_area2 = self._building[0].area2()
+        self._xl = [s[0] for s in self.slabs]
+        self.area2 = sum(s[3] for s in self.slabs)
+        self._changed()
+
+    def _recompute_range(self, x0, x1):
+        # Zakres rozszerzony do granic istniejących pasów, żeby żaden pas nie był przecięty
+        i = bisect_right(self._xl, x0) - 1
+        if i >= 0 and self.slabs[i][1] > x0:
+            x0 = self.slabs[i][0]
+        j = bisect_left(self._xl, x1)
+        if j > 0 and self.slabs[j - 1][1] > x1:
+            x1 = self.slabs[j - 1][1]
+        lo = bisect_left(self._xl, x0)
+        hi = bisect_left(self._xl, x1)
+        edges, group_of = self._operands(x0, x1)
+        new = sweep(edges, group_of, DIFFERENCE, x0, x1)
+        self.area2 += sum(s[3] for s in new) - sum(s[3] for s in self.slabs[lo:hi])
+        self.slabs[lo:hi] = new
+        self._xl[lo:hi] = [s[0] for s in new]
@@ -1,11 +1,13 @@
-from PySide6.QtGui import QColor
+from .types import Color
 from .area_object import AreaObject
 
 class Building(AreaObject):
+    __slots__ = ()
+
     def __init__(self, points=None):
-        super().__init__(points, QColor(0,0,255,60))
+        super().__init__(points, Color(0,0,255,60))
     @classmethod
     def from_dict(cls, data):
         obj = super().from_dict(data)
-        obj.color = QColor(0,0,255,60)
+        obj.color = Color(0,0,255,60)
         return obj
@@ -0,0 +1,253 @@
+from array import array
+from .types import Point
+
+# Polecenia edycji do cofania/ponawiania. Każde przechowuje tylko różnicę
+# (przesunięcie, zmienione wierzchołki, stary/nowy atrybut), a nie kopię planu,
+# więc pamięć historii rośnie z liczbą edycji, a nie z rozmiarem planu.
+
+
+class Command:
+    """Odwracalna zmiana listy obiektów lub pojedynczych obiektów."""
+
+    __slots__ = ()
+    structural = False  # True - zmienia skład listy obiektów
+
+    def apply(self, objects):
+        raise NotImplementedError
+
+    def revert(self, objects):
+        raise NotImplementedError
+
+    def touched(self):
+        """Obiekty, których dotyczy zmiana (do odświeżenia indeksów i widoków)."""
+        return ()
+
+
+class AddObject(Command):
+    __slots__ = ('obj', 'index')
+    structural = True
+
+    def __init__(self, obj, index):
+        self.obj = obj
+        self.index = index
+
+    def apply(self, objects):
+        objects.insert(self.index, self.obj)
+
+    def revert(self, objects):
+        objects.remove(self.obj)
+
+    def touched(self):
+        return (self.obj,)
+
+
+class MoveObject(Command):
+    __slots__ = ('obj', 'dx', 'dy')
+
+    def __init__(self, obj, dx, dy):
+        self.obj = obj
+        self.dx = dx
+        self.dy = dy
+
+    def apply(self, objects):
+        self.obj.move(Point(self.dx, self.dy))
+
+    def revert(self, objects):
+        self.obj.move(Point(-self.dx, -self.dy))
+
+    def touched(self):
+        return (self.obj,)
+
+
+class EditVertices(Command):
+    """Zmiana położenia części wierzchołków: płaski bufor (idx, stary x, stary y, nowy x, nowy y)."""
+
+    __slots__ = ('obj', 'changes')
+
+    def __init__(self, obj, changes):
+        self.obj = obj
+        self.changes = changes
+
+    @classmethod
+    def diff(cls, obj, old_coords):
+        """Polecenie opisujące zmianę od old_coords do obecnej geometrii albo None.
+
+        Przesunięcie wszystkich wierzchołków o ten sam wektor zapisywane jest jako MoveObject.
+        """
+        c = obj.coords
+        if len(c) != len(old_coords):
+            return ReplaceCoords(obj, old_coords, c)
+        changes = array('i')
+        deltas = set()
+        for i in range(0, len(c), 2):
+            dx = c[i] - old_coords[i]
+            dy = c[i + 1] - old_coords[i + 1]
+            deltas.add((dx, dy))
+            if dx or dy:
+                changes.extend((i // 2, old_coords[i], old_coords[i + 1], c[i], c[i + 1]))
+        if not changes:
+            return None
+        if len(deltas) == 1:
+            return MoveObject(obj, *deltas.pop())
+        return cls(obj, changes)
+
+    def _set(self, offset):
+        ch = self.changes
+        c = self.obj.coords
+        for k in range(0, len(ch), 5):
+            i = 2*ch[k]
+            c[i] = ch[k + offset]
+            c[i + 1] = ch[k + offset + 1]
+        self.obj.set_coords(c)
+
+    def apply(self, objects):
+        self._set(3)
+
+    def revert(self, objects):
+        self._set(1)
+
+    def touched(self):
+        return (self.obj,)
+
+
+class InsertVertex(Command):
+    __slots__ = ('obj', 'idx', 'x', 'y')
+
+    def __init__(self, obj, idx, x, y):
+        self.obj = obj
+        self.idx = idx
+        self.x = x
+        self.y = y
+
+    def apply(self, objects):
+        c = self.obj.coords
+        c[2*self.idx:2*self.idx] = array('i', (self.x, self.y))
+        self.obj.set_coords(c)
+
+    def revert(self, objects):
+        c = self.obj.coords
+        del c[2*self.idx:2*self.idx + 2]
+        self.obj.set_coords(c)
+
+    def touched(self):
+        return (self.obj,)
+
+
+class ReplaceCoords(Command):
+    """Podmiana całego obrysu (np. po automatycznym rozpychaniu najemcy)."""
+
+    __slots__ = ('obj', 'old', 'new')
+
+    def __init__(self, obj, old, new):
+        self.obj = obj
+        self.old = array('i', old)
+        self.new = array('i', new)
+
+    def apply(self, objects):
+        self.obj.set_coords(array('i', self.new))
+
+    def revert(self, objects):
+        self.obj.set_coords(array('i', self.old))
+
+    def touched(self):
+        return (self.obj,)
+
+
+class SetAttribute(Command):
+    """Zmiana atrybutu obiektu (nazwa, kolor, docelowa powierzchnia)."""
+
+    __slots__ = ('obj', 'name', 'old', 'new')
+
+    def __init__(self, obj, name, old, new):
+        self.obj = obj
+        self.name = name
+        self.old = old
+        self.new = new
+
+    def apply(self, objects):
+        setattr(self.obj, self.name, self.new)
+
+    def revert(self, objects):
+        setattr(self.obj, self.name, self.old)
+
+    def touched(self):
+        return (self.obj,)
+
+
+class CompositeCommand(Command):
+    """Kilka poleceń cofanych i ponawianych razem (np. przesunięcie budynku z zawartością)."""
+
+    __slots__ = ('commands',)
+
+    def __init__(self, commands):
+        self.commands = list(commands)
+
+    @property
+    def structural(self):
+        return any(cmd.structural for cmd in self.commands)
+
+    def apply(self, objects):
+        for cmd in self.commands:
+            cmd.apply(objects)
+
+    def revert(self, objects):
+        for cmd in reversed(self.commands):
+            cmd.revert(objects)
+
+    def touched(self):
+        return [obj for cmd in self.commands for obj in cmd.touched()]
+
+
+class CommandHistory:
+    """Stosy cofania i ponawiania. Polecenia trafiają tu już wykonane (push) albo są wykonywane (execute)."""
+
+    def __init__(self, limit=1000):
+        self.limit = limit
+        self._undo = []
+        self._redo = []
+        self.on_change = None  # funkcja(polecenie, cofnięte) po każdym wykonaniu, cofnięciu i ponowieniu
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def push(self, command):
+        if command is None:
+            return
+        self._undo.append(command)
+        if len(self._undo) > self.limit:
+            del self._undo[0]
+        self._redo.clear()
+        if self.on_change:
+            self.on_change(command, False)
+
+    def execute(self, command, objects):
+        command.apply(objects)
+        self.push(command)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def undo(self, objects):
+        """Cofa ostatnie polecenie i je zwraca (None gdy historia jest pusta)."""
+        if not self._undo:
+            return None
+        command = self._undo.pop()
+        command.revert(objects)
+        self._redo.append(command)
+        if self.on_change:
+            self.on_change(command, True)
+        return command
+
+    def redo(self, objects):
+        if not self._redo:
+            return None
+        command = self._redo.pop()
+        command.apply(objects)
+        self._undo.append(command)
+        if self.on_change:
+            self.on_change(command, False)
+        return command
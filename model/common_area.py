@@ -1,8 +1,10 @@
-from PySide6.QtGui import QColor
+from .types import Color
 from .area_object import AreaObject
 
 class CommonArea(AreaObject):
-    def __init__(self, points=None, color=QColor(200,200,0,120)):
+    __slots__ = ()
+
+    def __init__(self, points=None, color=Color(200,200,0,120)):
         super().__init__(points, color)
 
     def to_dict(self):
@@ -0,0 +1,298 @@
+import math
+from operator import mul
+
+# Jądro geometryczne: operacje na płaskim buforze współrzędnych [x0, y0, x1, y1, ...]
+# (array('i') lub lista int), bez tworzenia obiektów punktów w pętlach.
+
+
+def flatten_points(points):
+    if points and not hasattr(points[0], 'x'):
+        # pary (x, y) np. z JSON - bez sprawdzania każdego punktu
+        return [v for pt in points for v in pt]
+    coords = []
+    for pt in points:
+        if hasattr(pt, 'x'):
+            coords.append(pt.x())
+            coords.append(pt.y())
+        else:
+            coords.extend(pt)
+    return coords
+
+
+def shoelace2(coords):
+    """Podwojone pole ze znakiem (wzór Gaussa), wielokąt domykany automatycznie."""
+    xs = coords[0::2]
+    ys = coords[1::2]
+    if len(xs) < 3:
+        return 0
+    return (sum(map(mul, xs, ys[1:] + ys[:1]))
+            - sum(map(mul, xs[1:] + xs[:1], ys)))
+
+
+def centroid(coords):
+    """Środek ciężkości wielokąta (x, y); dla zdegenerowanych - średnia wierzchołków."""
+    xs = coords[0::2]
+    ys = coords[1::2]
+    if not xs:
+        return None
+    a2 = shoelace2(coords)
+    if a2 == 0:
+        return sum(xs) / len(xs), sum(ys) / len(ys)
+    xs2 = xs[1:] + xs[:1]
+    ys2 = ys[1:] + ys[:1]
+    cx = cy = 0
+    for x1, y1, x2, y2 in zip(xs, ys, xs2, ys2):
+        cross = x1*y2 - x2*y1
+        cx += (x1 + x2) * cross
+        cy += (y1 + y2) * cross
+    return cx / (3*a2), cy / (3*a2)
+
+
+def polygon_segments(coords):
+    """Odcinki (ax, ay, bx, by) kolejnych wierzchołków, łącznie z krawędzią zamykającą."""
+    xs = coords[0::2]
+    ys = coords[1::2]
+    if len(xs) < 2:
+        return []
+    if xs[0] == xs[-1] and ys[0] == ys[-1]:
+        # pierwszy punkt powtórzony - krawędź zamykająca miałaby długość zero
+        return list(zip(xs[:-1], ys[:-1], xs[1:], ys[1:]))
+    return list(zip(xs, ys, xs[1:] + xs[:1], ys[1:] + ys[:1]))
+
+
+def project_point(px, py, segments, max_dist=float('inf')):
+    """Najbliższy rzut punktu na odcinki w metryce manhattan.
+
+    Zwraca (dist, idx, x, y) dla pierwszego najbliższego odcinka
+    bliższego niż max_dist albo None.
+    """
+    best = None
+    min_dist = max_dist
+    for idx, (ax, ay, bx, by) in enumerate(segments):
+        abx = bx - ax
+        aby = by - ay
+        ab_len2 = abx*abx + aby*aby
+        if ab_len2 == 0:
+            continue
+        t = ((px - ax)*abx + (py - ay)*aby) / ab_len2
+        if t < 0:
+            t = 0
+        elif t > 1:
+            t = 1
+        qx = round(ax + abx*t)
+        qy = round(ay + aby*t)
+        dist = abs(px - qx) + abs(py - qy)
+        if dist < min_dist:
+            min_dist = dist
+            best = (dist, idx, qx, qy)
+    return best
+
+
+def nearest_vertex(coords, px, py, max_dist=float('inf')):
+    """Indeks najbliższego wierzchołka (metryka manhattan) bliższego niż max_dist albo None."""
+    xs = coords[0::2]
+    if not xs:
+        return None
+    dists = [abs(px - x) + abs(py - y) for x, y in zip(xs, coords[1::2])]
+    dist = min(dists)
+    if dist >= max_dist:
+        return None
+    return dists.index(dist)
+
+
+def point_in_polygon(coords, px, py):
+    """Czy punkt leży wewnątrz wielokąta (reguła even-odd)."""
+    inside = False
+    for ax, ay, bx, by in polygon_segments(coords):
+        if (ay > py) != (by > py):
+            x = ax + (py - ay) * (bx - ax) / (by - ay)
+            if px < x:
+                inside = not inside
+    return inside
+
+
+def bounding_box(coords):
+    """(min_x, min_y, max_x, max_y) albo None dla pustego wielokąta."""
+    if not coords:
+        return None
+    xs = coords[0::2]
+    ys = coords[1::2]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def scanline_spans(coords, x0, y0, cell, cols=None, rows=None):
+    """Rasteryzacja wielokąta na siatkę kratek (reguła even-odd, próbkowanie w środkach kratek).
+
+    Zwraca słownik gy -> lista zakresów kolumn [gx0, gx1). Kratka (gx, gy)
+    ma środek w punkcie (x0 + (gx + 0.5)*cell, y0 + (gy + 0.5)*cell).
+    Gdy podano cols/rows, wynik jest przycięty do siatki cols x rows.
+    """
+    crossings = {}
+    for ax, ay, bx, by in polygon_segments(coords):
+        if ay == by:
+            continue
+        if ay > by:
+            ax, ay, bx, by = bx, by, ax, ay
+        # wiersze, których środek leży w przedziale [ay, by)
+        gy0 = math.ceil((ay - y0) / cell - 0.5)
+        gy1 = math.ceil((by - y0) / cell - 0.5)
+        if rows is not None:
+            gy0 = max(gy0, 0)
+            gy1 = min(gy1, rows)
+        slope = (bx - ax) / (by - ay)
+        for gy in range(gy0, gy1):
+            cy = y0 + (gy + 0.5)*cell
+            crossings.setdefault(gy, []).append(ax + (cy - ay)*slope)
+    spans = {}
+    for gy, xs in crossings.items():
+        xs.sort()
+        row = []
+        for xa, xb in zip(xs[0::2], xs[1::2]):
+            gx0 = math.ceil((xa - x0) / cell - 0.5)
+            gx1 = math.ceil((xb - x0) / cell - 0.5)
+            if cols is not None:
+                gx0 = max(gx0, 0)
+                gx1 = min(gx1, cols)
+            if gx1 > gx0:
+                row.append((gx0, gx1))
+        if row:
+            spans[gy] = row
+    return spans
+
+
+def edge_cells(coords, x0, y0, cell, cols, rows):
+    """Kratki (siatka jak w scanline_spans), przez których wnętrze przechodzi brzeg wielokąta.
+
+    Zwraca słownik gy -> lista zakresów kolumn [gx0, gx1). Razem z próbkowaniem
+    środków pozwala wybrać kratki leżące w całości wewnątrz albo poza wielokątem.
+    """
+    cells = {}
+    for ax, ay, bx, by in polygon_segments(coords):
+        if ay > by:
+            ax, ay, bx, by = bx, by, ax, ay
+        if ay == by:
+            # odcinek poziomy na granicy pasm nie wchodzi w głąb żadnej kratki
+            if (ay - y0) % cell == 0:
+                continue
+            bands = [((ay - y0) // cell, ax, bx)]
+        else:
+            slope = (bx - ax) / (by - ay)
+            gy0 = max((ay - y0) // cell, 0)
+            gy1 = min(-((y0 - by) // cell), rows)
+            if slope == 0:
+                # odcinek pionowy: te same kolumny w każdym paśmie
+                gx0 = max((ax - x0) // cell, 0)
+                gx1 = min(-((x0 - ax) // cell), cols)
+                if gx1 > gx0:
+                    for gy in range(gy0, gy1):
+                        cells.setdefault(gy, []).append((gx0, gx1))
+                continue
+            bands = []
+            for gy in range(gy0, gy1):
+                ya = max(ay, y0 + gy*cell)
+                yb = min(by, y0 + (gy + 1)*cell)
+                bands.append((gy, ax + (ya - ay)*slope, ax + (yb - ay)*slope))
+        for gy, xa, xb in bands:
+            if not 0 <= gy < rows:
+                continue
+            if xa > xb:
+                xa, xb = xb, xa
+            gx0 = max(math.floor((xa - x0) / cell), 0)
+            gx1 = min(math.ceil((xb - x0) / cell), cols)
+            if gx1 > gx0:
+                cells.setdefault(gy, []).append((gx0, gx1))
+    return cells
+
+
+def trace_loops(cells, cols, candidates=None):
+    """Obrysy zbioru kratek (indeksy gy*cols + gx) jako wielokąty we współrzędnych siatki.
+
+    Zwraca listę płaskich list wierzchołków (bez punktów współliniowych i bez
+    domknięcia): zewnętrzny obrys oraz osobną pętlę dla każdej dziury.
+    candidates: opcjonalnie kratki, spośród których wybierane są krawędzie
+    (np. tylko brzeg dużego zbioru) - pozostałe muszą leżeć we wnętrzu.
+    """
+    # Krawędzie skierowane tak, by kratka leżała po prawej stronie (oś y w dół)
+    edges = {}
+    for idx in (cells if candidates is None else candidates):
+        gy, gx = divmod(idx, cols)
+        if idx - cols not in cells:
+            edges.setdefault((gx, gy), []).append((gx + 1, gy))
+        if gx + 1 >= cols or idx + 1 not in cells:
+            edges.setdefault((gx + 1, gy), []).append((gx + 1, gy + 1))
+        if idx + cols not in cells:
+            edges.setdefault((gx + 1, gy + 1), []).append((gx, gy + 1))
+        if gx == 0 or idx - 1 not in cells:
+            edges.setdefault((gx, gy + 1), []).append((gx, gy))
+    loops = []
+    while edges:
+        start = next(iter(edges))
+        loop = [start]
+        prev = start
+        cur = _pop_edge(edges, start, None)
+        while cur != start:
+            loop.append(cur)
+            direction = (cur[0] - prev[0], cur[1] - prev[1])
+            prev, cur = cur, _pop_edge(edges, cur, direction)
+        loops.append(_drop_collinear(loop))
+    return loops
+
+
+def _pop_edge(edges, vertex, direction):
+    outgoing = edges[vertex]
+    choice = 0
+    if len(outgoing) > 1 and direction is not None:
+        # W punkcie styku po przekątnej skręcamy w prawo - pętle pozostają proste
+        dx, dy = direction
+        order = [(-dy, dx), (dx, dy), (dy, -dx)]
+        choice = min(range(len(outgoing)),
+                     key=lambda k: order.index((outgoing[k][0] - vertex[0], outgoing[k][1] - vertex[1])))
+    end = outgoing.pop(choice)
+    if not outgoing:
+        del edges[vertex]
+    return end
+
+
+def _drop_collinear(loop):
+    coords = []
+    n = len(loop)
+    for i, (x, y) in enumerate(loop):
+        px, py = loop[i - 1]
+        nx, ny = loop[(i + 1) % n]
+        if (x - px)*(ny - y) - (y - py)*(nx - x) != 0:
+            coords.extend((x, y))
+    return coords
+
+
+def simplify(coords, tolerance):
+    """Upraszczanie łamanej algorytmem Douglasa-Peuckera (pierwszy i ostatni punkt zostają)."""
+    n = len(coords) // 2
+    if n < 3:
+        return list(coords)
+    keep = bytearray(n)
+    keep[0] = keep[n - 1] = 1
+    tol2 = tolerance * tolerance
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        ax, ay = coords[2*first], coords[2*first + 1]
+        bx, by = coords[2*last], coords[2*last + 1]
+        abx, aby = bx - ax, by - ay
+        ab_len2 = abx*abx + aby*aby
+        max_d2 = tol2
+        index = None
+        for i in range(first + 1, last):
+            px, py = coords[2*i] - ax, coords[2*i + 1] - ay
+            if ab_len2 == 0:
+                d2 = px*px + py*py
+            else:
+                cross = px*aby - py*abx
+                d2 = cross*cross / ab_len2
+            if d2 > max_d2:
+                max_d2 = d2
+                index = i
+        if index is not None:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+    return [v for i in range(n) if keep[i] for v in (coords[2*i], coords[2*i + 1])]
@@ -0,0 +1,375 @@
+import json
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from . import project_binary
+from .project import load_project, dumps as dump_project
+from .types import Color
+from .commands import AddObject, MoveObject, EditVertices, InsertVertex, ReplaceCoords, SetAttribute, CompositeCommand
+
+# Dziennik edycji (autozapis): migawka całego projektu i dopisywane za nią
+# polecenia historii (wykonanie, cofnięcie, ponowienie) oraz zmiany projektu
+# (przełączenie piętra, nowe piętro, nowy budynek). Rekord zawiera tylko
+# różnicę, którą opisuje polecenie, więc koszt autozapisu zależy od liczby edycji,
+# a nie od wielkości planu. Zapis i fsync robi wątek w tle, partiami najwyżej co
+# flush_interval. Gdy dziennik urośnie ponad rozmiar migawki, zapisywana jest
+# nowa migawka (kompaktowanie) i dziennik zaczyna się od zera. Migawka jest
+# serializowana w tym samym wątku w tle z niezmiennej kopii projektu.
+#
+# Pliki w katalogu autozapisu, little-endian:
+#   snapshot.bin: magic 'RPSN', u16 wersja, u64 pokolenie, projekt .rpowp
+#   journal.bin:  magic 'RPJL', u16 wersja, u64 pokolenie, rekordy:
+#                 u32 długość, u32 crc32, treść: u8 cofnięcie + polecenie
+#                 albo zmiana projektu ('F' piętro, 'N' nowe piętro, 'B' nowy budynek)
+# Dziennik jest odtwarzany tylko na migawce tego samego pokolenia; rekord
+# urwany przy awarii (zła długość lub crc) kończy odtwarzanie.
+#
+# Obiekty są wskazywane indeksem na liście aktywnego piętra w chwili zapisu.
+
+SNAPSHOT_MAGIC = b'RPSN'
+JOURNAL_MAGIC = b'RPJL'
+VERSION = 2
+SNAPSHOT_FILE = 'snapshot.bin'
+JOURNAL_FILE = 'journal.bin'
+FLUSH_INTERVAL = 0.5          # s - najdłuższy czas między zapisem rekordu a fsync
+COMPACT_MIN_BYTES = 256 * 1024
+
+_FILE_HEADER = struct.Struct('<4sHQ')
+_RECORD = struct.Struct('<II')
+_U32 = struct.Struct('<I')
+_ADD = struct.Struct('<II')      # indeks, długość bloku obiektu
+_MOVE = struct.Struct('<Iii')
+_EDIT = struct.Struct('<II')     # obiekt, liczba int w buforze zmian
+_INSERT = struct.Struct('<IIii')
+_REPLACE = struct.Struct('<III')
+_SET = struct.Struct('<II')      # obiekt, długość JSON
+_FLOOR = struct.Struct('<II')    # budynek, piętro
+_NAME = struct.Struct('<II')     # budynek, długość nazwy UTF-8
+
+_RECORDS = 'records'
+_SNAPSHOT = 'snapshot'
+_CLOSE = 'close'
+
+
+def _ints(values):
+    data = values if isinstance(values, array) else array('i', values)
+    if sys.byteorder == 'big':
+        data = array('i', data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def _read_ints(buf, offset, count):
+    data = array('i')
+    data.frombytes(buf[offset:offset + 4 * count])
+    if sys.byteorder == 'big':
+        data.byteswap()
+    return data, offset + 4 * count
+
+
+def _value(name, value):
+    if name == 'color' and value is not None:
+        c = Color.from_any(value)
+        return [c.red(), c.green(), c.blue(), c.alpha()]
+    return value
+
+
+def encode_command(command, position, reverted=False):
+    """Bajty polecenia; position(obj) to indeks obiektu na liście piętra.
+
+    Cofnięte dodanie obiektu zapisuje tylko indeks (obiekt jest już na liście przy odtwarzaniu).
+    """
+    if isinstance(command, AddObject):
+        chunk = b'' if reverted else project_binary._object_chunk(command.obj)
+        return b'A' + _ADD.pack(command.index, len(chunk)) + chunk
+    if isinstance(command, MoveObject):
+        return b'M' + _MOVE.pack(position(command.obj), command.dx, command.dy)
+    if isinstance(command, EditVertices):
+        return b'E' + _EDIT.pack(position(command.obj), len(command.changes)) + _ints(command.changes)
+    if isinstance(command, InsertVertex):
+        return b'I' + _INSERT.pack(position(command.obj), command.idx, command.x, command.y)
+    if isinstance(command, ReplaceCoords):
+        return (b'R' + _REPLACE.pack(position(command.obj), len(command.old), len(command.new))
+                + _ints(command.old) + _ints(command.new))
+    if isinstance(command, SetAttribute):
+        data = json.dumps([command.name, _value(command.name, command.old), _value(command.name, command.new)],
+                          ensure_ascii=False).encode('utf-8')
+        return b'S' + _SET.pack(position(command.obj), len(data)) + data
+    if isinstance(command, CompositeCommand):
+        return b'C' + _U32.pack(len(command.commands)) + b''.join(
+            encode_command(cmd, position, reverted) for cmd in command.commands)
+    raise TypeError(f'Nieobsługiwane polecenie w dzienniku: {command.__class__.__name__}')
+
+
+def decode_command(buf, offset, objects, reverted=False):
+    """(polecenie, offset za nim) - obiekty z listy piętra objects."""
+    tag = bytes(buf[offset:offset + 1])
+    offset += 1
+    if tag == b'A':
+        index, size = _ADD.unpack_from(buf, offset)
+        offset += _ADD.size
+        if reverted:
+            return AddObject(objects[index], index), offset + size
+        record, _ = project_binary._read_object(buf, offset)
+        return AddObject(project_binary.object_from_record(record), index), offset + size
+    if tag == b'M':
+        i, dx, dy = _MOVE.unpack_from(buf, offset)
+        return MoveObject(objects[i], dx, dy), offset + _MOVE.size
+    if tag == b'E':
+        i, n = _EDIT.unpack_from(buf, offset)
+        changes, offset = _read_ints(buf, offset + _EDIT.size, n)
+        return EditVertices(objects[i], changes), offset
+    if tag == b'I':
+        i, idx, x, y = _INSERT.unpack_from(buf, offset)
+        return InsertVertex(objects[i], idx, x, y), offset + _INSERT.size
+    if tag == b'R':
+        i, n_old, n_new = _REPLACE.unpack_from(buf, offset)
+        old, offset = _read_ints(buf, offset + _REPLACE.size, n_old)
+        new, offset = _read_ints(buf, offset, n_new)
+        return ReplaceCoords(objects[i], old, new), offset
+    if tag == b'S':
+        i, size = _SET.unpack_from(buf, offset)
+        offset += _SET.size
+        name, old, new = json.loads(bytes(buf[offset:offset + size]).decode('utf-8'))
+        if name == 'color':
+            old, new = (Color(*v) if v is not None else None for v in (old, new))
+        return SetAttribute(objects[i], name, old, new), offset + size
+    if tag == b'C':
+        (count,) = _U32.unpack_from(buf, offset)
+        offset += _U32.size
+        commands = []
+        for _ in range(count):
+            command, offset = decode_command(buf, offset, objects, reverted)
+            commands.append(command)
+        return CompositeCommand(commands), offset
+    raise ValueError(f'Nieznany rekord dziennika: {tag!r}')
+
+
+def _write_file(path, data):
+    # Zapis atomowy: plik tymczasowy, fsync, podmiana
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class Journal:
+    """Dziennik edycji w katalogu directory, zapisywany w wątku w tle.
+
+    snapshot() przyjmuje kopię projektu (Project.frozen), record() - polecenie
+    historii zaraz po wykonaniu albo cofnięciu, record_floor() i pokrewne - zmiany projektu.
+    """
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        # pokolenia rosną także między uruchomieniami - stary dziennik nigdy nie pasuje do nowej migawki
+        self.generation = _stored_generation(directory)
+        self.started = False     # True po pierwszej migawce
+        self.size = 0            # bajty rekordów od ostatniej migawki
+        self.snapshot_size = 0
+        self.error = None        # ostatni błąd zapisu (wątek w tle nie przerywa pracy programu)
+        self._positions = None   # id(obj) -> indeks na liście piętra
+        self._objects = None
+        self._queue = queue.Queue()
+        self._file = None
+        self._thread = threading.Thread(target=self._run, name='journal', daemon=True)
+        self._thread.start()
+
+    def snapshot(self, project):
+        """Nowa migawka projektu i pusty dziennik (po wczytaniu projektu i przy kompaktowaniu).
+
+        project jest serializowany w wątku w tle, więc nie może się już zmieniać (Project.frozen).
+        """
+        self.generation += 1
+        self.started = True
+        self.size = 0
+        self._positions = None
+        self._queue.put((_SNAPSHOT, (self.generation, project)))
+
+    def needs_compaction(self):
+        """Czy dziennik jest już większy od migawki (koszt kompaktowania rozkłada się na edycje)."""
+        return self.started and self.size > max(COMPACT_MIN_BYTES, self.snapshot_size)
+
+    def _position(self, obj):
+        return self._positions[id(obj)]
+
+    def record(self, command, objects, reverted=False):
+        """Dopisuje polecenie wykonane (albo cofnięte, reverted=True) na liście objects."""
+        if not self.started:
+            return
+        if self._positions is None or self._objects is not objects:
+            self._objects = objects
+            self._positions = {id(obj): i for i, obj in enumerate(objects)}
+        payload = bytes((reverted,)) + encode_command(command, self._position, reverted)
+        self._append(payload)
+        if command.structural:
+            # dodanie na końcu listy (rysowanie) nie wymaga przeliczania indeksów
+            if isinstance(command, AddObject) and command.index == len(objects) - (0 if reverted else 1):
+                if reverted:
+                    self._positions.pop(id(command.obj), None)
+                else:
+                    self._positions[id(command.obj)] = command.index
+            else:
+                self._positions = None
+
+    def record_floor(self, b, f):
+        """Dopisuje przełączenie aktywnego piętra - kolejne rekordy dotyczą jego obiektów."""
+        if self.started:
+            self._positions = None
+            self._append(b'\x00F' + _FLOOR.pack(b, f))
+
+    def record_add_floor(self, b, name):
+        """Dopisuje nowe (puste) piętro na końcu budynku b."""
+        if self.started:
+            data = name.encode('utf-8')
+            self._append(b'\x00N' + _NAME.pack(b, len(data)) + data)
+
+    def record_add_building(self, name):
+        """Dopisuje nowy budynek bez pięter."""
+        if self.started:
+            data = name.encode('utf-8')
+            self._append(b'\x00B' + _NAME.pack(0, len(data)) + data)
+
+    def _append(self, payload):
+        data = _RECORD.pack(len(payload), zlib.crc32(payload)) + payload
+        self.size += len(data)
+        self._queue.put((_RECORDS, data))
+
+    def close(self, discard=False):
+        """Zapisuje zaległe rekordy i kończy wątek; discard=True usuwa pliki (poprawne zamknięcie programu)."""
+        self._queue.put((_CLOSE, discard))
+        self._thread.join()
+
+    def _run(self):
+        deadline = None  # termin najbliższego fsync dla zapisanych rekordów
+        while True:
+            try:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                kind, data = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind = None
+            try:
+                if kind == _RECORDS:
+                    if self._file is not None:
+                        self._file.write(data)
+                        if deadline is None:
+                            deadline = time.monotonic() + self.flush_interval
+                    if deadline is None or time.monotonic() < deadline:
+                        continue
+                if deadline is not None and self._file is not None:
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                deadline = None
+                if kind == _SNAPSHOT:
+                    self._write_snapshot(*data)
+                elif kind == _CLOSE:
+                    self._close_file()
+                    if data:
+                        for name in (JOURNAL_FILE, SNAPSHOT_FILE):
+                            path = os.path.join(self.directory, name)
+                            if os.path.exists(path):
+                                os.remove(path)
+                    return
+            except OSError as e:
+                self.error = e
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_snapshot(self, generation, project):
+        # Kolejność: najpierw migawka nowego pokolenia, potem pusty dziennik - po awarii
+        # w międzyczasie stary dziennik jest pomijany (jego zmiany są już w migawce)
+        project_bytes = dump_project(project)
+        self.snapshot_size = len(project_bytes)
+        os.makedirs(self.directory, exist_ok=True)
+        self._close_file()
+        header = _FILE_HEADER.pack(SNAPSHOT_MAGIC, VERSION, generation)
+        _write_file(os.path.join(self.directory, SNAPSHOT_FILE), header + project_bytes)
+        path = os.path.join(self.directory, JOURNAL_FILE)
+        _write_file(path, _FILE_HEADER.pack(JOURNAL_MAGIC, VERSION, generation))
+        self._file = open(path, 'ab')
+
+
+def _stored_generation(directory):
+    try:
+        with open(os.path.join(directory, SNAPSHOT_FILE), 'rb') as f:
+            magic, _, generation = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+        return generation if magic == SNAPSHOT_MAGIC else 0
+    except (OSError, struct.error):
+        return 0
+
+
+def read_journal(directory):
+    """(bajty projektu z migawki, lista rekordów (cofnięcie, bajty polecenia)) albo None, gdy nie ma autozapisu."""
+    snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+    if not os.path.exists(snapshot_path):
+        return None
+    with open(snapshot_path, 'rb') as f:
+        data = f.read()
+    if len(data) < _FILE_HEADER.size:
+        return None
+    magic, version, generation = _FILE_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version > VERSION:
+        return None
+    project_bytes = data[_FILE_HEADER.size:]
+    records = []
+    journal_path = os.path.join(directory, JOURNAL_FILE)
+    if os.path.exists(journal_path):
+        with open(journal_path, 'rb') as f:
+            buf = f.read()
+        if len(buf) >= _FILE_HEADER.size and _FILE_HEADER.unpack_from(buf, 0) == (JOURNAL_MAGIC, VERSION, generation):
+            offset = _FILE_HEADER.size
+            while offset + _RECORD.size <= len(buf):
+                size, crc = _RECORD.unpack_from(buf, offset)
+                payload = buf[offset + _RECORD.size:offset + _RECORD.size + size]
+                if len(payload) != size or zlib.crc32(payload) != crc:
+                    break  # rekord urwany przy awarii
+                records.append((bool(payload[0]), payload))
+                offset += _RECORD.size + size
+    return project_bytes, records
+
+
+def recover(directory):
+    """Projekt odtworzony z migawki i dziennika (None, gdy nie ma autozapisu) oraz liczba odtworzonych edycji."""
+    data = read_journal(directory)
+    if data is None:
+        return None, 0
+    project_bytes, records = data
+    project = load_project(project_bytes)
+    objects = project.active_floor().load() if project.active is not None else []
+    for reverted, payload in records:
+        if payload[1:2] in (b'F', b'N', b'B'):
+            objects = _apply_project_change(project, objects, payload)
+            continue
+        command, _ = decode_command(payload, 1, objects, reverted)
+        if reverted:
+            command.revert(objects)
+        else:
+            command.apply(objects)
+    return project, len(records)
+
+
+def _apply_project_change(project, objects, payload):
+    # Zmiana projektu z rekordu dziennika; zwraca obiekty aktywnego piętra
+    tag = payload[1:2]
+    if tag == b'F':
+        b, f = _FLOOR.unpack_from(payload, 2)
+        project.store_active(objects)
+        return project.set_active(b, f)
+    b, size = _NAME.unpack_from(payload, 2)
+    name = bytes(payload[2 + _NAME.size:2 + _NAME.size + size]).decode('utf-8')
+    if tag == b'N':
+        project.add_floor(b, name)
+    else:
+        project.add_building(name)
+    return objects
@@ -0,0 +1,77 @@
+from .geometry import scanline_spans
+
+
+class OccupancyRaster:
+    """Trwały raster zajętości kratek siatki (zakresy kolumn w wierszach) liczony per obiekt.
+
+    Po zmianie obiektu (nowa wersja geometrii) przeliczane są tylko jego
+    kratki oraz scalone wiersze, w których leżały przed zmianą lub leżą
+    po niej. Cały raster jest ważny dla jednej wielkości kratki
+    (grid_base / scale).
+    """
+
+    def __init__(self):
+        self.grid_size = None
+        self._spans = {}   # id(obj) -> (obj, wersja, {gy: [(gx0, gx1)]})
+        self._rows = {}    # gy -> scalone zakresy wszystkich obiektów
+        self._owners = {}  # gy -> zbiór id(obj) mających kratki w wierszu
+
+    def clear(self):
+        self._spans.clear()
+        self._rows.clear()
+        self._owners.clear()
+
+    def rows(self, objects, grid_size):
+        """Scalone zakresy zajętych kolumn dla każdego wiersza: {gy: [(gx0, gx1)]}."""
+        if grid_size != self.grid_size:
+            self.clear()
+            self.grid_size = grid_size
+        touched = set()
+        alive = set()
+        for obj in objects:
+            key = id(obj)
+            alive.add(key)
+            entry = self._spans.get(key)
+            if entry is not None and entry[0] is obj and entry[1] == obj.version:
+                continue
+            touched.update(self._drop(key))
+            spans = scanline_spans(obj.coords, 0, 0, grid_size) if len(obj.coords) >= 6 else {}
+            self._spans[key] = (obj, obj.version, spans)
+            for gy in spans:
+                self._owners.setdefault(gy, set()).add(key)
+            touched.update(spans)
+        for key in [k for k in self._spans if k not in alive]:
+            touched.update(self._drop(key))
+        for gy in touched:
+            self._merge_row(gy)
+        return self._rows
+
+    def cells(self, objects, grid_size):
+        return {(gx, gy) for gy, row in self.rows(objects, grid_size).items()
+                for gx0, gx1 in row for gx in range(gx0, gx1)}
+
+    def _drop(self, key):
+        entry = self._spans.pop(key, None)
+        if entry is None:
+            return ()
+        for gy in entry[2]:
+            owners = self._owners.get(gy)
+            if owners is not None:
+                owners.discard(key)
+                if not owners:
+                    del self._owners[gy]
+        return entry[2].keys()
+
+    def _merge_row(self, gy):
+        spans = sorted(span for key in self._owners.get(gy, ()) for span in self._spans[key][2][gy])
+        merged = []
+        for gx0, gx1 in spans:
+            if merged and gx0 <= merged[-1][1]:
+                if gx1 > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], gx1)
+            else:
+                merged.append((gx0, gx1))
+        if merged:
+            self._rows[gy] = merged
+        else:
+            self._rows.pop(gy, None)
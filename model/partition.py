@@ -0,0 +1,420 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from .boolean import difference, union, polygon_edges, sweep, slab_rings, UNION
+from .geometry import shoelace2
+from .tenant_area import TenantArea
+
+# Automatyczny podział piętra na lokale według listy najemców z desired_area.
+#
+# Układ to drzewo cięć prostymi równoległymi do osi: wolna powierzchnia
+# (budynek bez powierzchni wspólnych) jest dzielona na pasy, a pasy na lokale,
+# w miejscach, gdzie pole po jednej stronie cięcia odpowiada sumie pól
+# przydzielonych najemców (pole jako funkcja położenia cięcia liczone z pasów
+# modelu boolean, więc ukośne ściany i powierzchnie wspólne są uwzględnione).
+# Kandydaci powstają dwiema metodami: pasy (strips) i squarified treemap,
+# a potem są poprawiani lokalnie (zamiana kolejności najemców, liczba pasów,
+# kierunek cięć). Każdy proces przeszukuje od innego ziarna do wspólnego
+# terminu; układy oceniane są błędem pola i zwartością kształtów.
+
+STRIPS = 'strips'
+SQUARIFIED = 'squarified'
+
+COMPACTNESS_WEIGHT = 0.25  # waga (1 - zwartość) w ocenie układu
+FRAGMENT_PENALTY = 1.0     # kara za nierozmieszczonego najemcę (bez lokalu albo z lokalem w kilku częściach)
+CLIMB_STEPS = 60           # kroki bez poprawy, po których przeszukiwanie zaczyna od nowa
+
+
+class Layout:
+    """Propozycja rozmieszczenia: ocena (mniej = lepiej), błąd pola, zwartość i gotowi najemcy."""
+
+    __slots__ = ('score', 'area_error', 'compactness', 'tenants')
+
+    def __init__(self, score, area_error, compactness, tenants):
+        self.score = score
+        self.area_error = area_error      # suma |pole - docelowe| / suma docelowych
+        self.compactness = compactness    # średnie 16A/P² (kwadrat = 1)
+        self.tenants = tenants            # TenantArea w kolejności listy najemców (bez obrysu, gdy nierozmieszczony)
+
+
+def _flat(ring):
+    return [v for pt in ring for v in pt]
+
+
+def _ring_edges(rings, transpose=False):
+    edges = []
+    for ring in rings:
+        if transpose:
+            ring = [(y, x) for x, y in ring]
+        edges.extend(polygon_edges(_flat(ring)))
+    return edges
+
+
+def _inner_rings(slabs, transpose=False):
+    # Wierzchołki na ukośnych ścianach są ułamkami - lokale mają współrzędne całkowite.
+    # Dół przedziału zaokrąglany jest w górę, a góra w dół, więc pętle leżą wewnątrz
+    # dokładnego obszaru, a kawałki po obu stronach cięcia dostają te same punkty.
+    rounded = []
+    for slab in slabs:
+        rounded.extend(_inner_slab(*slab[:3]))
+    rings = slab_rings(rounded)
+    if transpose:
+        rings = [[(y, x) for x, y in ring] for ring in rings]
+    return rings
+
+
+def _inner_slab(x0, x1, runs):
+    # Pas o całkowitych brzegach; przedział zwężający się do zera (wierzchołek przy brzegu
+    # pasa) po zaokrągleniu jest ucinany w najbliższym x, w którym ma jeszcze dodatnią wysokość
+    xl, xr = round(x0), round(x1)
+    if xl >= xr:
+        return []
+
+    def at(run, x):
+        t = (x - x0) / (x1 - x0)
+        ylb, yrb, ylt, yrt = run
+        return math.ceil(ylb + (yrb - ylb) * t), math.floor(ylt + (yrt - ylt) * t)
+
+    def valid(run, x):
+        bottom, top = at(run, x)
+        return bottom < top
+
+    spans = []
+    cuts = {xl, xr}
+    for run in runs:
+        a, b = xl, xr
+        while a < b and not valid(run, a):
+            a += 1
+        while b > a and not valid(run, b):
+            b -= 1
+        if a < b:
+            spans.append((run, a, b))
+            cuts.update((a, b))
+    cuts = sorted(cuts)
+    result = []
+    for p, q in zip(cuts, cuts[1:]):
+        kept = []
+        for run, a, b in spans:
+            if a <= p and q <= b and valid(run, p) and valid(run, q):
+                (bp, tp), (bq, tq) = at(run, p), at(run, q)
+                kept.append((bp, bq, tp, tq))
+        if kept:
+            result.append((p, q, kept, None))
+    return result
+
+
+class _Profile:
+    """Podwojone pole obszaru na lewo od pionowej prostej x (pasy zamienione na float)."""
+
+    def __init__(self, slabs):
+        self.slabs = [(float(xl), float(xr), [tuple(map(float, r)) for r in runs]) for xl, xr, runs, _ in slabs]
+        self.xl = [s[0] for s in self.slabs]
+        self.prefix = [0.0]
+        for slab in slabs:
+            self.prefix.append(self.prefix[-1] + float(slab[3]))
+
+    def total(self):
+        return self.prefix[-1]
+
+    def area2_left(self, x):
+        i = bisect_right(self.xl, x) - 1
+        if i < 0:
+            return 0.0
+        xl, xr, runs = self.slabs[i]
+        if x >= xr:
+            return self.prefix[i + 1]
+        t = (x - xl) / (xr - xl)
+        partial = 0.0
+        for ylb, yrb, ylt, yrt in runs:
+            h0 = ylt - ylb
+            partial += (x - xl) * (2*h0 + (yrt - yrb - h0) * t)
+        return self.prefix[i] + partial
+
+    def cut(self, target, lo, hi):
+        """Całkowite x z [lo, hi], dla którego pole na lewo jest najbliższe target."""
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.area2_left(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo > 0 and abs(self.area2_left(lo - 1) - target) <= abs(self.area2_left(lo) - target):
+            return lo - 1
+        return lo
+
+
+def _cut_slab(slab, x0, x1):
+    # Fragment pasa między x0 i x1 (brzegi przedziałów są liniowe w pasie)
+    xl, xr, runs, _ = slab
+    if x0 <= xl and x1 >= xr:
+        return slab
+    a, b = max(x0, xl), min(x1, xr)
+    w = xr - xl
+    cut = []
+    for ylb, yrb, ylt, yrt in runs:
+        cut.append((ylb + (yrb - ylb) * (a - xl) / w, ylb + (yrb - ylb) * (b - xl) / w,
+                    ylt + (yrt - ylt) * (a - xl) / w, ylt + (yrt - ylt) * (b - xl) / w))
+    return a, b, cut, None
+
+
+def split(rings, axis, weights):
+    """Dzieli obszar (pętle) cięciami prostopadłymi do osi axis ('x' albo 'y') w proporcji weights.
+
+    Zwraca listę obszarów (listy pętli o współrzędnych całkowitych), po jednym na wagę.
+    """
+    transpose = axis == 'y'
+    edges = [e + (0,) for e in _ring_edges(rings, transpose)]
+    if not edges:
+        return [[] for _ in weights]
+    slabs = sweep(edges, [0], UNION)
+    profile = _Profile(slabs)
+    lo = math.floor(min(e[0] for e in edges))
+    hi = math.ceil(max(e[2] for e in edges))
+    total = sum(weights)
+    cuts = [lo]
+    acc = 0
+    for w in weights[:-1]:
+        acc += w
+        cuts.append(max(cuts[-1], profile.cut(profile.total() * acc / total, lo, hi)))
+    cuts.append(hi)
+    # Pasy obszaru są liczone raz; część między cięciami to pasy z tego zakresu (skrajne przycięte)
+    pieces = []
+    xl = [slab[0] for slab in slabs]
+    for x0, x1 in zip(cuts, cuts[1:]):
+        first = max(0, bisect_right(xl, x0) - 1)
+        part = [_cut_slab(slab, x0, x1) for slab in slabs[first:bisect_right(xl, x1)] if slab[1] > x0 and slab[0] < x1]
+        pieces.append(_inner_rings(part, transpose) if part else [])
+    return pieces
+
+
+def _longer_axis(rings):
+    xs = [x for ring in rings for x, _ in ring]
+    ys = [y for ring in rings for _, y in ring]
+    return ('x' if max(xs) - min(xs) >= max(ys) - min(ys) else 'y'), max(xs) - min(xs), max(ys) - min(ys)
+
+
+def _strips(rings, items, axis, k, out):
+    # Kolejne grupy najemców o zbliżonej sumie pól; każda grupa to pas, pas dzielony w poprzek
+    total = sum(a for _, a in items)
+    k = max(1, min(k, len(items)))
+    groups = [[] for _ in range(k)]
+    acc = 0
+    for item in items:
+        g = min(k - 1, int(acc * k / total)) if total else 0
+        groups[g].append(item)
+        acc += item[1]
+    groups = [g for g in groups if g]
+    across = 'y' if axis == 'x' else 'x'
+    for group, strip in zip(groups, split(rings, axis, [sum(a for _, a in g) for g in groups])):
+        for (key, _), piece in zip(group, split(strip, across, [a for _, a in group]) if strip else [[]] * len(group)):
+            out[key] = piece
+
+
+def _squarify(rings, items, out):
+    # Rzędy jak w squarified treemap: do rzędu dokładany jest kolejny najemca,
+    # dopóki najgorsza proporcja boków w rzędzie się nie pogarsza
+    while items:
+        if len(items) == 1 or not rings:
+            for key, _ in items:
+                out[key] = rings if len(items) == 1 else []
+            return
+        axis, w, h = _longer_axis(rings)
+        long_side, short_side = (w, h) if axis == 'x' else (h, w)
+        total = sum(a for _, a in items)
+
+        def worst(row):
+            s = sum(a for _, a in row)
+            thickness = s / total * long_side
+            return max(max(thickness / (a / s * short_side), a / s * short_side / thickness) if a else math.inf
+                       for _, a in row)
+        row = [items[0]]
+        while len(row) < len(items) and worst(row + [items[len(row)]]) <= worst(row):
+            row.append(items[len(row)])
+        rest = items[len(row):]
+        row_area = sum(a for _, a in row)
+        if rest:
+            row_rings, rings = split(rings, axis, [row_area, total - row_area])
+        else:
+            row_rings, rings = rings, []
+        across = 'y' if axis == 'x' else 'x'
+        for (key, _), piece in zip(row, split(row_rings, across, [a for _, a in row]) if row_rings else [[]] * len(row)):
+            out[key] = piece
+        items = rest
+
+
+def _perimeter(ring):
+    return sum(math.hypot(bx - ax, by - ay) for (ax, ay), (bx, by) in zip(ring, ring[1:] + ring[:1]))
+
+
+def _valid(free, coords):
+    # Lokale nie mogą wychodzić poza wolną powierzchnię (budynek bez wspólnych) ani na siebie nachodzić
+    placed = [c for c in coords if c]
+    if not placed:
+        return True
+    if not difference(placed, [free]).is_empty():
+        return False
+    return union(placed).area2() == sum(abs(shoelace2(c)) for c in placed)
+
+
+def _evaluate(free, free_rings, targets, vacancy, genome):
+    """(ocena, błąd pola, zwartość, obrysy) dla genomu (metoda, oś, kolejność, liczba pasów).
+
+    Najemca bez lokalu albo z lokalem rozciętym na kilka części (lub z otworem)
+    ma obrys None - nie jest rozmieszczony i dostaje karę FRAGMENT_PENALTY;
+    układ wychodzący poza wolną powierzchnię lub z nachodzącymi lokalami ma ocenę inf.
+    """
+    method, axis, order, k = genome
+    items = [(i, targets[i] if i < len(targets) else vacancy) for i in order]
+    pieces = {}
+    if method == STRIPS:
+        _strips(free_rings, items, axis, k, pieces)
+    else:
+        _squarify(free_rings, items, pieces)
+    error = 0
+    compactness = 0.0
+    fragments = 0
+    coords = []
+    for i, target in enumerate(targets):
+        rings = pieces.get(i) or []
+        if not rings:
+            fragments += 1
+            error += target
+            coords.append(None)
+            continue
+        # przy kilku częściach ocena liczy największą (kierunek dla przeszukiwania), ale lokalu nie ma
+        ring = max(rings, key=lambda r: abs(shoelace2(_flat(r))))
+        area2 = abs(shoelace2(_flat(ring)))
+        error += abs(area2 - target)
+        compactness += min(1.0, 8 * area2 / _perimeter(ring) ** 2)
+        if len(rings) != 1:
+            fragments += 1
+            coords.append(None)
+        else:
+            coords.append(_flat(ring))
+    area_error = error / sum(targets)
+    compactness /= len(targets)
+    score = area_error + COMPACTNESS_WEIGHT * (1 - compactness) + FRAGMENT_PENALTY * fragments / len(targets)
+    if not _valid(free, coords):
+        score = math.inf
+    return score, area_error, compactness, coords
+
+
+def _mutate(genome, rng):
+    method, axis, order, k = genome
+    order = list(order)
+    r = rng.random()
+    if r < 0.5 and len(order) > 1:
+        i, j = rng.sample(range(len(order)), 2)
+        order[i], order[j] = order[j], order[i]
+    elif r < 0.7 and len(order) > 1:
+        order.insert(rng.randrange(len(order)), order.pop(rng.randrange(len(order))))
+    elif r < 0.85 and method == STRIPS:
+        k = max(1, min(len(order), k + rng.choice((-1, 1))))
+    else:
+        axis = 'y' if axis == 'x' else 'x'
+    return method, axis, order, k
+
+
+def partition_problem(building, commons, tenants, scale=0.1):
+    """Dane wejściowe search_layouts (bez obiektów modelu - można je przekazać do innego procesu).
+
+    Docelowe pole najemcy to desired_area, a gdy go nie ma - obecne pole obiektu.
+    """
+    targets = []
+    for tenant in tenants:
+        area = tenant.desired_area if tenant.desired_area else tenant.area(scale)
+        if not area or area <= 0:
+            raise ValueError(f"Najemca {tenant.name} nie ma docelowej powierzchni")
+        targets.append(round(2 * area / scale ** 2))
+    return list(building.coords), [list(c.coords) for c in commons if len(c.coords) >= 6], targets
+
+
+def search_layouts(problem, seed=0, deadline=None, count=3):
+    """Przeszukiwanie jednego procesu do chwili deadline (time.time()); zwraca do count najlepszych
+    układów jako krotki (ocena, błąd pola, zwartość, obrysy najemców)."""
+    building_coords, commons, targets = problem
+    free = difference([building_coords], commons)
+    free_rings = _inner_rings(free.slabs)
+    if not free_rings or not targets:
+        return []
+    n = len(targets)
+    # Nadwyżka wolnej powierzchni to dodatkowa pozycja "wolne", którą układ też musi gdzieś umieścić
+    vacancy = free.area2() - sum(targets)
+    order = sorted(range(n), key=lambda i: -targets[i]) + ([n] if vacancy > 0 else [])
+    vacancy = max(0, vacancy)
+    axis, _, _ = _longer_axis(free_rings)
+    rows = max(1, round(math.sqrt(n)))
+    rng = random.Random(seed)
+    starts = [(SQUARIFIED, axis, order, rows), (STRIPS, axis, order, rows),
+              (STRIPS, 'y' if axis == 'x' else 'x', order, rows)]
+    starts = starts[seed % len(starts):] + starts[:seed % len(starts)]
+    best = {}
+
+    def keep(result):
+        key = tuple(tuple(c) if c else () for c in result[3])
+        if key not in best:
+            best[key] = result
+            if len(best) > count:
+                del best[max(best, key=lambda k: best[k][0])]
+
+    while True:
+        if starts:
+            genome = starts.pop(0)
+        else:
+            shuffled = list(order)
+            rng.shuffle(shuffled)
+            genome = (rng.choice((STRIPS, SQUARIFIED)), rng.choice('xy'), shuffled, rng.randint(1, max(1, 2*rows)))
+        current = _evaluate(free, free_rings, targets, vacancy, genome)
+        keep(current)
+        stale = 0
+        while stale < CLIMB_STEPS and (deadline is None or time.time() < deadline):
+            candidate_genome = _mutate(genome, rng)
+            candidate = _evaluate(free, free_rings, targets, vacancy, candidate_genome)
+            keep(candidate)
+            if candidate[0] < current[0]:
+                genome, current, stale = candidate_genome, candidate, 0
+            else:
+                stale += 1
+        if deadline is None or time.time() >= deadline:
+            return sorted(best.values(), key=lambda r: r[0])
+
+
+def rank_layouts(results, tenants, count=3):
+    """Najlepsze count układów z wyników search_layouts (bez powtórzeń i bez niepoprawnych) jako obiekty Layout."""
+    unique = {}
+    for result in results:
+        if result[0] == math.inf:
+            continue
+        unique.setdefault(tuple(tuple(c) if c else () for c in result[3]), result)
+    layouts = []
+    for score, area_error, compactness, coords in sorted(unique.values(), key=lambda r: r[0])[:count]:
+        placed = []
+        for tenant, c in zip(tenants, coords):
+            obj = TenantArea(list(zip(c[0::2], c[1::2])) if c else [], tenant.color,
+                             name=tenant.name, desired_area=tenant.desired_area)
+            placed.append(obj)
+        layouts.append(Layout(score, area_error, compactness, placed))
+    return layouts
+
+
+def partition_floor(building, commons, tenants, scale=0.1, time_budget=2.0, count=3, workers=None, seed=0):
+    """Proponuje count najlepszych podziałów piętra na lokale najemców (lista Layout, najlepszy pierwszy).
+
+    Przeszukiwanie trwa time_budget sekund w workers procesach (domyślnie
+    tyle, ile rdzeni); workers=1 liczy w bieżącym procesie.
+    """
+    problem = partition_problem(building, commons, tenants, scale)
+    deadline = time.time() + time_budget
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = search_layouts(problem, seed, deadline, count)
+    else:
+        # spawn - jak w gui_tasks, fork procesu z działającym Qt nie jest bezpieczny
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(search_layouts, problem, seed + i, deadline, count) for i in range(workers)]
+            results = [r for f in futures for r in f.result()]
+    return rank_layouts(results, tenants, count)
@@ -0,0 +1,314 @@
+import io
+import json
+import struct
+from . import project_binary
+from .area_report import summarize
+from .building import Building
+from .common_area import CommonArea
+from .tenant_area import TenantArea
+
+# Projekt: budynki -> piętra -> powierzchnie. W pamięci jako obiekty trzymane
+# jest tylko aktywne piętro; pozostałe są zwartymi blokami w formacie .rpow
+# (albo surowymi danymi z JSON) razem z zapamiętanym podsumowaniem powierzchni.
+#
+# Plik wielokondygnacyjny (.rpowp), little-endian:
+#   nagłówek: magic 'RPWP', u16 wersja, u32 długość spisu
+#   spis:     JSON (UTF-8) - skala, aktywne piętro, budynki z piętrami:
+#             nazwa, offset i rozmiar bloku, podsumowanie
+#   bloki:    kolejne piętra jako pliki .rpow
+
+MAGIC = b'RPWP'
+VERSION = 1
+_HEADER = struct.Struct('<4sHI')
+_CLASSES = {'Building': Building, 'CommonArea': CommonArea, 'TenantArea': TenantArea}
+
+
+def object_from_dict(data):
+    """Obiekt właściwej klasy ze słownika JSON albo None dla nieznanego typu."""
+    cls = _CLASSES.get(data.get('type'))
+    return cls.from_dict(data) if cls is not None else None
+
+
+class Floor:
+    """Piętro: obiekty (gdy aktywne) albo blok .rpow / dane JSON z podsumowaniem (gdy nieaktywne)."""
+
+    __slots__ = ('name', 'objects', '_blob', '_data', '_summary')
+
+    def __init__(self, name, objects=None):
+        self.name = name
+        self.objects = objects if objects is not None else []
+        self._blob = None     # bajty .rpow nieaktywnego piętra
+        self._data = None     # lista słowników obiektów (piętro wczytane z JSON, jeszcze nieotwierane)
+        self._summary = None  # podsumowanie nieaktywnego piętra
+
+    @classmethod
+    def from_blob(cls, name, blob, summary=None):
+        floor = cls(name)
+        floor.objects = None
+        floor._blob = blob
+        floor._summary = summary
+        return floor
+
+    @classmethod
+    def from_data(cls, name, data):
+        floor = cls(name)
+        floor.objects = None
+        floor._data = data
+        return floor
+
+    @property
+    def loaded(self):
+        return self.objects is not None
+
+    def load(self):
+        """Obiekty piętra (tworzone przy pierwszym dostępie)."""
+        if self.objects is None:
+            if self._blob is not None:
+                with project_binary.ProjectReader(self._blob) as reader:
+                    self.objects = list(reader.iter_objects())
+            else:
+                self.objects = [o for o in map(object_from_dict, self._data or []) if o is not None]
+            self._blob = None
+            self._data = None
+            self._summary = None
+        return self.objects
+
+    def unload(self, scale):
+        """Zwalnia obiekty, zostawiając blok .rpow i podsumowanie."""
+        if self.objects is None:
+            return
+        self._summary = self.summary(scale)
+        self._blob = project_binary.dumps(self.objects, scale)
+        self.objects = None
+
+    def blob(self, scale):
+        if self.objects is not None:
+            return project_binary.dumps(self.objects, scale)
+        if self._blob is None:
+            # piętro z JSON zostaje niewczytane - obiekty są tylko tymczasowe, blok zastępuje dane
+            objects = [o for o in map(object_from_dict, self._data or []) if o is not None]
+            self._blob = project_binary.dumps(objects, scale)
+            self._data = None
+        return self._blob
+
+    def frozen(self, scale):
+        """Niezmienna kopia piętra: aktywne jako blok .rpow, nieaktywne współdzielą swój blok albo dane."""
+        if self.objects is not None:
+            return Floor.from_blob(self.name, project_binary.dumps(self.objects, scale))
+        if self._blob is not None:
+            return Floor.from_blob(self.name, self._blob, self._summary)
+        return Floor.from_data(self.name, self._data)
+
+    def summary(self, scale):
+        """Powierzchnie i liczby obiektów piętra (dla nieaktywnego - z pamięci podręcznej)."""
+        if self.objects is not None:
+            return summarize(scale, [(o.__class__.__name__, o.coords) for o in self.objects])
+        if self._summary is None:
+            self._summary = summarize(scale, self.records(scale))
+        return self._summary
+
+    def records(self, scale):
+        """Rekordy (typ, coords) bez tworzenia obiektów."""
+        if self.objects is not None:
+            return [(o.__class__.__name__, o.coords) for o in self.objects]
+        if self._blob is not None:
+            with project_binary.ProjectReader(self._blob) as reader:
+                return [(r['type'], r['coords']) for r in reader.iter_records()]
+        from .geometry import flatten_points
+        return [(d.get('type'), flatten_points(d.get('points', []))) for d in self._data or []]
+
+    def to_dict(self):
+        objects = self.objects
+        if objects is None and self._data is not None:
+            return {'name': self.name, 'objects': self._data}
+        if objects is None:
+            with project_binary.ProjectReader(self._blob) as reader:
+                objects = list(reader.iter_objects())
+        return {'name': self.name, 'objects': [o.to_dict() for o in objects]}
+
+
+class ProjectBuilding:
+    """Budynek projektu: nazwa i lista pięter."""
+
+    __slots__ = ('name', 'floors')
+
+    def __init__(self, name, floors=None):
+        self.name = name
+        self.floors = floors if floors is not None else []
+
+
+class Project:
+    """Budynki i piętra; aktywne jest jedno piętro, którego obiekty edytuje canvas."""
+
+    def __init__(self, scale=0.1):
+        self.scale = scale
+        self.buildings = []
+        self.active = None  # (indeks budynku, indeks piętra)
+
+    @classmethod
+    def single_floor(cls, objects, scale=0.1, building_name="Budynek 1", floor_name="Parter"):
+        project = cls(scale)
+        project.buildings.append(ProjectBuilding(building_name, [Floor(floor_name, list(objects))]))
+        project.active = (0, 0)
+        return project
+
+    def floor(self, b, f):
+        return self.buildings[b].floors[f]
+
+    def active_floor(self):
+        if self.active is None:
+            return None
+        return self.floor(*self.active)
+
+    def floors(self):
+        """(indeks budynku, indeks piętra, budynek, piętro) dla wszystkich pięter."""
+        for b, building in enumerate(self.buildings):
+            for f, floor in enumerate(building.floors):
+                yield b, f, building, floor
+
+    def add_building(self, name):
+        self.buildings.append(ProjectBuilding(name))
+        return len(self.buildings) - 1
+
+    def add_floor(self, b, name):
+        floors = self.buildings[b].floors
+        floors.append(Floor.from_blob(name, project_binary.dumps([], self.scale)))
+        return len(floors) - 1
+
+    def store_active(self, objects):
+        """Podmienia obiekty aktywnego piętra (np. lista edytowana przez canvas)."""
+        floor = self.active_floor()
+        if floor is not None:
+            floor.objects = objects
+
+    def set_active(self, b, f):
+        """Przełącza aktywne piętro: poprzednie jest zwijane do bloku, nowe wczytywane. Zwraca jego obiekty."""
+        if self.active == (b, f):
+            return self.active_floor().load()
+        current = self.active_floor()
+        if current is not None:
+            current.unload(self.scale)
+        self.active = (b, f)
+        return self.active_floor().load()
+
+    def frozen(self):
+        """Kopia projektu do zapisu w innym wątku; kopiowane są tylko obiekty aktywnego piętra."""
+        project = Project(self.scale)
+        project.active = self.active
+        for building in self.buildings:
+            project.buildings.append(ProjectBuilding(building.name, [fl.frozen(self.scale) for fl in building.floors]))
+        return project
+
+    def summary(self, active_summary=None):
+        """Suma podsumowań wszystkich pięter (nieaktywne z pamięci podręcznej).
+
+        active_summary: gotowe podsumowanie aktywnego piętra (np. z AreaLedger canvas).
+        """
+        total = {'building_area': 0.0, 'tenant_area': 0.0, 'common_area': 0.0, 'free_area': 0.0,
+                 'tenants': 0, 'commons': 0, 'floors': 0}
+        active = self.active_floor()
+        for _, _, _, floor in self.floors():
+            s = active_summary if floor is active and active_summary is not None else floor.summary(self.scale)
+            for key in ('building_area', 'tenant_area', 'common_area', 'free_area', 'tenants', 'commons'):
+                total[key] += s[key]
+            total['floors'] += 1
+        return total
+
+    def to_dict(self):
+        return {
+            'scale': self.scale,
+            'active': list(self.active) if self.active is not None else None,
+            'buildings': [{'name': b.name, 'floors': [fl.to_dict() for fl in b.floors]} for b in self.buildings],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Projekt z JSON: wielokondygnacyjny ('buildings') albo dotychczasowy jednopiętrowy ('objects')."""
+        scale = data.get('scale', 0.1)
+        if 'buildings' not in data:
+            objects = [o for o in map(object_from_dict, data.get('objects', [])) if o is not None]
+            return cls.single_floor(objects, scale)
+        project = cls(scale)
+        for b in data['buildings']:
+            project.buildings.append(ProjectBuilding(
+                b.get('name', 'Budynek'),
+                [Floor.from_data(fl.get('name', 'Piętro'), fl.get('objects', [])) for fl in b.get('floors', [])]))
+        active = data.get('active')
+        if active is None and project.buildings and project.buildings[0].floors:
+            active = (0, 0)
+        if active is not None:
+            project.active = tuple(active)
+            project.active_floor().load()
+        return project
+
+
+def write_project(f, project):
+    """Zapisuje projekt wielokondygnacyjny do otwartego pliku; piętra nieaktywne zapisywane są bez wczytywania."""
+    blobs = []
+    toc = {'scale': project.scale, 'active': list(project.active) if project.active else None, 'buildings': []}
+    offset = 0
+    for building in project.buildings:
+        floors = []
+        for floor in building.floors:
+            blob = floor.blob(project.scale)
+            floors.append({'name': floor.name, 'offset': offset, 'size': len(blob),
+                           'summary': floor.summary(project.scale)})
+            blobs.append(blob)
+            offset += len(blob)
+        toc['buildings'].append({'name': building.name, 'floors': floors})
+    toc_bytes = json.dumps(toc, ensure_ascii=False).encode('utf-8')
+    f.write(_HEADER.pack(MAGIC, VERSION, len(toc_bytes)))
+    f.write(toc_bytes)
+    for blob in blobs:
+        f.write(blob)
+
+
+def save_project(path, project):
+    """Zapisuje projekt wielokondygnacyjny (.rpowp)."""
+    with open(path, 'wb') as f:
+        write_project(f, project)
+
+
+def dumps(project):
+    buf = io.BytesIO()
+    write_project(buf, project)
+    return buf.getvalue()
+
+
+def _read_toc(f):
+    magic, version, toc_len = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != MAGIC:
+        raise ValueError('To nie jest plik projektu wielokondygnacyjnego .rpowp')
+    if version > VERSION:
+        raise ValueError(f'Nieobsługiwana wersja pliku projektu: {version}')
+    return json.loads(f.read(toc_len).decode('utf-8')), _HEADER.size + toc_len
+
+
+def load_project(source):
+    """Wczytuje projekt .rpowp (ścieżka albo bajty); obiekty powstają tylko dla aktywnego piętra."""
+    with (io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else open(source, 'rb')) as f:
+        toc, start = _read_toc(f)
+        project = Project(toc.get('scale', 0.1))
+        for b in toc['buildings']:
+            floors = []
+            for fl in b['floors']:
+                f.seek(start + fl['offset'])
+                floors.append(Floor.from_blob(fl['name'], f.read(fl['size']), fl.get('summary')))
+            project.buildings.append(ProjectBuilding(b['name'], floors))
+    if toc.get('active') is not None:
+        project.active = tuple(toc['active'])
+        project.active_floor().load()
+    return project
+
+
+def read_floor_records(path):
+    """(skala, rekordy (typ, coords) wszystkich pięter) - dla raportów bez tworzenia obiektów."""
+    records = []
+    with open(path, 'rb') as f:
+        toc, start = _read_toc(f)
+        for b in toc['buildings']:
+            for fl in b['floors']:
+                f.seek(start + fl['offset'])
+                with project_binary.ProjectReader(f.read(fl['size'])) as reader:
+                    records.extend((r['type'], r['coords']) for r in reader.iter_records())
+    return toc.get('scale', 0.1), records
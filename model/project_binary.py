@@ -0,0 +1,157 @@
+import mmap
+import struct
+import sys
+from array import array
+
+# Binarny format projektu (.rpow), little-endian:
+#   nagłówek:  magic 'RPOW', u16 wersja, u16 flagi, f64 skala, u32 liczba obiektów, u64 offset indeksu
+#   obiekty:   kolejne bloki, każdy: nagłówek obiektu, nazwa UTF-8, int32 x/y * liczba punktów
+#   indeks:    na końcu pliku, dla każdego obiektu offset bloku, typ, liczba punktów i bbox
+# Indeks pozwala czytać pojedyncze obiekty bez parsowania reszty pliku (mmap).
+
+MAGIC = b'RPOW'
+VERSION = 1
+TYPES = ('Building', 'CommonArea', 'TenantArea')
+
+_HEADER = struct.Struct('<4sHHdIQ')
+_OBJECT = struct.Struct('<B4BBdHI')    # typ, rgba, czy desired_area, desired_area, dł. nazwy, liczba punktów
+_INDEX = struct.Struct('<QBIiiii')     # offset, typ, liczba punktów, bbox
+_NO_BBOX = (0, 0, 0, 0)
+
+
+def _object_chunk(obj):
+    coords = obj.coords if isinstance(obj.coords, array) else array('i', obj.coords)
+    name = getattr(obj, 'name', None)
+    name_bytes = name.encode('utf-8') if name else b''
+    desired = getattr(obj, 'desired_area', None)
+    c = obj.color
+    head = _OBJECT.pack(TYPES.index(obj.__class__.__name__), c.red(), c.green(), c.blue(), c.alpha(),
+                        desired is not None, desired or 0.0, len(name_bytes), len(coords) // 2)
+    if sys.byteorder == 'big':
+        coords = array('i', coords)
+        coords.byteswap()
+    return head + name_bytes + coords.tobytes()
+
+
+def _read_object(buf, offset):
+    """(rekord, offset za blokiem) dla bloku obiektu zapisanego przez _object_chunk."""
+    type_code, r, g, b, a, has_desired, desired, name_len, n = _OBJECT.unpack_from(buf, offset)
+    pos = offset + _OBJECT.size
+    name = bytes(buf[pos:pos + name_len]).decode('utf-8') if name_len else None
+    pos += name_len
+    coords = array('i')
+    coords.frombytes(buf[pos:pos + 8 * n])
+    if sys.byteorder == 'big':
+        coords.byteswap()
+    return {
+        'type': TYPES[type_code],
+        'coords': coords,
+        'color': (r, g, b, a),
+        'name': name,
+        'desired_area': desired if has_desired else None,
+    }, pos + 8 * n
+
+
+def write_project(f, objects, scale):
+    """Zapisuje obiekty strumieniowo do otwartego pliku binarnego (obiekty nieznanych typów są pomijane)."""
+    start = f.tell()
+    f.write(_HEADER.pack(MAGIC, VERSION, 0, scale, 0, 0))
+    index = []
+    for obj in objects:
+        if obj.__class__.__name__ not in TYPES:
+            continue
+        offset = f.tell() - start
+        f.write(_object_chunk(obj))
+        bbox = obj.bounding_box() or _NO_BBOX
+        index.append(_INDEX.pack(offset, TYPES.index(obj.__class__.__name__), len(obj.coords) // 2, *bbox))
+    index_offset = f.tell() - start
+    f.write(b''.join(index))
+    end = f.tell()
+    f.seek(start)
+    f.write(_HEADER.pack(MAGIC, VERSION, 0, scale, len(index), index_offset))
+    f.seek(end)
+
+
+def save_project(path, objects, scale):
+    with open(path, 'wb') as f:
+        write_project(f, objects, scale)
+
+
+def dumps(objects, scale):
+    import io
+    buf = io.BytesIO()
+    write_project(buf, objects, scale)
+    return buf.getvalue()
+
+
+class ProjectReader:
+    """Odczyt pliku .rpow przez mmap (albo z bajtów w pamięci).
+
+    Rekordy i obiekty są tworzone dopiero przy odczycie: load(i) czyta
+    pojedynczy obiekt, iter_objects() strumieniowo cały projekt.
+    """
+
+    def __init__(self, source):
+        self._file = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self._buf = memoryview(source)
+        else:
+            self._file = open(source, 'rb')
+            self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.scale, self.count, self._index_offset = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError('To nie jest plik projektu .rpow')
+        if version > VERSION:
+            raise ValueError(f'Nieobsługiwana wersja pliku projektu: {version}')
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        if self._file is not None:
+            self._buf.close()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def index_entry(self, i):
+        """(offset, typ, liczba punktów, bbox) bez czytania samego obiektu."""
+        offset, type_code, n, *bbox = _INDEX.unpack_from(self._buf, self._index_offset + i * _INDEX.size)
+        return offset, TYPES[type_code], n, tuple(bbox)
+
+    def record(self, i):
+        """Surowe dane obiektu (bez Qt): typ, coords (array('i')), kolor, nazwa, desired_area."""
+        return _read_object(self._buf, self.index_entry(i)[0])[0]
+
+    def iter_records(self):
+        for i in range(self.count):
+            yield self.record(i)
+
+    def load(self, i):
+        return object_from_record(self.record(i))
+
+    def iter_objects(self):
+        for i in range(self.count):
+            yield self.load(i)
+
+
+def object_from_record(record):
+    from model.building import Building
+    from model.common_area import CommonArea
+    from model.tenant_area import TenantArea
+    from model.types import Color
+    if record['type'] == 'Building':
+        obj = Building()
+    elif record['type'] == 'CommonArea':
+        obj = CommonArea()
+        obj.color = Color(*record['color'])
+    else:
+        obj = TenantArea(color=Color(*record['color']), name=record['name'] or 'Najemca',
+                         desired_area=record['desired_area'])
+    obj.set_coords(record['coords'])
+    return obj
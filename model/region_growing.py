@@ -0,0 +1,261 @@
+import heapq
+import math
+from .geometry import bounding_box, edge_cells, scanline_spans, shoelace2, trace_loops
+
+COARSE = 8  # bok kratki zgrubnego rozrostu (w kratkach drobnych)
+MAX_CUTS = 8  # ile razy region może zostać przebudowany po zamknięciu pierścienia wokół przeszkody
+TOLERANCE = 0.1  # m² - największe pole kratki rastra, a więc dokładność wyniku
+
+
+def grow_region(seed_coords, desired_area, building_coords, obstacles, scale=0.1, tolerance=TOLERANCE, cancel=None):
+    """Rozrost wielokąta na rastrze zajętości do zadanej powierzchni (m²).
+
+    Wnętrze budynku jest rasteryzowane na kratki o polu nie większym niż
+    tolerance, kratki przeszkód (inne obiekty) i przecięte przez ściany są wykluczane. Region rośnie
+    od obecnego kształtu najemcy, zawsze dobierając wolną sąsiednią kratkę
+    najbliższą jego środka, aż liczba kratek odpowiada desired_area.
+    Ten sam mechanizm zmniejsza wielokąt, gdy desired_area jest mniejsze.
+    Wnętrze regionu rośnie najpierw na kratkach COARSE razy większych,
+    drobne kratki dobierane są tylko przy brzegu. Gdy region zamknie
+    pierścień wokół przeszkody, od dziury do krawędzi siatki jest
+    wycinana szczelina i rozrost zaczyna się od nowa.
+    Gdy wolnego miejsca brakuje (także po wycięciu szczelin), obrys ma mniejsze
+    pole niż desired_area - wywołujący porównuje je z żądanym.
+    Zwraca płaską listę współrzędnych nowego obrysu albo None.
+    cancel: opcjonalna funkcja bez argumentów - gdy zwróci True, obliczenia są przerywane.
+    """
+    if desired_area is None or desired_area <= 0 or len(building_coords) < 6 or len(seed_coords) < 2:
+        return None
+    cell = max(1, int(math.sqrt(tolerance) / scale))
+    cell_area = (cell * scale) ** 2
+    bx0, by0, bx1, by1 = bounding_box(building_coords)
+    cols = (bx1 - bx0) // cell + 1
+    rows = (by1 - by0) // cell + 1
+    # 1 - kratka wolna w całości wewnątrz budynku; kratki przecięte przez
+    # ściany lub brzegi przeszkód są zajęte, więc wynik nie wchodzi na nie nawet częściowo
+    free = bytearray(cols * rows)
+    for gy, row in scanline_spans(building_coords, bx0, by0, cell, cols, rows).items():
+        for gx0, gx1 in row:
+            free[gy*cols + gx0:gy*cols + gx1] = b'\x01' * (gx1 - gx0)
+    blocked = [edge_cells(building_coords, bx0, by0, cell, cols, rows)]
+    for coords in obstacles:
+        if len(coords) < 6:
+            continue
+        blocked.append(scanline_spans(coords, bx0, by0, cell, cols, rows))
+        blocked.append(edge_cells(coords, bx0, by0, cell, cols, rows))
+    for spans in blocked:
+        for gy, row in spans.items():
+            for gx0, gx1 in row:
+                free[gy*cols + gx0:gy*cols + gx1] = bytes(gx1 - gx0)
+    seed_spans = scanline_spans(seed_coords, bx0, by0, cell, cols, rows)
+    xs = seed_coords[0::2]
+    ys = seed_coords[1::2]
+    cx = (sum(xs) / len(xs) - bx0) / cell - 0.5
+    cy = (sum(ys) / len(ys) - by0) / cell - 0.5
+    target = max(1, round(desired_area / cell_area))
+    for _ in range(MAX_CUTS + 1):
+        # 1 - wolna kratka obecnego kształtu najemcy
+        seed = bytearray(len(free))
+        for gy, row in seed_spans.items():
+            for gx0, gx1 in row:
+                seed[gy*cols + gx0:gy*cols + gx1] = free[gy*cols + gx0:gy*cols + gx1]
+        start = _nearest(seed, cols, seed_spans, cx, cy)
+        if start is None:
+            start = int(round(cy)) * cols + int(round(cx))
+            if not (0 <= cx < cols and 0 <= cy < rows) or not free[start]:
+                return None
+        grown = _grow_coarse_fine(free, seed, cols, rows, cx, cy, start, target, cancel)
+        if grown is None:
+            return None
+        region, border = grown
+        loops = trace_loops(region, cols, border)
+        outline = max(loops, key=lambda loop: abs(shoelace2(loop)))
+        holes = [loop for loop in loops if loop is not outline]
+        if not holes:
+            break
+        for hole in holes:
+            _cut(free, cols, rows, hole)
+    else:
+        return None
+    # obrys musi obejmować dokładnie wybrane (wolne) kratki - inaczej przykryłby przeszkodę
+    if not outline or abs(shoelace2(outline)) != 2 * len(region):
+        return None
+    outline.extend(outline[:2])
+    return [v * cell + (bx0 if k % 2 == 0 else by0) for k, v in enumerate(outline)]
+
+
+def _grow_coarse_fine(free, seed, cols, rows, cx, cy, start, target, cancel):
+    # Zgrubny rozrost wypełnia wnętrze, drobny dobiera kratki od jego brzegu.
+    # Zwraca (zbiór kratek, kratki mogące leżeć na brzegu) albo None po przerwaniu.
+    region = set()
+    border = set()
+    frontier = set()
+    cfree = _Coarse(free, cols, rows)
+    ccols = cfree.cols
+    crows = cfree.rows
+    cstart = (start // cols // COARSE) * ccols + start % cols // COARSE
+    if target >= 9 * COARSE * COARSE and cfree[cstart]:
+        cseed = _Coarse(seed, cols, rows)
+        ccx = (cx + 0.5) / COARSE - 0.5
+        ccy = (cy + 0.5) / COARSE - 0.5
+        order = _grow(cfree, cseed, ccols, ccx, ccy, [cstart], set(), target // (COARSE * COARSE), cancel)
+        if order is None:
+            return None
+        coarse = set(order)
+        # Wnętrze zgrubnego regionu (spójne, od pierwszej kratki wnętrza) zostaje;
+        # pasmo brzegowe jest rozrastane na drobnych kratkach.
+        inner = set(c for c in order if all(nb in coarse for nb in _neighbours(c, ccols, crows)))
+        first = next((c for c in order if c in inner), None)
+        prefill = set()
+        stack = [first] if first is not None else []
+        while stack:
+            c = stack.pop()
+            if c in prefill:
+                continue
+            prefill.add(c)
+            stack.extend(nb for nb in _neighbours(c, ccols, crows) if nb in inner and nb not in prefill)
+        for c in prefill:
+            cgy, cgx = divmod(c, ccols)
+            x0 = cgx * COARSE
+            y0 = cgy * COARSE
+            for gy in range(y0, y0 + COARSE):
+                region.update(range(gy*cols + x0, gy*cols + x0 + COARSE))
+            # drobne kratki przy bokach, za którymi nie ma wnętrza
+            sides = ((c - ccols, [(y0*cols + x, -cols) for x in range(x0, x0 + COARSE)]),
+                     (c + ccols, [((y0 + COARSE - 1)*cols + x, cols) for x in range(x0, x0 + COARSE)]),
+                     (c - 1, [(y*cols + x0, -1) for y in range(y0, y0 + COARSE)]),
+                     (c + 1, [(y*cols + x0 + COARSE - 1, 1) for y in range(y0, y0 + COARSE)]))
+            for nb, edge in sides:
+                if nb not in prefill:
+                    for idx, step in edge:
+                        border.add(idx)
+                        frontier.add(idx + step)
+        frontier = set(idx for idx in frontier if idx not in region and free[idx])
+    if not region:
+        frontier = {start}
+    grown = _grow(free, seed, cols, cx, cy, list(frontier), region, target, cancel)
+    if grown is None:
+        return None
+    border.update(grown)
+    return region, border
+
+
+def _grow(free, seed, cols, cx, cy, frontier, region, target, cancel):
+    # Dobieranie wolnych kratek najbliższych środka (cx, cy), aż region ma target kratek.
+    # Zwraca listę dobranych kratek w kolejności albo None po przerwaniu.
+
+    def priority(idx):
+        gy, gx = divmod(idx, cols)
+        d = (gx - cx) ** 2 + (gy - cy) ** 2
+        # obecny kształt najemcy zajmujemy przed jakimkolwiek rozrostem
+        return d - 1e12 if seed[idx] else d
+
+    heap = [(priority(idx), idx) for idx in frontier]
+    heapq.heapify(heap)
+    queued = set(frontier)
+    order = []
+    size = len(free)
+    while heap and len(region) < target:
+        if cancel is not None and len(order) % 4096 == 0 and cancel():
+            return None
+        _, idx = heapq.heappop(heap)
+        region.add(idx)
+        order.append(idx)
+        gx = idx % cols
+        for nb, ok in ((idx - cols, idx >= cols), (idx + cols, idx + cols < size),
+                       (idx - 1, gx > 0), (idx + 1, gx + 1 < cols)):
+            if ok and nb not in queued and nb not in region and free[nb]:
+                queued.add(nb)
+                heapq.heappush(heap, (priority(nb), nb))
+    return order
+
+
+def _neighbours(idx, cols, rows):
+    gy, gx = divmod(idx, cols)
+    if gy > 0:
+        yield idx - cols
+    if gy + 1 < rows:
+        yield idx + cols
+    if gx > 0:
+        yield idx - 1
+    if gx + 1 < cols:
+        yield idx + 1
+
+
+class _Coarse:
+    """Maska kratek COARSE razy większych: 1, gdy wszystkie drobne kratki pod spodem mają 1.
+
+    Pasma wierszy są liczone dopiero przy pierwszym odczycie - zgrubny rozrost
+    dotyka tylko okolicy regionu, a nie całej siatki budynku.
+    """
+
+    def __init__(self, mask, cols, rows):
+        self.mask = mask
+        self.fine_cols = cols
+        self.fine_rows = rows
+        self.cols = -(-cols // COARSE)
+        self.rows = -(-rows // COARSE)
+        self._bands = {}
+
+    def __len__(self):
+        return self.cols * self.rows
+
+    def __getitem__(self, idx):
+        cgy, cgx = divmod(idx, self.cols)
+        band = self._bands.get(cgy)
+        if band is None:
+            band = self._bands[cgy] = self._band(cgy)
+        return band[cgx]
+
+    def _band(self, cgy):
+        # Iloczyn wierszy i przesunięcia bajtów na dużych liczbach całkowitych - bez pętli po kratkach
+        cols = self.fine_cols
+        width = self.cols * COARSE
+        pad = bytes(width - cols)
+        band = None
+        for gy in range(cgy * COARSE, cgy * COARSE + COARSE):
+            if gy >= self.fine_rows:
+                band = 0
+                break
+            row = int.from_bytes(self.mask[gy*cols:(gy + 1)*cols] + pad, 'big')
+            band = row if band is None else band & row
+        full = band
+        for s in range(1, COARSE):
+            full &= band >> (8 * s)
+        return full.to_bytes(width, 'big')[COARSE - 1::COARSE]
+
+
+def _nearest(mask, cols, rows, cx, cy):
+    # Indeks kratki z 1 w masce (w podanych wierszach) najbliższej punktowi (cx, cy) albo None
+    best = None
+    best_d = float('inf')
+    col = min(max(int(round(cx)), 0), cols - 1)
+    for gy in rows:
+        dy2 = (gy - cy) ** 2
+        if dy2 >= best_d:
+            continue
+        row = gy * cols
+        for idx in (mask.rfind(1, row, row + col + 1), mask.find(1, row + col, row + cols)):
+            if idx >= 0:
+                d = (idx - row - cx) ** 2 + dy2
+                if d < best_d:
+                    best, best_d = idx, d
+    return best
+
+
+def _cut(free, cols, rows, hole):
+    # Szczelina z dziury (pętla we współrzędnych siatki) do najbliższej krawędzi siatki:
+    # przeszkoda w dziurze łączy się z otoczeniem, więc żaden region nie otoczy jej ponownie.
+    xs = hole[0::2]
+    ys = hole[1::2]
+    pts = list(zip(xs, ys))
+    top_x, top_y = min(pts, key=lambda p: (p[1], p[0]))
+    bottom_x, bottom_y = max(pts, key=lambda p: (p[1], p[0]))
+    left_x, left_y = min(pts)
+    right_x, right_y = min(pts, key=lambda p: (-p[0], p[1]))
+    rays = (slice(top_x, top_y*cols + top_x, cols),
+            slice(bottom_y*cols + bottom_x - 1, rows*cols, cols),
+            slice(left_y*cols, left_y*cols + left_x),
+            slice(right_y*cols + right_x, (right_y + 1)*cols))
+    ray = min(rays, key=lambda r: free[r].count(1))
+    free[ray] = bytes(len(free[ray]))
@@ -0,0 +1,240 @@
+from .geometry import polygon_segments
+from .types import Point
+
+SNAP_DISTANCE = 10  # domyślny promień przyciągania i trafiania w wierzchołek (metryka manhattan)
+
+
+def within(ax, ay, bx, by, distance):
+    """Czy punkty są bliżej niż distance (metryka manhattan, jak przy przyciąganiu)."""
+    return abs(ax - bx) + abs(ay - by) < distance
+
+
+class VertexBuckets:
+    """Mapa haszująca wierzchołków w kratkach o boku równym promieniowi przyciągania.
+
+    Punkt bliższy niż cell_size leży w jednej z 3x3 sąsiednich kratek, więc
+    najbliższy wierzchołek znajduje się w oczekiwanym czasie O(1) niezależnie
+    od liczby wierzchołków planu.
+    """
+
+    def __init__(self, cell_size=SNAP_DISTANCE):
+        self.cell_size = cell_size
+        self._buckets = {}  # (cx, cy) -> lista (obj, i, x, y)
+        self._keys = {}     # id(obj) -> (obj, kratki jego wierzchołków)
+
+    def _key(self, x, y):
+        return x // self.cell_size, y // self.cell_size
+
+    def clear(self):
+        self._buckets.clear()
+        self._keys.clear()
+
+    def insert(self, obj, coords=None):
+        c = obj.coords if coords is None else coords
+        keys = []
+        for i, (x, y) in enumerate(zip(c[0::2], c[1::2])):
+            key = self._key(x, y)
+            self._buckets.setdefault(key, []).append((obj, i, x, y))
+            keys.append(key)
+        self._keys[id(obj)] = (obj, keys)
+
+    def remove(self, obj):
+        entry = self._keys.pop(id(obj), None)
+        if entry is None:
+            return
+        for key in set(entry[1]):
+            bucket = [e for e in self._buckets.get(key, ()) if e[0] is not obj]
+            if bucket:
+                self._buckets[key] = bucket
+            else:
+                self._buckets.pop(key, None)
+
+    def near(self, x, y, radius=None):
+        """Wierzchołki (obj, i, x, y) z kratek pokrywających promień (domyślnie 3x3 kratki)."""
+        size = self.cell_size
+        radius = size if radius is None else radius
+        cx0, cy0 = self._key(x - radius, y - radius)
+        cx1, cy1 = self._key(x + radius, y + radius)
+        buckets = self._buckets
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = buckets.get((cx, cy))
+                if bucket:
+                    yield from bucket
+
+    def nearest(self, x, y, max_dist=None, only=None, exclude=None):
+        """Najbliższy wierzchołek (obj, i, x, y) bliższy niż max_dist albo None."""
+        max_dist = self.cell_size if max_dist is None else max_dist
+        best = None
+        best_dist = max_dist
+        for entry in self.near(x, y, max_dist):
+            obj = entry[0]
+            if obj is exclude or (only is not None and obj is not only):
+                continue
+            dist = abs(entry[2] - x) + abs(entry[3] - y)
+            # remis rozstrzygany współrzędnymi - wynik nie zależy od kolejności w kratkach
+            if dist < best_dist or (dist == best_dist and best is not None and entry[2:] < best[2:]):
+                best, best_dist = entry, dist
+        return best
+
+
+class SpatialIndex:
+    """Jednorodna siatka nad odcinkami, wierzchołkami i prostokątami otaczającymi obiektów.
+
+    Zapytania o przyciąganie i trafianie kursorem dotykają tylko kratek
+    w pobliżu punktu, a przesunięcie jednego obiektu aktualizuje wyłącznie
+    jego wpisy. Kolejność rysowania (z) odpowiada kolejności wstawiania:
+    rebuild numeruje listę obiektów, insert kładzie obiekt na wierzch.
+    """
+
+    def __init__(self, cell_size=64, snap_distance=SNAP_DISTANCE, pick_cell_size=256):
+        self.cell_size = cell_size
+        self.pick_cell_size = pick_cell_size
+        self._segments = {}  # (cx, cy) -> lista (obj, j, ax, ay, bx, by)
+        self._boxes = {}     # (cx, cy) -> lista obiektów, których prostokąt otaczający zachodzi na kratkę
+        self._cells = {}     # id(obj) -> (obj, kratki odcinków, kratki prostokąta)
+        self._z = {}         # id(obj) -> numer warstwy (większy = wyżej)
+        self._next_z = 0
+        self.vertices = VertexBuckets(snap_distance)
+
+    def _cell(self, v):
+        return int(v // self.cell_size)
+
+    def clear(self):
+        self._segments.clear()
+        self._boxes.clear()
+        self._cells.clear()
+        self._z.clear()
+        self._next_z = 0
+        self.vertices.clear()
+
+    def rebuild(self, objects):
+        self.clear()
+        for obj in objects:
+            self.insert(obj)
+
+    def insert(self, obj, z=None):
+        if z is None:
+            z = self._next_z
+        self._z[id(obj)] = z
+        self._next_z = max(self._next_z, z + 1)
+        seg_cells = []
+        box_cells = []
+        c = obj.coords
+        self.vertices.insert(obj, c)
+        for j, (ax, ay, bx, by) in enumerate(polygon_segments(c)):
+            entry = (obj, j, ax, ay, bx, by)
+            for key in self._segment_cells(ax, ay, bx, by):
+                self._segments.setdefault(key, []).append(entry)
+                seg_cells.append(key)
+        bbox = obj.bounding_box()
+        if bbox is not None:
+            size = self.pick_cell_size
+            for cx in range(bbox[0] // size, bbox[2] // size + 1):
+                for cy in range(bbox[1] // size, bbox[3] // size + 1):
+                    self._boxes.setdefault((cx, cy), []).append(obj)
+                    box_cells.append((cx, cy))
+        self._cells[id(obj)] = (obj, seg_cells, box_cells)
+
+    def _segment_cells(self, ax, ay, bx, by):
+        # Kratki, przez które przechodzi odcinek (także te, których tylko dotyka), pasmami wierszy
+        # jak w edge_cells - liczba kratek rośnie z długością odcinka, a nie z polem jego prostokąta
+        size = self.cell_size
+        if ay > by:
+            ax, ay, bx, by = bx, by, ax, ay
+        cy0 = self._cell(ay)
+        cy1 = self._cell(by)
+        if cy0 == cy1:
+            return [(cx, cy0) for cx in range(self._cell(min(ax, bx)), self._cell(max(ax, bx)) + 1)]
+        # x na granicach pasm w arytmetyce całkowitej - bez błędów zaokrągleń na brzegach kratek
+        dy = by - ay
+        dx = bx - ax
+        cells = []
+        for cy in range(cy0, cy1 + 1):
+            xa = int((ax*dy + (max(ay, cy*size) - ay)*dx) // (dy*size))
+            xb = int((ax*dy + (min(by, (cy + 1)*size) - ay)*dx) // (dy*size))
+            if xa > xb:
+                xa, xb = xb, xa
+            cells.extend((cx, cy) for cx in range(xa, xb + 1))
+        return cells
+
+    def remove(self, obj):
+        self.vertices.remove(obj)
+        self._z.pop(id(obj), None)
+        entry = self._cells.pop(id(obj), None)
+        if entry is None:
+            return
+        for key in set(entry[1]):
+            bucket = [e for e in self._segments.get(key, []) if e[0] is not obj]
+            if bucket:
+                self._segments[key] = bucket
+            else:
+                self._segments.pop(key, None)
+        for key in entry[2]:
+            bucket = [o for o in self._boxes.get(key, ()) if o is not obj]
+            if bucket:
+                self._boxes[key] = bucket
+            else:
+                self._boxes.pop(key, None)
+
+    def update(self, obj):
+        # Przeindeksowanie tylko jednego obiektu (z zachowaniem jego warstwy)
+        z = self._z.get(id(obj))
+        self.remove(obj)
+        self.insert(obj, z)
+
+    def _query(self, grid, x, y, radius):
+        for cx in range(self._cell(x - radius), self._cell(x + radius) + 1):
+            for cy in range(self._cell(y - radius), self._cell(y + radius) + 1):
+                yield from grid.get((cx, cy), ())
+
+    def segments_near(self, x, y, radius, only=None, exclude=None):
+        """Zwraca odcinki (ax, ay, bx, by), których kratki leżą w promieniu od punktu."""
+        seen = set()
+        result = []
+        for obj, j, ax, ay, bx, by in self._query(self._segments, x, y, radius):
+            if (only is not None and obj is not only) or obj is exclude:
+                continue
+            key = (id(obj), j)
+            if key in seen:
+                continue
+            seen.add(key)
+            result.append((ax, ay, bx, by))
+        return result
+
+    def vertices_near(self, x, y, radius, exclude=None):
+        """Zwraca wierzchołki (x, y) innych obiektów z kratek w promieniu od punktu."""
+        return [(vx, vy) for obj, _, vx, vy in self.vertices.near(x, y, radius) if obj is not exclude]
+
+    def nearest_vertex(self, x, y, radius, only=None, exclude=None):
+        """Najbliższy wierzchołek (obj, i, x, y) bliższy niż radius albo None."""
+        return self.vertices.nearest(x, y, radius, only=only, exclude=exclude)
+
+    def pick(self, x, y, accept=None):
+        """Najwyższy obiekt zawierający punkt (jak przeglądanie listy od końca) albo None.
+
+        accept: opcjonalny filtr obiektów.
+        """
+        size = self.pick_cell_size
+        bucket = self._boxes.get((x // size, y // size))
+        if not bucket:
+            return None
+        z = self._z
+        point = Point(x, y)
+        for obj in sorted(bucket, key=lambda o: z[id(o)], reverse=True):
+            if (accept is None or accept(obj)) and obj.hit_test(point):
+                return obj
+        return None
+
+    def pick_vertex(self, x, y, radius=SNAP_DISTANCE):
+        """(obj, i): wierzchołek w promieniu na najwyższym obiekcie, który taki ma, albo None."""
+        best = None
+        z = self._z
+        for obj, i, vx, vy in self.vertices.near(x, y, radius):
+            dist = abs(vx - x) + abs(vy - y)
+            if dist >= radius:
+                continue
+            key = (z.get(id(obj), -1), -dist, -i)
+            if best is None or key > best[0]:
+                best = (key, obj, i)
+        return None if best is None else (best[1], best[2])
@@ -1,11 +1,13 @@
-from PySide6.QtGui import QColor
-from PySide6.QtCore import Qt, QPoint
-from PySide6.QtGui import QPolygon
-import math
+from array import array
 from .area_object import AreaObject
+from .types import Point, Color
+from .geometry import polygon_segments, project_point
+from .region_growing import grow_region
 
 class TenantArea(AreaObject):
-    def __init__(self, points=None, color=QColor(0,200,0,120), name="Najemca", desired_area=None):
+    __slots__ = ('name', 'desired_area')
+
+    def __init__(self, points=None, color=Color(0,200,0,120), name="Najemca", desired_area=None):
         super().__init__(points, color)
         self.name = name
         self.desired_area = desired_area  # w m2
@@ -24,35 +26,30 @@ class TenantArea(AreaObject):
         obj.desired_area = data.get('desired_area', None)
         return obj
 
-    def insert_vertex(self, pos: QPoint, threshold=10):
-        """Dodaje nowy wierzchołek na najbliższej krawędzi, jeśli kliknięcie jest blisko odcinka."""
-        min_dist = float('inf')
-        insert_idx = None
-        n = len(self.points)
-        for i in range(n):
-            a = self.points[i]
-            b = self.points[(i+1)%n]
-            # Rzutowanie punktu na odcinek ab
-            ab = b - a
-            ap = pos - a
-            ab_len2 = ab.x()**2 + ab.y()**2
-            if ab_len2 == 0:
-                continue
-            t = max(0, min(1, (ap.x()*ab.x() + ap.y()*ab.y()) / ab_len2))
-            proj_x = a.x() + ab.x()*t
-            proj_y = a.y() + ab.y()*t
-            proj = QPoint(round(proj_x), round(proj_y))
-            dist = (pos - proj).manhattanLength()
-            if dist < min_dist and dist < threshold:
-                min_dist = dist
-                insert_idx = i+1
-                insert_pt = proj
-        if insert_idx is not None:
-            self.points.insert(insert_idx, insert_pt)
-            return True
-        return False
-
-    # def auto_expand_to_area(self, building, others, scale=0.1, max_iter=1200):
-    #     ...existing code...
-    # def auto_expand_to_area_grid(self, building, others, scale=0.1, grid_size=None):
-    #     ...existing code...
+    def insert_vertex(self, pos: Point, threshold=10):
+        """Dodaje nowy wierzchołek na najbliższej krawędzi, jeśli kliknięcie jest blisko odcinka.
+
+        Zwraca indeks nowego wierzchołka albo None.
+        """
+        hit = project_point(pos.x(), pos.y(), polygon_segments(self.coords), threshold)
+        if hit is not None:
+            _, seg_idx, x, y = hit
+            self.coords[2*seg_idx + 2:2*seg_idx + 2] = array('i', (x, y))
+            self._changed()
+            return seg_idx + 1
+        return None
+
+    def auto_expand_inputs(self, building, others, scale=0.1):
+        """Kopia danych wejściowych dla grow_region - bezpieczna do użycia w innym wątku."""
+        obstacles = [list(o.coords) for o in others
+                     if o is not self and o is not building and o.__class__.__name__ != 'Building']
+        building_coords = list(building.coords) if building else []
+        return list(self.coords), self.desired_area, building_coords, obstacles, scale
+
+    def auto_expand_to_area(self, building, others, scale=0.1):
+        """Rozpycha (lub zmniejsza) najemcę do desired_area w obrysie budynku, omijając inne obiekty."""
+        coords = grow_region(*self.auto_expand_inputs(building, others, scale))
+        if coords is None:
+            return False
+        self.points = list(zip(coords[0::2], coords[1::2]))
+        return True
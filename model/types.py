@@ -0,0 +1,105 @@
+class Point:
+    """Punkt całkowitoliczbowy rdzenia geometrii (bez Qt).
+
+    Udostępnia ten sam podzbiór API co QPoint (x(), y(), +, -,
+    manhattanLength()), więc kod GUI może mieszać oba typy.
+    """
+
+    __slots__ = ('_x', '_y')
+
+    def __init__(self, x=0, y=0):
+        if hasattr(x, 'x'):
+            x, y = x.x(), x.y()
+        self._x = int(x)
+        self._y = int(y)
+
+    def x(self):
+        return self._x
+
+    def y(self):
+        return self._y
+
+    def __add__(self, other):
+        return Point(self._x + other.x(), self._y + other.y())
+
+    def __sub__(self, other):
+        return Point(self._x - other.x(), self._y - other.y())
+
+    def __rsub__(self, other):
+        return Point(other.x() - self._x, other.y() - self._y)
+
+    def __neg__(self):
+        return Point(-self._x, -self._y)
+
+    def __eq__(self, other):
+        if hasattr(other, 'x') and hasattr(other, 'y'):
+            return self._x == other.x() and self._y == other.y()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._x, self._y))
+
+    def __iter__(self):
+        yield self._x
+        yield self._y
+
+    def __repr__(self):
+        return f"Point({self._x}, {self._y})"
+
+    def manhattanLength(self):
+        return abs(self._x) + abs(self._y)
+
+    def isNull(self):
+        return self._x == 0 and self._y == 0
+
+
+class Color:
+    """Kolor RGBA rdzenia (bez Qt), z akcesorami zgodnymi z QColor."""
+
+    __slots__ = ('_rgba',)
+
+    def __init__(self, r=0, g=0, b=0, a=255):
+        self._rgba = (int(r), int(g), int(b), int(a))
+
+    @classmethod
+    def from_any(cls, value):
+        """Color z Color, QColor (lub obiektu z red()/green()/blue()/alpha()) albo krotki RGBA."""
+        if isinstance(value, cls):
+            return value
+        if hasattr(value, 'red'):
+            return cls(value.red(), value.green(), value.blue(), value.alpha())
+        return cls(*value)
+
+    def red(self):
+        return self._rgba[0]
+
+    def green(self):
+        return self._rgba[1]
+
+    def blue(self):
+        return self._rgba[2]
+
+    def alpha(self):
+        return self._rgba[3]
+
+    def rgba(self):
+        # ten sam układ co QColor.rgba(): 0xAARRGGBB
+        r, g, b, a = self._rgba
+        return (a << 24) | (r << 16) | (g << 8) | b
+
+    def isValid(self):
+        return True
+
+    def __eq__(self, other):
+        if isinstance(other, Color):
+            return self._rgba == other._rgba
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self._rgba)
+
+    def __iter__(self):
+        return iter(self._rgba)
+
+    def __repr__(self):
+        return "Color({}, {}, {}, {})".format(*self._rgba)
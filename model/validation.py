@@ -0,0 +1,274 @@
+import heapq
+from .geometry import polygon_segments
+
+# Walidacja planu: nakładanie się powierzchni, wychodzenie poza budynek
+# i samoprzecięcia obrysów. Faza wstępna to zamiatanie po osi x (prostokąty
+# otaczające obiektów, potem odcinki), więc koszt jest bliski n log n,
+# a wyniki są cache'owane per wersja geometrii obiektów.
+
+OVERLAP = 'overlap'                      # dwie powierzchnie nachodzą na siebie
+OUTSIDE = 'outside'                      # powierzchnia wychodzi poza budynek
+SELF_INTERSECTION = 'self_intersection'  # obrys przecina sam siebie
+
+
+class Issue:
+    """Wykryty problem: rodzaj, obiekty, obszar (x0, y0, x1, y1) i punkty przecięć krawędzi."""
+
+    __slots__ = ('kind', 'objects', 'rect', 'points')
+
+    def __init__(self, kind, objects, rect, points=()):
+        self.kind = kind
+        self.objects = objects
+        self.rect = rect
+        self.points = list(points)
+
+    def __repr__(self):
+        return f"Issue({self.kind}, {[o.__class__.__name__ for o in self.objects]}, {self.rect})"
+
+
+def _orient(ax, ay, bx, by, cx, cy):
+    return (bx - ax)*(cy - ay) - (by - ay)*(cx - ax)
+
+
+def _crossing(s, t):
+    """Punkt przecięcia właściwego (wnętrza obu odcinków, nie współliniowe) albo None."""
+    ax, ay, bx, by = s
+    cx, cy, dx, dy = t
+    o1 = _orient(ax, ay, bx, by, cx, cy)
+    o2 = _orient(ax, ay, bx, by, dx, dy)
+    if o1 == 0 or o2 == 0 or (o1 > 0) == (o2 > 0):
+        return None
+    o3 = _orient(cx, cy, dx, dy, ax, ay)
+    o4 = _orient(cx, cy, dx, dy, bx, by)
+    if o3 == 0 or o4 == 0 or (o3 > 0) == (o4 > 0):
+        return None
+    t = o3 / (o3 - o4)
+    return ax + (bx - ax)*t, ay + (by - ay)*t
+
+
+def _touching(s, t):
+    """Punkt wspólny odcinków (także styk końcem i nakładanie współliniowe) albo None."""
+    p = _crossing(s, t)
+    if p is not None:
+        return p
+    for (px, py), seg in (((s[0], s[1]), t), ((s[2], s[3]), t), ((t[0], t[1]), s), ((t[2], t[3]), s)):
+        if _on_segment(seg, px, py):
+            return px, py
+    return None
+
+
+def _on_segment(seg, px, py):
+    ax, ay, bx, by = seg
+    if _orient(ax, ay, bx, by, px, py) != 0:
+        return False
+    return min(ax, bx) <= px <= max(ax, bx) and min(ay, by) <= py <= max(ay, by)
+
+
+def _segment_pairs(segs_a, segs_b):
+    """Pary (i, j) odcinków z segs_a i segs_b o nachodzących prostokątach - zamiatanie po x."""
+    events = [(min(s[0], s[2]), 0, i) for i, s in enumerate(segs_a)]
+    events += [(min(s[0], s[2]), 1, j) for j, s in enumerate(segs_b)]
+    events.sort()
+    active = ([], [])
+    for x, side, k in events:
+        seg = (segs_a, segs_b)[side][k]
+        y0, y1 = min(seg[1], seg[3]), max(seg[1], seg[3])
+        other = active[1 - side]
+        # usuwanie odcinków, które skończyły się przed bieżącym x
+        other[:] = [e for e in other if e[0] >= x]
+        for x1, oy0, oy1, m in other:
+            if oy0 <= y1 and y0 <= oy1:
+                yield (k, m) if side == 0 else (m, k)
+        active[side].append((max(seg[0], seg[2]), y0, y1, k))
+
+
+def _locate(segments, px, py):
+    """1 - punkt wewnątrz wielokąta, 0 - na obrysie, -1 - na zewnątrz (reguła even-odd)."""
+    inside = False
+    for ax, ay, bx, by in segments:
+        if (ay > py) != (by > py):
+            cross = (bx - ax)*(py - ay) - (by - ay)*(px - ax)
+            if cross == 0:
+                return 0
+            # przecięcie promienia w prawo od punktu
+            if (cross > 0) == (by > ay):
+                inside = not inside
+        elif ay == by == py and min(ax, bx) <= px <= max(ax, bx):
+            return 0
+        elif (ax == px and ay == py) or (bx == px and by == py):
+            return 0
+    return 1 if inside else -1
+
+
+def _segments(obj):
+    return obj.cached('segments', lambda: polygon_segments(obj.coords))
+
+
+def _probe_points(obj):
+    # Wierzchołki, środki krawędzi i środek ciężkości - wykrywają też nakrycie bez przecięć krawędzi
+    def compute():
+        c = obj.coords
+        segments = _segments(obj)
+        points = [(c[i], c[i + 1]) for i in range(0, len(c), 2)]
+        points += [((ax + bx) / 2, (ay + by) / 2) for ax, ay, bx, by in segments]
+        n = len(points)
+        if n:
+            cx = sum(p[0] for p in points) / n
+            cy = sum(p[1] for p in points) / n
+            if _locate(segments, cx, cy) > 0:
+                points.append((cx, cy))
+        return points
+    return obj.cached('probe_points', compute)
+
+
+def _vertices(obj):
+    c = obj.coords
+    return [(c[i], c[i + 1]) for i in range(0, len(c), 2)]
+
+
+def _rect(points):
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _clip_segments(segments, bbox):
+    x0, y0, x1, y1 = bbox
+    return [s for s in segments
+            if max(s[0], s[2]) >= x0 and min(s[0], s[2]) <= x1 and max(s[1], s[3]) >= y0 and min(s[1], s[3]) <= y1]
+
+
+def check_overlap(a, b):
+    """Issue OVERLAP, gdy wnętrza obiektów a i b mają część wspólną, inaczej None."""
+    sa, sb = _segments(a), _segments(b)
+    ba, bb = a.bounding_box(), b.bounding_box()
+    common = (max(ba[0], bb[0]), max(ba[1], bb[1]), min(ba[2], bb[2]), min(ba[3], bb[3]))
+    qa, qb = _clip_segments(sa, common), _clip_segments(sb, common)
+    crossings = []
+    for i, j in _segment_pairs(qa, qb):
+        p = _crossing(qa[i], qb[j])
+        if p is not None:
+            crossings.append(p)
+    if not crossings and not any(_locate(sb, *p) > 0 for p in _probe_points(a)) \
+            and not any(_locate(sa, *p) > 0 for p in _probe_points(b)):
+        return None
+    # obszar części wspólnej: przecięcia oraz wierzchołki i środki krawędzi leżące w drugim obiekcie;
+    # wierzchołki na obrysie tylko gdy inaczej obszar byłby zdegenerowany (np. identyczne obiekty)
+    corners = crossings + [p for p in _probe_points(a) if _locate(sb, *p) > 0]
+    corners += [p for p in _probe_points(b) if _locate(sa, *p) > 0]
+    rect = _rect(corners) if corners else None
+    if rect is None or rect[0] == rect[2] or rect[1] == rect[3]:
+        corners += [p for p in _vertices(a) if _locate(sb, *p) == 0]
+        corners += [p for p in _vertices(b) if _locate(sa, *p) == 0]
+        rect = _rect(corners)
+    return Issue(OVERLAP, (a, b), rect, crossings)
+
+
+def check_inside(obj, building):
+    """Issue OUTSIDE, gdy obiekt wychodzi poza obrys budynku, inaczej None."""
+    s, sb = _segments(obj), _segments(building)
+    crossings = []
+    for i, j in _segment_pairs(s, sb):
+        p = _crossing(s[i], sb[j])
+        if p is not None:
+            crossings.append(p)
+    outside = [p for p in _probe_points(obj) if _locate(sb, *p) < 0]
+    if not crossings and not outside:
+        return None
+    # wierzchołki budynku wewnątrz obiektu też ograniczają część wystającą
+    corners = [p for p in _vertices(building) if _locate(s, *p) > 0]
+    return Issue(OUTSIDE, (obj, building), _rect(crossings + outside + corners), crossings)
+
+
+def check_self_intersection(obj):
+    """Issue SELF_INTERSECTION dla przecinających się lub stykających niesąsiednich krawędzi."""
+    segments = _segments(obj)
+    n = len(segments)
+    if n < 4:
+        return None
+    points = []
+    for i, j in _segment_pairs(segments, segments):
+        if i >= j or j - i == 1 or (i == 0 and j == n - 1):
+            continue
+        p = _touching(segments[i], segments[j])
+        if p is not None:
+            points.append(p)
+    if not points:
+        return None
+    return Issue(SELF_INTERSECTION, (obj,), _rect(points), points)
+
+
+class Validator:
+    """Przyrostowa walidacja listy obiektów.
+
+    Wyniki są pamiętane per wersja geometrii: po edycji jednego obiektu
+    przeliczane są tylko testy z jego udziałem. Pary do sprawdzenia
+    wybiera zamiatanie prostokątów otaczających po osi x.
+    """
+
+    def __init__(self):
+        self._self = {}     # id(obj) -> (obj, wersja, issue)
+        self._inside = {}   # id(obj) -> (obj, wersja, budynek, wersja budynku, issue)
+        self._pairs = {}    # (id(a), id(b)) -> (a, b, wersja a, wersja b, issue)
+
+    def clear(self):
+        self._self.clear()
+        self._inside.clear()
+        self._pairs.clear()
+
+    def validate(self, objects):
+        """Lista wszystkich problemów (Issue) dla bieżącego stanu obiektów."""
+        issues = []
+        building = next((o for o in objects if o.__class__.__name__ == 'Building'), None)
+        areas = [o for o in objects if o.__class__.__name__ in ('TenantArea', 'CommonArea') and len(o.coords) >= 6]
+        # samoprzecięcia
+        cache = {}
+        for obj in objects:
+            entry = self._self.get(id(obj))
+            if entry is None or entry[0] is not obj or entry[1] != obj.version:
+                entry = (obj, obj.version, check_self_intersection(obj))
+            cache[id(obj)] = entry
+            if entry[2] is not None:
+                issues.append(entry[2])
+        self._self = cache
+        # zawieranie w budynku
+        cache = {}
+        if building is not None and len(building.coords) >= 6:
+            for obj in areas:
+                entry = self._inside.get(id(obj))
+                if (entry is None or entry[0] is not obj or entry[1] != obj.version
+                        or entry[2] is not building or entry[3] != building.version):
+                    entry = (obj, obj.version, building, building.version, check_inside(obj, building))
+                cache[id(obj)] = entry
+                if entry[4] is not None:
+                    issues.append(entry[4])
+        self._inside = cache
+        # nakładanie się: pary wybrane zamiataniem prostokątów otaczających
+        cache = {}
+        for a, b in self._candidate_pairs(areas):
+            key = (id(a), id(b))
+            entry = self._pairs.get(key)
+            if (entry is None or entry[0] is not a or entry[1] is not b
+                    or entry[2] != a.version or entry[3] != b.version):
+                entry = (a, b, a.version, b.version, check_overlap(a, b))
+            cache[key] = entry
+            if entry[4] is not None:
+                issues.append(entry[4])
+        self._pairs = cache
+        return issues
+
+    @staticmethod
+    def _candidate_pairs(objects):
+        boxes = sorted(((obj.bounding_box(), i, obj) for i, obj in enumerate(objects)), key=lambda e: e[0][0])
+        active = {}  # i -> (bbox, obj) dla prostokątów przecinanych przez miotłę
+        ends = []    # kopiec (x1, i) - kolejność wypadania z miotły
+        for bbox, i, obj in boxes:
+            x0, y0, x1, y1 = bbox
+            while ends and ends[0][0] <= x0:
+                del active[heapq.heappop(ends)[1]]
+            for j, (other_bbox, other) in active.items():
+                # styk krawędziami (wspólna ściana) nie jest nałożeniem
+                if other_bbox[1] < y1 and y0 < other_bbox[3]:
+                    yield (other, obj) if j < i else (obj, other)
+            active[i] = (bbox, obj)
+            heapq.heappush(ends, (x1, i))